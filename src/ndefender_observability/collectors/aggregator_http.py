@@ -8,36 +8,59 @@ from typing import Any
 
 import httpx
 
+from ..health.budget import ErrorBudget
 from ..health.model import HealthState
+from ..metrics.instruments import timed_cycle
 from ..metrics.registry import COLLECTOR_EXCEPTIONS_TOTAL, POLL_ERRORS_TOTAL, POLL_LATENCY_SECONDS
 from ..state import ObservabilityState
 from ..utils.time import now_ms
+from .conditional import ConditionalCache
+from .status_flatten import StatusFlattener
 
 
 class AggregatorHttpCollector:
-    def __init__(self, base_url: str, interval_s: int = 2, timeout_s: float = 2.0) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        interval_s: int = 2,
+        timeout_s: float = 2.0,
+        status_flattener: StatusFlattener | None = None,
+        stale_after_s: int = 5,
+        max_errors_per_min: int = 5,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.interval_s = interval_s
         self.timeout_s = timeout_s
+        self.status_flattener = status_flattener
         self._stop = asyncio.Event()
+        self._budget = ErrorBudget(
+            "aggregator", max_errors_per_min=max_errors_per_min, hold_s=stale_after_s
+        )
+        self._cache = ConditionalCache("aggregator")
+        self._status_keys: list[str] = []
 
     async def run(self, store: ObservabilityState) -> None:
         async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout_s) as client:
             while not self._stop.is_set():
                 try:
-                    await self._poll_once(store, client)
+                    with timed_cycle("aggregator"):
+                        await self._poll_once(store, client)
                 except Exception as exc:
                     POLL_ERRORS_TOTAL.labels(subsystem="aggregator", kind="loop_exception").inc()
                     COLLECTOR_EXCEPTIONS_TOTAL.labels(subsystem="aggregator").inc()
+                    state, reasons = self._budget.apply(
+                        HealthState.OFFLINE, ["poll loop error"], errors=1
+                    )
                     store.update(
                         "aggregator",
-                        state=HealthState.OFFLINE,
+                        state=state,
                         last_error=str(exc),
                         last_error_ts=now_ms(),
-                        reasons=["poll loop error"],
+                        reasons=reasons,
                         updated_ts=now_ms(),
                         evidence={"base_url": self.base_url},
                     )
+                store.mark_cycle("aggregator")
                 try:
                     await asyncio.wait_for(self._stop.wait(), timeout=self.interval_s)
                 except TimeoutError:
@@ -51,13 +74,19 @@ class AggregatorHttpCollector:
         reasons: list[str] = []
         evidence: dict[str, Any] = {"base_url": self.base_url}
 
-        health_ok, health_status = await self._request_json(client, "/api/v1/health", "health")
-        status_ok, status_payload = await self._request_json(client, "/api/v1/status", "status")
+        health_ok, health_status, _ = await self._request_json(client, "/api/v1/health", "health")
+        status_ok, status_payload, status_changed = await self._request_json(
+            client, "/api/v1/status", "status"
+        )
 
         if health_ok:
             evidence["health"] = health_status
         if status_ok:
-            evidence["status_keys"] = list(status_payload.keys())
+            if status_changed:
+                self._status_keys = list(status_payload.keys())
+                if self.status_flattener is not None:
+                    self.status_flattener.apply(status_payload)
+            evidence["status_keys"] = self._status_keys
 
         if not health_ok:
             reasons.append("health endpoint failed")
@@ -74,13 +103,16 @@ class AggregatorHttpCollector:
             state = HealthState.OFFLINE
             last_error = "poll failed"
 
+        errors = [health_ok, status_ok].count(False)
+        state, reasons = self._budget.apply(state, reasons or ["ok"], errors=errors)
+
         store.update(
             "aggregator",
             state=state,
             updated_ts=now,
             last_error=last_error,
             last_error_ts=now if last_error else None,
-            reasons=reasons or ["ok"],
+            reasons=reasons,
             evidence=evidence,
         )
 
@@ -89,20 +121,26 @@ class AggregatorHttpCollector:
         client: httpx.AsyncClient,
         endpoint: str,
         kind: str,
-    ) -> tuple[bool, dict[str, Any]]:
+    ) -> tuple[bool, dict[str, Any], bool]:
+        """Fetch an endpoint, returning `(ok, payload, changed)`."""
         start = time.perf_counter()
         try:
-            resp = await client.get(endpoint)
+            resp = await client.get(endpoint, headers=self._cache.request_headers(endpoint))
             latency = time.perf_counter() - start
             POLL_LATENCY_SECONDS.labels(subsystem="aggregator", endpoint=kind).observe(latency)
+            if resp.status_code == 304:
+                cached = self._cache.not_modified(endpoint, kind)
+                if cached is not None:
+                    return True, cached, False
             if resp.status_code != 200:
                 POLL_ERRORS_TOTAL.labels(
                     subsystem="aggregator", kind=f"{kind}_http_{resp.status_code}"
                 ).inc()
-                return False, {}
-            return True, resp.json()
+                return False, {}, False
+            payload, changed = self._cache.decode(endpoint, kind, resp)
+            return True, payload, changed
         except Exception:
             latency = time.perf_counter() - start
             POLL_LATENCY_SECONDS.labels(subsystem="aggregator", endpoint=kind).observe(latency)
             POLL_ERRORS_TOTAL.labels(subsystem="aggregator", kind=f"{kind}_exception").inc()
-            return False, {}
+            return False, {}, False
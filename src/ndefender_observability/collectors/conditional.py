@@ -0,0 +1,73 @@
+"""Conditional GET support for polled HTTP endpoints."""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any
+
+from ..metrics.registry import POLL_CACHE_HITS_TOTAL, POLL_CACHE_MISSES_TOTAL
+
+
+@dataclass
+class _CacheEntry:
+    etag: str | None = None
+    last_modified: str | None = None
+    digest: bytes | None = None
+    payload: dict[str, Any] = field(default_factory=dict)
+
+
+class ConditionalCache:
+    """Per-endpoint validators and last decoded payload.
+
+    Sends `If-None-Match` / `If-Modified-Since` when upstream provided
+    validators. When it did not, the raw body is hashed and the cached
+    payload is reused if the digest matches, skipping JSON decode.
+    """
+
+    def __init__(self, subsystem: str) -> None:
+        self.subsystem = subsystem
+        self._entries: dict[str, _CacheEntry] = {}
+
+    def request_headers(self, endpoint: str) -> dict[str, str] | None:
+        entry = self._entries.get(endpoint)
+        if entry is None:
+            return None
+        headers: dict[str, str] = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers or None
+
+    def not_modified(self, endpoint: str, kind: str) -> dict[str, Any] | None:
+        """Return the cached payload for a 304 response, if any."""
+        entry = self._entries.get(endpoint)
+        if entry is None:
+            return None
+        POLL_CACHE_HITS_TOTAL.labels(
+            subsystem=self.subsystem, endpoint=kind, reason="not_modified"
+        ).inc()
+        return entry.payload
+
+    def decode(self, endpoint: str, kind: str, resp: Any) -> tuple[dict[str, Any], bool]:
+        """Decode a 200 response, returning `(payload, changed)`."""
+        headers = resp.headers
+        digest = hashlib.blake2b(resp.content, digest_size=16).digest()
+        entry = self._entries.get(endpoint)
+        if entry is not None and entry.digest == digest:
+            entry.etag = headers.get("etag") or entry.etag
+            entry.last_modified = headers.get("last-modified") or entry.last_modified
+            POLL_CACHE_HITS_TOTAL.labels(
+                subsystem=self.subsystem, endpoint=kind, reason="unchanged"
+            ).inc()
+            return entry.payload, False
+        payload = resp.json()
+        self._entries[endpoint] = _CacheEntry(
+            etag=headers.get("etag"),
+            last_modified=headers.get("last-modified"),
+            digest=digest,
+            payload=payload,
+        )
+        POLL_CACHE_MISSES_TOTAL.labels(subsystem=self.subsystem, endpoint=kind).inc()
+        return payload, True
@@ -0,0 +1,250 @@
+"""UDP heartbeat/telemetry collector for the ESP32 bridge."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import struct
+import time
+from typing import Any
+
+from ..health.model import HealthState
+from ..metrics.instruments import timed_cycle
+from ..metrics.registry import (
+    ESP32_JITTER_SECONDS,
+    ESP32_MALFORMED_TOTAL,
+    ESP32_PACKETS_LOST_TOTAL,
+    ESP32_PACKETS_TOTAL,
+    ESP32_RSSI_DBM,
+    ESP32_VBAT_V,
+)
+from ..state import ObservabilityState
+from ..utils.time import now_ms
+
+# magic "NE", version, kind, seq, uptime_ms, rssi_dbm, vbat_mv (little endian, 16 bytes)
+BINARY_HEADER = struct.Struct("<2sBBIIhH")
+BINARY_MAGIC = b"NE"
+BINARY_VERSION = 1
+
+# Datagram fields copied into `evidence["telemetry"]`; anything else is dropped.
+TELEMETRY_FIELDS: dict[str, type | tuple[type, ...]] = {
+    "kind": str,
+    "seq": int,
+    "uptime_ms": (int, float),
+    "rssi_dbm": (int, float),
+    "vbat_mv": (int, float),
+}
+TELEMETRY_MAX_STR = 32
+# Numeric datagram fields; a JSON datagram with a non-finite one is malformed.
+NUMERIC_FIELDS = ("seq", "uptime_ms", "rssi_dbm", "vbat_mv")
+
+
+class _Esp32Protocol(asyncio.DatagramProtocol):
+    def __init__(self, collector: Esp32UdpCollector) -> None:
+        self._collector = collector
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        self._collector.handle_datagram(data, addr)
+
+
+class Esp32UdpCollector:
+    """Receive ESP32 datagrams and derive health from their cadence.
+
+    Datagrams are either a JSON object or the fixed little-endian
+    `BINARY_HEADER` struct. Sequence numbers give packet loss; the device
+    uptime clock against local arrival time gives RFC 3550 style jitter.
+    """
+
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 9110,
+        interval_s: int = 2,
+        stale_after_s: int = 5,
+        loss_degraded_ratio: float = 0.2,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.interval_s = interval_s
+        self.stale_after_s = stale_after_s
+        self.loss_degraded_ratio = loss_degraded_ratio
+        self.bound_port: int | None = None
+        self._stop = asyncio.Event()
+        self._last_seq: int | None = None
+        self._last_uptime_ms: int | None = None
+        self._last_arrival_s: float | None = None
+        self._jitter_s = 0.0
+        self._received = 0
+        self._lost = 0
+        self._window_received = 0
+        self._window_lost = 0
+        self._last_packet_ts: int | None = None
+        self._last_peer: str | None = None
+        self._telemetry: dict[str, Any] = {}
+
+    async def run(self, store: ObservabilityState) -> None:
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _Esp32Protocol(self), local_addr=(self.host, self.port)
+        )
+        self.bound_port = transport.get_extra_info("sockname")[1]
+        try:
+            while not self._stop.is_set():
+                with timed_cycle("esp32"):
+                    self.evaluate(store)
+                store.mark_cycle("esp32")
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=self.interval_s)
+                except TimeoutError:
+                    pass
+        finally:
+            transport.close()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def handle_datagram(self, data: bytes, addr: tuple[str, int] | None = None) -> bool:
+        arrival_s = time.monotonic()
+        view = memoryview(data)
+        if view[:1] == b"{":
+            fields = _parse_json_datagram(data)
+            kind = "json"
+        else:
+            fields = _parse_binary_datagram(view)
+            kind = "binary"
+        if fields is None:
+            ESP32_MALFORMED_TOTAL.inc()
+            return False
+
+        ESP32_PACKETS_TOTAL.labels(format=kind).inc()
+        self._received += 1
+        self._window_received += 1
+        self._last_packet_ts = now_ms()
+        if addr is not None:
+            self._last_peer = addr[0]
+        self._track_seq(fields.get("seq"))
+        self._track_jitter(fields.get("uptime_ms"), arrival_s)
+
+        rssi = fields.get("rssi_dbm")
+        if isinstance(rssi, int | float):
+            ESP32_RSSI_DBM.set(rssi)
+        vbat_mv = fields.get("vbat_mv")
+        if isinstance(vbat_mv, int | float) and vbat_mv:
+            ESP32_VBAT_V.set(vbat_mv / 1000)
+        self._telemetry = _telemetry_evidence(fields)
+        return True
+
+    def evaluate(self, store: ObservabilityState) -> None:
+        now = now_ms()
+        seen = self._window_received + self._window_lost
+        loss_ratio = self._window_lost / seen if seen else 0.0
+        self._window_received = 0
+        self._window_lost = 0
+
+        if self._last_packet_ts is None:
+            state = HealthState.OFFLINE
+            reasons = ["no packets yet"]
+            last_error = "no packets"
+        elif (now - self._last_packet_ts) / 1000 > self.stale_after_s:
+            state = HealthState.OFFLINE
+            reasons = ["heartbeat timeout"]
+            last_error = "stale"
+        elif loss_ratio > self.loss_degraded_ratio:
+            state = HealthState.DEGRADED
+            reasons = [f"packet loss {loss_ratio:.0%}"]
+            last_error = "packet loss"
+        else:
+            state = HealthState.OK
+            reasons = ["ok"]
+            last_error = None
+
+        store.update(
+            "esp32",
+            state=state,
+            updated_ts=self._last_packet_ts,
+            last_error=last_error,
+            last_error_ts=now if last_error else None,
+            reasons=reasons,
+            evidence={
+                "listen": f"{self.host}:{self.bound_port or self.port}",
+                "peer": self._last_peer,
+                "packets": self._received,
+                "lost": self._lost,
+                "jitter_ms": round(self._jitter_s * 1000, 3),
+                "last_seq": self._last_seq,
+                "telemetry": self._telemetry,
+            },
+        )
+
+    def _track_seq(self, seq: Any) -> None:
+        if not isinstance(seq, int) or isinstance(seq, bool):
+            return
+        last = self._last_seq
+        self._last_seq = seq
+        if last is None or seq <= last:
+            # First packet, reordering or a device reboot.
+            return
+        gap = seq - last - 1
+        if gap:
+            self._lost += gap
+            self._window_lost += gap
+            ESP32_PACKETS_LOST_TOTAL.inc(gap)
+
+    def _track_jitter(self, uptime_ms: Any, arrival_s: float) -> None:
+        if not isinstance(uptime_ms, int | float):
+            return
+        if self._last_uptime_ms is not None and self._last_arrival_s is not None:
+            sent_delta_s = (uptime_ms - self._last_uptime_ms) / 1000
+            if sent_delta_s >= 0:
+                transit_delta = abs((arrival_s - self._last_arrival_s) - sent_delta_s)
+                self._jitter_s += (transit_delta - self._jitter_s) / 16
+                ESP32_JITTER_SECONDS.set(self._jitter_s)
+        self._last_uptime_ms = uptime_ms
+        self._last_arrival_s = arrival_s
+
+
+def _parse_json_datagram(data: bytes) -> dict[str, Any] | None:
+    try:
+        payload = json.loads(data)
+    except (json.JSONDecodeError, UnicodeDecodeError, RecursionError):
+        # RecursionError: pathologically nested input.
+        return None
+    if not isinstance(payload, dict):
+        return None
+    for name in NUMERIC_FIELDS:
+        value = payload.get(name)
+        # `json.loads` accepts NaN/Infinity; they would poison gauges and jitter.
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+    return payload
+
+
+def _telemetry_evidence(fields: dict[str, Any]) -> dict[str, Any]:
+    """Whitelisted scalar fields of an untrusted datagram, safe to serve from the API."""
+    telemetry: dict[str, Any] = {}
+    for name, kind in TELEMETRY_FIELDS.items():
+        value = fields.get(name)
+        if isinstance(value, bool) or not isinstance(value, kind):
+            continue
+        if isinstance(value, str) and len(value) > TELEMETRY_MAX_STR:
+            continue
+        if isinstance(value, float) and not math.isfinite(value):
+            continue
+        telemetry[name] = value
+    return telemetry
+
+
+def _parse_binary_datagram(view: memoryview) -> dict[str, Any] | None:
+    if len(view) < BINARY_HEADER.size or view[:2] != BINARY_MAGIC:
+        return None
+    _, version, kind, seq, uptime_ms, rssi_dbm, vbat_mv = BINARY_HEADER.unpack_from(view)
+    if version != BINARY_VERSION:
+        return None
+    return {
+        "kind": "heartbeat" if kind == 0 else "telemetry",
+        "seq": seq,
+        "uptime_ms": uptime_ms,
+        "rssi_dbm": rssi_dbm,
+        "vbat_mv": vbat_mv,
+    }
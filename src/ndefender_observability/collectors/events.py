@@ -0,0 +1,133 @@
+"""Shared event counting, rate and freshness pipeline."""
+
+from __future__ import annotations
+
+import json
+import math
+from typing import Any
+
+from ..health.model import HealthState
+from ..metrics.cardinality import LabelGuard
+from ..metrics.registry import (
+    EVENTS_RATE_60S,
+    EVENTS_TOTAL,
+    JSONL_LAST_EVENT_TS,
+    JSONL_TAIL_LAG_SECONDS,
+)
+from ..utils.ring import CounterRing
+
+
+class EventTracker:
+    """Per-subsystem event counters, 60s rates and last-event freshness.
+
+    Fed by the JSONL tail and the push ingest collectors so both export the
+    same series and derive health the same way. The `type` label is guarded:
+    configured `event_types` always pass, at most `max_extra_types` others
+    are admitted and the rest are counted as `other`.
+    """
+
+    def __init__(
+        self,
+        subsystem: str,
+        event_types: list[str],
+        window_s: int = 60,
+        max_extra_types: int = 16,
+    ) -> None:
+        self.subsystem = subsystem
+        self.event_types = event_types
+        self.window_s = window_s
+        self._types = LabelGuard("ndefender_events", event_types, max_extra=max_extra_types)
+        self.last_event_ts_ms: int | None = None
+        self.last_event_type: str | None = None
+        self._rates: dict[str, CounterRing] = {}
+        self._counters: dict[str, Any] = {}
+
+    def record(self, payload: dict[str, Any], now: int) -> str | None:
+        event_type = _extract_event_type(payload)
+        if event_type:
+            event_type = self._types.resolve(event_type)
+            counter = self._counters.get(event_type)
+            if counter is None:
+                counter = EVENTS_TOTAL.labels(subsystem=self.subsystem, type=event_type)
+                self._counters[event_type] = counter
+            counter.inc()
+            ring = self._rates.get(event_type)
+            if ring is None:
+                ring = CounterRing(window_s=self.window_s, buckets=self.window_s)
+                self._rates[event_type] = ring
+            ring.add(now / 1000)
+            self.last_event_type = event_type
+        ts_ms = _extract_timestamp_ms(payload)
+        if ts_ms is not None:
+            self.last_event_ts_ms = ts_ms
+        elif event_type:
+            self.last_event_ts_ms = now
+        return event_type
+
+    def rate(self, event_type: str, now: int) -> float:
+        ring = self._rates.get(event_type)
+        if ring is None:
+            return 0.0
+        return ring.rate(now / 1000)
+
+    def publish(self, now: int) -> float | None:
+        """Export lag and rate gauges; return the last event age in seconds."""
+        age_s: float | None = None
+        if self.last_event_ts_ms is None:
+            JSONL_TAIL_LAG_SECONDS.labels(subsystem=self.subsystem).set(-1)
+        else:
+            age_s = max(0.0, (now - self.last_event_ts_ms) / 1000)
+            JSONL_TAIL_LAG_SECONDS.labels(subsystem=self.subsystem).set(age_s)
+            JSONL_LAST_EVENT_TS.labels(subsystem=self.subsystem).set(self.last_event_ts_ms / 1000)
+        for event_type in dict.fromkeys([*self.event_types, *self._rates]):
+            EVENTS_RATE_60S.labels(subsystem=self.subsystem, type=event_type).set(
+                self.rate(event_type, now)
+            )
+        return age_s
+
+    def derive_health(
+        self, age_s: float | None, stale_after_s: float
+    ) -> tuple[HealthState, list[str], str | None]:
+        if age_s is None:
+            return HealthState.DEGRADED, ["no events yet"], "no events"
+        if age_s <= stale_after_s:
+            return HealthState.OK, ["ok"], None
+        return HealthState.DEGRADED, ["stale events"], "stale"
+
+
+def parse_json(line: str | bytes) -> dict[str, Any] | None:
+    try:
+        data = json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError, RecursionError):
+        # RecursionError: pathologically nested input.
+        return None
+    if isinstance(data, dict):
+        return data
+    return None
+
+
+def _extract_event_type(payload: dict[str, Any]) -> str | None:
+    for key in ("type", "event_type", "event", "kind"):
+        value = payload.get(key)
+        if isinstance(value, str) and value:
+            return value
+    return None
+
+
+def _extract_timestamp_ms(payload: dict[str, Any]) -> int | None:
+    for key in ("timestamp_ms", "timestamp", "time_ms", "ts_ms", "ts"):
+        value = payload.get(key)
+        if value is None:
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            continue
+        if not math.isfinite(number):
+            continue
+        if key in {"timestamp", "ts"} and number < 1_000_000_000_000:
+            return int(number * 1000)
+        if number < 1_000_000_000_000:
+            return int(number * 1000)
+        return int(number)
+    return None
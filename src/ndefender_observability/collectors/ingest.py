@@ -0,0 +1,213 @@
+"""Push ingest collector for NDJSON event batches."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any
+
+from ..health.model import HealthState
+from ..metrics.instruments import timed_cycle
+from ..metrics.registry import (
+    INGEST_BATCHES_TOTAL,
+    INGEST_HEARTBEATS_TOTAL,
+    INGEST_QUEUE_BYTES,
+    INGEST_QUEUE_DEPTH,
+    INGEST_REJECTED_LINES_TOTAL,
+    INGEST_SEQ_LOST_TOTAL,
+)
+from ..state import ObservabilityState
+from ..utils.time import now_ms
+from .events import EventTracker, parse_json
+
+# Lines processed between event-loop yields while draining a batch.
+_YIELD_EVERY = 512
+
+
+@dataclass
+class _SourceState:
+    tracker: EventTracker
+    stale_after_s: int
+    last_seq: int | None = None
+    lost: int = 0
+    heartbeat_ts_ms: int | None = None
+    heartbeat_state: HealthState | None = None
+    heartbeat_reasons: list[str] | None = None
+    seen: bool = False
+
+
+class IngestCollector:
+    """Accept NDJSON batches pushed by engines and feed the event pipeline.
+
+    Each line is a JSON object with a `source` subsystem and an optional
+    `seq` counter. Lines with `"heartbeat": true` refresh freshness (and may
+    carry a reported `state` / `reasons`) without counting as events; all
+    other lines are counted exactly like JSONL tail events.
+
+    The queue is bounded both in batches and in bytes (`queue_max_bytes`),
+    so memory held by waiting bodies stays capped whatever their size.
+    """
+
+    def __init__(
+        self,
+        sources: dict[str, tuple[list[str], int]],
+        interval_s: float = 1.0,
+        queue_max_batches: int = 256,
+        queue_max_bytes: int = 16_777_216,
+        max_extra_event_types: int = 16,
+    ) -> None:
+        self.interval_s = interval_s
+        self._sources = {
+            name: _SourceState(
+                tracker=EventTracker(name, event_types, max_extra_types=max_extra_event_types),
+                stale_after_s=stale,
+            )
+            for name, (event_types, stale) in sources.items()
+        }
+        self._queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=queue_max_batches)
+        self.queue_max_bytes = queue_max_bytes
+        self._queued_bytes = 0
+        self._stop = asyncio.Event()
+
+    @property
+    def sources(self) -> list[str]:
+        return list(self._sources)
+
+    def offer(self, body: bytes) -> bool:
+        """Queue a batch without blocking; False means the queue is full."""
+        # An empty queue takes any batch, so one larger than the budget is not refused forever.
+        over_budget = self._queued_bytes and self._queued_bytes + len(body) > self.queue_max_bytes
+        if over_budget or self._queue.full():
+            INGEST_BATCHES_TOTAL.labels(result="rejected_full").inc()
+            return False
+        self._queue.put_nowait(body)
+        self._queued_bytes += len(body)
+        INGEST_BATCHES_TOTAL.labels(result="accepted").inc()
+        INGEST_QUEUE_DEPTH.set(self._queue.qsize())
+        INGEST_QUEUE_BYTES.set(self._queued_bytes)
+        return True
+
+    async def run(self, store: ObservabilityState) -> None:
+        loop = asyncio.get_running_loop()
+        next_publish = loop.time()
+        while not self._stop.is_set():
+            timeout = max(0.0, next_publish - loop.time())
+            try:
+                body = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+            except TimeoutError:
+                body = None
+            if body is not None:
+                self._queued_bytes -= len(body)
+                INGEST_QUEUE_DEPTH.set(self._queue.qsize())
+                INGEST_QUEUE_BYTES.set(self._queued_bytes)
+                try:
+                    with timed_cycle("ingest"):
+                        await self.process(body)
+                except Exception:
+                    # One bad batch must not end ingest for every later one.
+                    INGEST_BATCHES_TOTAL.labels(result="failed").inc()
+            if loop.time() >= next_publish:
+                self.publish(store)
+                next_publish = loop.time() + self.interval_s
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    async def process(self, body: bytes) -> int:
+        now = now_ms()
+        recorded = 0
+        for index, raw in enumerate(body.splitlines()):
+            if index and index % _YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+                now = now_ms()
+            if not raw.strip():
+                continue
+            try:
+                recorded += self._process_line(raw, now)
+            except (ValueError, TypeError, OverflowError, RecursionError):
+                INGEST_REJECTED_LINES_TOTAL.labels(reason="parse").inc()
+        return recorded
+
+    def _process_line(self, raw: bytes, now: int) -> int:
+        """Handle one line; returns 1 if it was recorded as an event."""
+        payload = parse_json(raw)
+        if payload is None:
+            INGEST_REJECTED_LINES_TOTAL.labels(reason="parse").inc()
+            return 0
+        name = payload.get("source")
+        source = self._sources.get(name) if isinstance(name, str) else None
+        if source is None:
+            INGEST_REJECTED_LINES_TOTAL.labels(reason="unknown_source").inc()
+            return 0
+        source.seen = True
+        self._track_seq(source, payload.get("seq"))
+        if payload.get("heartbeat") is True:
+            self._record_heartbeat(source, payload, now)
+            return 0
+        source.tracker.record(payload, now)
+        return 1
+
+    def publish(self, store: ObservabilityState) -> None:
+        now = now_ms()
+        for name, source in self._sources.items():
+            store.mark_cycle(name, now)
+            if not source.seen:
+                continue
+            tracker = source.tracker
+            event_age_s = tracker.publish(now)
+            age_s = event_age_s
+            if source.heartbeat_ts_ms is not None:
+                heartbeat_age_s = max(0.0, (now - source.heartbeat_ts_ms) / 1000)
+                age_s = heartbeat_age_s if age_s is None else min(age_s, heartbeat_age_s)
+            state, reasons, last_error = tracker.derive_health(age_s, source.stale_after_s)
+            if state == HealthState.OK and source.heartbeat_state not in (None, HealthState.OK):
+                state = source.heartbeat_state
+                reasons = source.heartbeat_reasons or ["reported by source"]
+                last_error = "reported by source"
+            updated_ts = max(
+                (ts for ts in (tracker.last_event_ts_ms, source.heartbeat_ts_ms) if ts),
+                default=None,
+            )
+            store.update(
+                name,
+                state=state,
+                updated_ts=updated_ts,
+                last_error=last_error,
+                last_error_ts=now if last_error else None,
+                reasons=reasons,
+                evidence={
+                    "transport": "ingest",
+                    "last_event_type": tracker.last_event_type,
+                    "last_event_ts": tracker.last_event_ts_ms,
+                    "last_heartbeat_ts": source.heartbeat_ts_ms,
+                    "last_seq": source.last_seq,
+                    "seq_lost": source.lost,
+                },
+            )
+
+    def _track_seq(self, source: _SourceState, seq: Any) -> None:
+        if not isinstance(seq, int) or isinstance(seq, bool):
+            return
+        last = source.last_seq
+        source.last_seq = seq
+        if last is None or seq <= last:
+            # First line, a duplicate, or a sender restart: nothing to attribute.
+            return
+        gap = seq - last - 1
+        if gap:
+            source.lost += gap
+            INGEST_SEQ_LOST_TOTAL.labels(subsystem=source.tracker.subsystem).inc(gap)
+
+    def _record_heartbeat(self, source: _SourceState, payload: dict[str, Any], now: int) -> None:
+        INGEST_HEARTBEATS_TOTAL.labels(subsystem=source.tracker.subsystem).inc()
+        source.heartbeat_ts_ms = now
+        state = payload.get("state")
+        try:
+            source.heartbeat_state = HealthState(str(state).upper()) if state else None
+        except ValueError:
+            source.heartbeat_state = None
+        reasons = payload.get("reasons")
+        if isinstance(reasons, list):
+            source.heartbeat_reasons = [str(item) for item in reasons]
+        else:
+            source.heartbeat_reasons = None
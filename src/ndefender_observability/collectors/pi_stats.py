@@ -2,13 +2,17 @@
 
 from __future__ import annotations
 
+import asyncio
+import glob
 import os
 import re
 import subprocess
+import time
 from collections.abc import Iterable
 
 import psutil
 
+from ..metrics.instruments import timed_cycle
 from ..metrics.registry import (
     PI_CPU_TEMP_C,
     PI_DISK_FREE_BYTES,
@@ -17,6 +21,7 @@ from ..metrics.registry import (
     PI_LOAD5,
     PI_LOAD15,
     PI_MEM_AVAILABLE_BYTES,
+    PI_SAMPLE_AGE_SECONDS,
     PI_THROTTLED_FLAG,
 )
 
@@ -31,12 +36,196 @@ _THROTTLED_FLAGS = {
     19: "soft_temp_limit_occurred",
 }
 
+_THERMAL_ZONE_GLOB = "sys/class/thermal/thermal_zone*"
+_THROTTLED_CANDIDATES = (
+    "sys/devices/platform/soc/soc:firmware/get_throttled",
+    "sys/devices/platform/*/*:firmware/get_throttled",
+    "sys/devices/platform/*/*/*:firmware/get_throttled",
+)
+
+
+class SysfsReader:
+    """Read CPU temperature and throttled flags straight from sysfs.
+
+    Sources are probed once; their file descriptors stay open and each read
+    is a single `os.pread` at offset 0, which makes sysfs regenerate the
+    value without reopening the file or forking `vcgencmd`.
+    """
+
+    def __init__(self, root: str = "/") -> None:
+        self.root = root
+        self.temp_path: str | None = None
+        self.throttled_path: str | None = None
+        self._temp_fd: int | None = None
+        self._throttled_fd: int | None = None
+        self._probe()
+
+    @property
+    def has_temp(self) -> bool:
+        return self._temp_fd is not None
+
+    @property
+    def has_throttled(self) -> bool:
+        return self._throttled_fd is not None
+
+    def read_temp_c(self) -> float | None:
+        raw = self._pread(self._temp_fd)
+        if raw is None:
+            return None
+        try:
+            return int(raw) / 1000
+        except ValueError:
+            return None
+
+    def read_throttled(self) -> int | None:
+        raw = self._pread(self._throttled_fd)
+        if raw is None:
+            return None
+        try:
+            return int(raw.removeprefix("0x"), 16)
+        except ValueError:
+            return None
+
+    def close(self) -> None:
+        for fd in (self._temp_fd, self._throttled_fd):
+            if fd is not None:
+                os.close(fd)
+        self._temp_fd = None
+        self._throttled_fd = None
+
+    def _probe(self) -> None:
+        zones = sorted(glob.glob(os.path.join(self.root, _THERMAL_ZONE_GLOB)))
+        # Prefer the SoC zone (`cpu-thermal` on Raspberry Pi OS) over e.g. PMIC zones.
+        zones.sort(key=lambda zone: _read_text(os.path.join(zone, "type")) != "cpu-thermal")
+        for zone in zones:
+            self._temp_fd = _open_readonly(os.path.join(zone, "temp"))
+            if self._temp_fd is not None:
+                self.temp_path = os.path.join(zone, "temp")
+                break
+        for pattern in _THROTTLED_CANDIDATES:
+            for path in sorted(glob.glob(os.path.join(self.root, pattern))):
+                self._throttled_fd = _open_readonly(path)
+                if self._throttled_fd is not None:
+                    self.throttled_path = path
+                    return
+
+    @staticmethod
+    def _pread(fd: int | None) -> str | None:
+        if fd is None:
+            return None
+        try:
+            return os.pread(fd, 64, 0).decode("ascii", errors="ignore").strip()
+        except OSError:
+            return None
+
+
+def _open_readonly(path: str) -> int | None:
+    try:
+        return os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+
+
+def _read_text(path: str) -> str | None:
+    try:
+        with open(path, encoding="ascii", errors="ignore") as handle:
+            return handle.read().strip()
+    except OSError:
+        return None
+
+
+DEFAULT_CADENCES_S = {
+    "system": 5.0,
+    "temp": 5.0,
+    "throttled": 10.0,
+    "disk": 30.0,
+}
+
 
 class PiStatsCollector:
-    def __init__(self, mount: str = "/") -> None:
+    """Sample Pi stats in the background, each source on its own cadence.
+
+    `/metrics` only reads the gauges this sampler maintains; blocking
+    sources (subprocesses, sensor reads) run in a worker thread.
+    `ndefender_pi_sample_age_seconds{source}` reports how old each is;
+    a sampler that got no reading leaves its gauges and age untouched.
+    """
+
+    def __init__(
+        self,
+        mount: str = "/",
+        cadences_s: dict[str, float] | None = None,
+        sysfs: SysfsReader | None = None,
+    ) -> None:
         self.mount = mount
+        self.sysfs = sysfs if sysfs is not None else SysfsReader()
+        self.cadences_s = {**DEFAULT_CADENCES_S, **(cadences_s or {})}
+        self._sampled_at: dict[str, float] = {}
+        self._attempted_at: dict[str, float] = {}
+        self._stop = asyncio.Event()
+        self._samplers = {
+            "system": self._sample_system,
+            "temp": self._sample_temp,
+            "throttled": self._sample_throttled,
+            "disk": self._sample_disk,
+        }
+        for source in self._samplers:
+            PI_SAMPLE_AGE_SECONDS.labels(source=source).set_function(
+                lambda source=source: self.sample_age_s(source)
+            )
 
     def collect(self) -> None:
+        """Sample every source now."""
+        self.sample(list(self._samplers))
+
+    def sample_age_s(self, source: str) -> float:
+        sampled_at = self._sampled_at.get(source)
+        if sampled_at is None:
+            return -1.0
+        return time.monotonic() - sampled_at
+
+    def due(self, now: float | None = None) -> list[str]:
+        now = time.monotonic() if now is None else now
+        return [
+            source
+            for source, cadence in self.cadences_s.items()
+            if source in self._samplers
+            and now - self._attempted_at.get(source, float("-inf")) >= cadence
+        ]
+
+    def sample(self, sources: list[str]) -> None:
+        with timed_cycle("pi_stats"):
+            for source in sources:
+                self._attempted_at[source] = time.monotonic()
+                try:
+                    produced = self._samplers[source]()
+                except Exception:
+                    continue
+                if produced:
+                    self._sampled_at[source] = time.monotonic()
+
+    async def run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                due = self.due()
+                if due:
+                    await asyncio.to_thread(self.sample, due)
+                now = time.monotonic()
+                next_due = min(
+                    self._attempted_at.get(source, now) + cadence
+                    for source, cadence in self.cadences_s.items()
+                )
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=max(0.1, next_due - now))
+                except TimeoutError:
+                    pass
+        finally:
+            self.sysfs.close()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _sample_system(self) -> bool:
         load1, load5, load15 = os.getloadavg()
         PI_LOAD1.set(load1)
         PI_LOAD5.set(load5)
@@ -44,18 +233,35 @@ class PiStatsCollector:
 
         mem = psutil.virtual_memory()
         PI_MEM_AVAILABLE_BYTES.set(mem.available)
+        return True
 
+    def _sample_disk(self) -> bool:
         disk = psutil.disk_usage(self.mount)
         PI_DISK_FREE_BYTES.labels(mount=self.mount).set(disk.free)
         PI_DISK_USED_PERCENT.labels(mount=self.mount).set(disk.percent)
+        return True
 
-        temp_c = _read_cpu_temp_c()
-        if temp_c is not None:
-            PI_CPU_TEMP_C.set(temp_c)
+    def _sample_temp(self) -> bool:
+        if self.sysfs.has_temp:
+            temp_c = self.sysfs.read_temp_c()
+        else:
+            temp_c = _read_cpu_temp_c()
+        if temp_c is None:
+            return False
+        PI_CPU_TEMP_C.set(temp_c)
+        return True
 
-        throttled = _read_throttled_flags()
+    def _sample_throttled(self) -> bool:
+        if self.sysfs.has_throttled:
+            value = self.sysfs.read_throttled()
+            throttled = _flags_from_value(value) if value is not None else None
+        else:
+            throttled = _read_throttled_flags()
+        if throttled is None:
+            return False
         for bit, name in _THROTTLED_FLAGS.items():
             PI_THROTTLED_FLAG.labels(flag=name).set(1 if bit in throttled else 0)
+        return True
 
 
 def _run_vcgencmd(args: Iterable[str]) -> str | None:
@@ -86,12 +292,15 @@ def _read_cpu_temp_c() -> float | None:
     return float(match.group(1))
 
 
-def _read_throttled_flags() -> set[int]:
+def _read_throttled_flags() -> set[int] | None:
     output = _run_vcgencmd(["get_throttled"])
     if not output:
-        return set()
+        return None
     match = re.search(r"0x([0-9a-fA-F]+)", output)
     if not match:
-        return set()
-    value = int(match.group(1), 16)
+        return None
+    return _flags_from_value(int(match.group(1), 16))
+
+
+def _flags_from_value(value: int) -> set[int]:
     return {bit for bit in _THROTTLED_FLAGS if value & (1 << bit)}
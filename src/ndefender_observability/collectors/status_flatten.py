@@ -0,0 +1,137 @@
+"""Flatten aggregator status JSON into numeric gauges."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from typing import Any
+
+from ..metrics.registry import AGGREGATOR_STATUS_DROPPED_PATHS, AGGREGATOR_STATUS_VALUE
+
+_Key = str | int
+
+
+@dataclass
+class _Plan:
+    # (gauge child, key path) for every exported numeric leaf.
+    leaves: list[tuple[Any, tuple[_Key, ...]]] = field(default_factory=list)
+    # Containers whose key set (dict) or length (list) the plan depends on.
+    anchors: list[tuple[tuple[_Key, ...], tuple[Any, ...] | int]] = field(default_factory=list)
+    paths: set[str] = field(default_factory=set)
+    dropped: int = 0
+
+
+class StatusFlattener:
+    """Export allow-listed numeric leaves of a JSON payload as gauges.
+
+    Patterns are dotted paths where each segment may be a glob
+    (`sources.*.age_s`). The walk over the payload runs only when its shape
+    changes; steady-state polls validate the cached plan and read each leaf
+    by its pre-resolved key path.
+    """
+
+    def __init__(self, patterns: list[str], max_series: int = 64) -> None:
+        self._patterns = [tuple(pattern.split(".")) for pattern in patterns if pattern]
+        self.max_series = max_series
+        self._plan: _Plan | None = None
+
+    def apply(self, payload: dict[str, Any]) -> int:
+        plan = self._plan
+        if plan is None or not _plan_valid(plan, payload):
+            plan = self._rebuild(payload)
+        if not _set_leaves(plan, payload):
+            plan = self._rebuild(payload)
+            _set_leaves(plan, payload)
+        return len(plan.leaves)
+
+    def _rebuild(self, payload: dict[str, Any]) -> _Plan:
+        found: dict[str, tuple[_Key, ...]] = {}
+        anchors: dict[tuple[_Key, ...], tuple[Any, ...] | int] = {}
+        for pattern in self._patterns:
+            _walk(payload, pattern, (), found, anchors)
+
+        plan = _Plan(anchors=list(anchors.items()))
+        for path in sorted(found):
+            if len(plan.leaves) >= self.max_series:
+                plan.dropped += 1
+                continue
+            plan.paths.add(path)
+            plan.leaves.append((AGGREGATOR_STATUS_VALUE.labels(path=path), found[path]))
+
+        previous = self._plan.paths if self._plan is not None else set()
+        for path in previous - plan.paths:
+            try:
+                AGGREGATOR_STATUS_VALUE.remove(path)
+            except KeyError:
+                pass
+        AGGREGATOR_STATUS_DROPPED_PATHS.set(plan.dropped)
+        self._plan = plan
+        return plan
+
+
+def _is_number(value: Any) -> bool:
+    # JSON booleans are flags, not metrics; `bool` is an `int` subclass.
+    return isinstance(value, int | float) and not isinstance(value, bool)
+
+
+def _resolve(node: Any, keys: tuple[_Key, ...]) -> Any:
+    for key in keys:
+        node = node[key]
+    return node
+
+
+def _shape(node: Any) -> tuple[Any, ...] | int | None:
+    if isinstance(node, dict):
+        return tuple(node)
+    if isinstance(node, list):
+        return len(node)
+    return None
+
+
+def _plan_valid(plan: _Plan, payload: dict[str, Any]) -> bool:
+    try:
+        for keys, shape in plan.anchors:
+            if _shape(_resolve(payload, keys)) != shape:
+                return False
+    except (KeyError, IndexError, TypeError):
+        return False
+    return True
+
+
+def _set_leaves(plan: _Plan, payload: dict[str, Any]) -> bool:
+    try:
+        for child, keys in plan.leaves:
+            value = _resolve(payload, keys)
+            if not _is_number(value):
+                return False
+            child.set(float(value))
+    except (KeyError, IndexError, TypeError):
+        return False
+    return True
+
+
+def _walk(
+    node: Any,
+    pattern: tuple[str, ...],
+    keys: tuple[_Key, ...],
+    found: dict[str, tuple[_Key, ...]],
+    anchors: dict[tuple[_Key, ...], tuple[Any, ...] | int],
+) -> None:
+    if not pattern:
+        if _is_number(node):
+            found[".".join(str(key) for key in keys)] = keys
+        return
+    shape = _shape(node)
+    if shape is None:
+        return
+    # Any change in this container's keys may add or remove matches.
+    anchors[keys] = shape
+    head, rest = pattern[0], pattern[1:]
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if fnmatchcase(str(key), head):
+                _walk(value, rest, (*keys, key), found, anchors)
+    else:
+        for index, value in enumerate(node):
+            if fnmatchcase(str(index), head):
+                _walk(value, rest, (*keys, index), found, anchors)
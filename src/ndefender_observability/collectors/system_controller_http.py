@@ -8,7 +8,9 @@ from typing import Any
 
 import httpx
 
+from ..health.budget import ErrorBudget
 from ..health.model import HealthState
+from ..metrics.instruments import timed_cycle
 from ..metrics.registry import (
     COLLECTOR_EXCEPTIONS_TOTAL,
     POLL_ERRORS_TOTAL,
@@ -25,6 +27,7 @@ from ..metrics.registry import (
 )
 from ..state import ObservabilityState
 from ..utils.time import now_ms
+from .conditional import ConditionalCache
 
 _UPS_STATE_LABELS = [
     "IDLE",
@@ -36,31 +39,47 @@ _UPS_STATE_LABELS = [
 
 
 class SystemControllerHttpCollector:
-    def __init__(self, base_url: str, interval_s: int = 5, timeout_s: float = 2.0) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        interval_s: int = 5,
+        timeout_s: float = 2.0,
+        stale_after_s: int = 10,
+        max_errors_per_min: int = 5,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.interval_s = interval_s
         self.timeout_s = timeout_s
         self._stop = asyncio.Event()
+        self._budget = ErrorBudget(
+            "system_controller", max_errors_per_min=max_errors_per_min, hold_s=stale_after_s
+        )
+        self._cache = ConditionalCache("system_controller")
 
     async def run(self, store: ObservabilityState) -> None:
         async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout_s) as client:
             while not self._stop.is_set():
                 try:
-                    await self._poll_once(store, client)
+                    with timed_cycle("system_controller"):
+                        await self._poll_once(store, client)
                 except Exception as exc:
                     POLL_ERRORS_TOTAL.labels(
                         subsystem="system_controller", kind="loop_exception"
                     ).inc()
                     COLLECTOR_EXCEPTIONS_TOTAL.labels(subsystem="system_controller").inc()
+                    state, reasons = self._budget.apply(
+                        HealthState.OFFLINE, ["poll loop error"], errors=1
+                    )
                     store.update(
                         "system_controller",
-                        state=HealthState.OFFLINE,
+                        state=state,
                         last_error=str(exc),
                         last_error_ts=now_ms(),
-                        reasons=["poll loop error"],
+                        reasons=reasons,
                         updated_ts=now_ms(),
                         evidence={"base_url": self.base_url},
                     )
+                store.mark_cycle("system_controller")
                 try:
                     await asyncio.wait_for(self._stop.wait(), timeout=self.interval_s)
                 except TimeoutError:
@@ -74,9 +93,9 @@ class SystemControllerHttpCollector:
         reasons: list[str] = []
         evidence: dict[str, Any] = {"base_url": self.base_url}
 
-        health_ok, health_payload = await self._request_json(client, "/api/v1/health", "health")
-        status_ok, status_payload = await self._request_json(client, "/api/v1/status", "status")
-        ups_ok, ups_payload = await self._request_json(client, "/api/v1/ups", "ups")
+        health_ok, health_payload, _ = await self._request_json(client, "/api/v1/health", "health")
+        status_ok, status_payload, _ = await self._request_json(client, "/api/v1/status", "status")
+        ups_ok, ups_payload, ups_changed = await self._request_json(client, "/api/v1/ups", "ups")
 
         if health_ok:
             evidence["health"] = health_payload
@@ -84,7 +103,8 @@ class SystemControllerHttpCollector:
             evidence["status_keys"] = list(status_payload.keys())
         if ups_ok:
             evidence["ups_keys"] = list(ups_payload.keys())
-            self._record_ups_metrics(ups_payload)
+            if ups_changed:
+                self._record_ups_metrics(ups_payload)
 
         if not health_ok:
             reasons.append("health endpoint failed")
@@ -103,13 +123,16 @@ class SystemControllerHttpCollector:
             state = HealthState.OFFLINE
             last_error = "poll failed"
 
+        errors = [health_ok, status_ok, ups_ok].count(False)
+        state, reasons = self._budget.apply(state, reasons or ["ok"], errors=errors)
+
         store.update(
             "system_controller",
             state=state,
             updated_ts=now,
             last_error=last_error,
             last_error_ts=now if last_error else None,
-            reasons=reasons or ["ok"],
+            reasons=reasons,
             evidence=evidence,
         )
 
@@ -118,20 +141,26 @@ class SystemControllerHttpCollector:
         client: httpx.AsyncClient,
         endpoint: str,
         kind: str,
-    ) -> tuple[bool, dict[str, Any]]:
+    ) -> tuple[bool, dict[str, Any], bool]:
+        """Fetch an endpoint, returning `(ok, payload, changed)`."""
         start = time.perf_counter()
         try:
-            resp = await client.get(endpoint)
+            resp = await client.get(endpoint, headers=self._cache.request_headers(endpoint))
             latency = time.perf_counter() - start
             POLL_LATENCY_SECONDS.labels(
                 subsystem="system_controller", endpoint=kind
             ).observe(latency)
+            if resp.status_code == 304:
+                cached = self._cache.not_modified(endpoint, kind)
+                if cached is not None:
+                    return True, cached, False
             if resp.status_code != 200:
                 POLL_ERRORS_TOTAL.labels(
                     subsystem="system_controller", kind=f"{kind}_http_{resp.status_code}"
                 ).inc()
-                return False, {}
-            return True, resp.json()
+                return False, {}, False
+            payload, changed = self._cache.decode(endpoint, kind, resp)
+            return True, payload, changed
         except Exception:
             latency = time.perf_counter() - start
             POLL_LATENCY_SECONDS.labels(
@@ -140,7 +169,7 @@ class SystemControllerHttpCollector:
             POLL_ERRORS_TOTAL.labels(
                 subsystem="system_controller", kind=f"{kind}_exception"
             ).inc()
-            return False, {}
+            return False, {}, False
 
     def _record_ups_metrics(self, payload: dict[str, Any]) -> None:
         def _get_number(key: str) -> float | None:
@@ -5,7 +5,7 @@ from __future__ import annotations
 import copy
 import os
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 
 import yaml
 from pydantic import BaseModel, Field
@@ -14,6 +14,14 @@ from pydantic import BaseModel, Field
 class ServiceConfig(BaseModel):
     host: str = "0.0.0.0"
     port: int = 9109
+    mode: Literal["single", "collector", "api"] = "single"
+    state_snapshot_path: str = "/run/ndefender-observability/state.json"
+    snapshot_interval_s: float = 1.0
+
+
+class LongPollConfig(BaseModel):
+    max_waiters: int = 256
+    max_timeout_s: float = 60.0
 
 
 class AuthConfig(BaseModel):
@@ -21,10 +29,30 @@ class AuthConfig(BaseModel):
     api_key: str | None = None
 
 
+class RateLimitRule(BaseModel):
+    max_requests: int = Field(default=60, ge=1)
+    window_s: float = Field(default=60, gt=0)
+
+
+def _default_expensive_rule() -> RateLimitRule:
+    return RateLimitRule(max_requests=10, window_s=60)
+
+
 class RateLimitConfig(BaseModel):
     enabled: bool = False
-    max_requests: int = 60
-    window_s: int = 60
+    max_requests: int = Field(default=60, ge=1)
+    window_s: float = Field(default=60, gt=0)
+    max_keys: int = Field(default=10_000, ge=1)
+    routes: dict[str, RateLimitRule] = Field(default_factory=dict)
+    expensive: RateLimitRule = Field(default_factory=_default_expensive_rule)
+    expensive_routes: list[str] = Field(default_factory=lambda: ["/metrics", "/api/v1/diag/bundle"])
+
+
+class MetricsConfig(BaseModel):
+    render_interval_s: float = 5.0
+    min_render_interval_s: float = 2.0
+    max_staleness_s: float = 10.0
+    loop_lag_interval_s: float = 0.5
 
 
 class PollingConfig(BaseModel):
@@ -33,24 +61,158 @@ class PollingConfig(BaseModel):
     antsdr_jsonl_s: int = 2
     remoteid_jsonl_s: int = 2
     esp32_s: int = 2
+    pi_system_s: float = 5.0
+    pi_temp_s: float = 5.0
+    pi_throttled_s: float = 10.0
+    pi_disk_s: float = 30.0
+
+
+class StatusMetricsConfig(BaseModel):
+    enabled: bool = False
+    paths: list[str] = Field(default_factory=list)
+    max_series: int = 64
 
 
 class BackendAggregatorConfig(BaseModel):
     base_url: str = "http://127.0.0.1:8000"
+    status_metrics: StatusMetricsConfig = Field(default_factory=StatusMetricsConfig)
 
 
 class SystemControllerConfig(BaseModel):
     base_url: str = "http://127.0.0.1:9000"
 
 
+def _default_event_types() -> dict[str, list[str]]:
+    return {
+        "antsdr": ["RF_CONTACT_NEW", "RF_CONTACT_UPDATE", "RF_CONTACT_LOST"],
+        "remoteid": [
+            "CONTACT_NEW",
+            "CONTACT_UPDATE",
+            "CONTACT_LOST",
+            "TELEMETRY_UPDATE",
+            "REPLAY_STATE",
+        ],
+    }
+
+
 class JsonlConfig(BaseModel):
     antsdr_path: str = "/opt/ndefender/logs/antsdr_scan.jsonl"
     remoteid_path: str = "/opt/ndefender/logs/remoteid_engine.jsonl"
+    event_types: dict[str, list[str]] = Field(default_factory=_default_event_types)
+    max_extra_event_types: int = 16
+
+
+class IngestConfig(BaseModel):
+    enabled: bool = False
+    sources: list[str] = Field(default_factory=lambda: ["antsdr", "remoteid"])
+    queue_max_batches: int = 256
+    queue_max_bytes: int = 16_777_216
+    max_batch_bytes: int = 1_048_576
+    publish_interval_s: float = 1.0
+
+
+class Esp32Config(BaseModel):
+    enabled: bool = False
+    bind_host: str = "0.0.0.0"
+    port: int = 9110
+    loss_degraded_ratio: float = 0.2
+
+
+class HistoryTierConfig(BaseModel):
+    step_s: int
+    retention_s: int
+
+
+def _default_history_tiers() -> list[HistoryTierConfig]:
+    return [
+        HistoryTierConfig(step_s=60, retention_s=21_600),
+        HistoryTierConfig(step_s=300, retention_s=86_400),
+    ]
+
+
+def _default_history_series() -> list[str]:
+    return [
+        "ndefender_subsystem_state",
+        "ndefender_jsonl_tail_lag_seconds",
+        "ndefender_events_rate_60s",
+        "ndefender_ups_soc_percent",
+        "ndefender_pi_cpu_temp_c",
+    ]
+
+
+class HistoryPersistConfig(BaseModel):
+    enabled: bool = False
+    path: str = "/var/lib/ndefender/observability/history"
+    max_bytes: int = 33_554_432
+    flush_interval_s: float = 60.0
+
+
+class HistoryConfig(BaseModel):
+    enabled: bool = True
+    sample_interval_s: float = 5.0
+    raw_retention_s: int = 3600
+    tiers: list[HistoryTierConfig] = Field(default_factory=_default_history_tiers)
+    series: list[str] = Field(default_factory=_default_history_series)
+    max_series: int = 64
+    persist: HistoryPersistConfig = Field(default_factory=HistoryPersistConfig)
+
+
+def _default_ws_metrics() -> list[str]:
+    return [
+        "ndefender_pi_cpu_temp_c",
+        "ndefender_pi_disk_used_percent",
+        "ndefender_ups_soc_percent",
+        "ndefender_ups_time_to_empty_s",
+        "ndefender_events_rate_60s",
+        "ndefender_jsonl_tail_lag_seconds",
+    ]
 
 
 class WsConfig(BaseModel):
     enabled: bool = False
-    metrics_update_hz: int = 1
+    metrics_update_hz: int = Field(default=1, ge=1)
+    metrics: list[str] = Field(default_factory=_default_ws_metrics)
+    max_clients: int = 16
+    queue_size: int = 8
+
+
+class StreamConfig(BaseModel):
+    enabled: bool = True
+    replay_size: int = 512
+    rate_tick_interval_s: float = 5.0
+    max_subscribers: int = 64
+    queue_size: int = 128
+    keepalive_s: float = 15.0
+
+
+class HealthEvaluatorConfig(BaseModel):
+    enabled: bool = True
+    enter_cycles: int = Field(default=2, ge=1)
+    exit_cycles: int = Field(default=3, ge=1)
+    min_dwell_s: float = 10.0
+    flap_window_s: float = 300.0
+    flap_threshold: int = Field(default=6, ge=2)
+
+
+class HealthWatchdogConfig(BaseModel):
+    enabled: bool = True
+    interval_s: float = 1.0
+
+
+def _default_dependencies() -> dict[str, list[str]]:
+    return {
+        "aggregator": ["antsdr", "remoteid", "system_controller"],
+        "antsdr": ["system_controller"],
+        "remoteid": ["system_controller"],
+        "esp32": ["system_controller"],
+    }
+
+
+class HealthConfig(BaseModel):
+    journal_size: int = Field(default=128, ge=1)
+    dependencies: dict[str, list[str]] = Field(default_factory=_default_dependencies)
+    evaluator: HealthEvaluatorConfig = Field(default_factory=HealthEvaluatorConfig)
+    watchdog: HealthWatchdogConfig = Field(default_factory=HealthWatchdogConfig)
 
 
 class StaleThresholds(BaseModel):
@@ -80,12 +242,19 @@ class ThresholdsConfig(BaseModel):
 class AppConfig(BaseModel):
     service: ServiceConfig = Field(default_factory=ServiceConfig)
     auth: AuthConfig = Field(default_factory=AuthConfig)
+    long_poll: LongPollConfig = Field(default_factory=LongPollConfig)
     rate_limit: RateLimitConfig = Field(default_factory=RateLimitConfig)
+    metrics: MetricsConfig = Field(default_factory=MetricsConfig)
     polling: PollingConfig = Field(default_factory=PollingConfig)
     backend_aggregator: BackendAggregatorConfig = Field(default_factory=BackendAggregatorConfig)
     system_controller: SystemControllerConfig = Field(default_factory=SystemControllerConfig)
     jsonl: JsonlConfig = Field(default_factory=JsonlConfig)
+    ingest: IngestConfig = Field(default_factory=IngestConfig)
+    esp32: Esp32Config = Field(default_factory=Esp32Config)
+    history: HistoryConfig = Field(default_factory=HistoryConfig)
     ws: WsConfig = Field(default_factory=WsConfig)
+    stream: StreamConfig = Field(default_factory=StreamConfig)
+    health: HealthConfig = Field(default_factory=HealthConfig)
     thresholds: ThresholdsConfig = Field(default_factory=ThresholdsConfig)
 
     def sanitized(self) -> dict[str, Any]:
@@ -0,0 +1,75 @@
+"""Sliding-window error budget for subsystem health."""
+
+from __future__ import annotations
+
+import time
+
+from ..metrics.registry import (
+    SUBSYSTEM_ERROR_BUDGET_BURN_RATE,
+    SUBSYSTEM_ERROR_BUDGET_REMAINING,
+)
+from ..utils.ring import CounterRing
+from .model import HealthState
+
+
+class ErrorBudget:
+    """Absorb transient poll errors until the per-minute budget is spent.
+
+    Collectors report each cycle's observed state and error count. While the
+    budget has room and the last error-free cycle is younger than `hold_s`,
+    the state from that cycle is kept instead of the degraded observation.
+    """
+
+    def __init__(
+        self,
+        subsystem: str,
+        max_errors_per_min: int = 5,
+        hold_s: float = 10.0,
+        window_s: int = 60,
+    ) -> None:
+        self.subsystem = subsystem
+        self.max_errors = max_errors_per_min
+        self.hold_s = hold_s
+        self._errors = CounterRing(window_s=window_s, buckets=window_s)
+        self._good_state: HealthState | None = None
+        self._good_ts_s: float | None = None
+
+    def errors(self, now_s: float) -> int:
+        return self._errors.total(now_s)
+
+    def exhausted(self, now_s: float) -> bool:
+        return self.errors(now_s) > self.max_errors
+
+    def apply(
+        self,
+        state: HealthState,
+        reasons: list[str],
+        errors: int,
+        now_s: float | None = None,
+    ) -> tuple[HealthState, list[str]]:
+        now_s = time.monotonic() if now_s is None else now_s
+        if errors:
+            self._errors.add(now_s, errors)
+        spent = self.errors(now_s)
+        SUBSYSTEM_ERROR_BUDGET_REMAINING.labels(subsystem=self.subsystem).set(
+            max(0, self.max_errors - spent)
+        )
+        SUBSYSTEM_ERROR_BUDGET_BURN_RATE.labels(subsystem=self.subsystem).set(
+            spent / self.max_errors if self.max_errors > 0 else float(spent > 0)
+        )
+
+        if not errors:
+            self._good_state = state
+            self._good_ts_s = now_s
+            return state, reasons
+        if (
+            spent > self.max_errors
+            or self._good_state is None
+            or self._good_ts_s is None
+            or now_s - self._good_ts_s > self.hold_s
+        ):
+            return state, reasons
+        return self._good_state, [
+            *reasons,
+            f"within error budget ({spent}/{self.max_errors} per min)",
+        ]
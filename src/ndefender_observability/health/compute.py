@@ -5,28 +5,22 @@ from __future__ import annotations
 from collections import Counter
 from typing import Any
 
-from ..state import ObservabilityState, SubsystemState
+from ..state import StateSnapshot, SubsystemState
 from ..utils.time import now_ms
-from .model import DeepHealth, HealthState
-
-_STATE_ORDER = {
-    HealthState.OFFLINE: 3,
-    HealthState.DEGRADED: 2,
-    HealthState.REPLAY: 1,
-    HealthState.OK: 0,
-}
+from .dependencies import FAILING, DependencyRollup
+from .model import STATE_SEVERITY, DeepHealth, HealthState
 
 
 def _overall_state(states: list[SubsystemState]) -> HealthState:
     if not states:
         return HealthState.OFFLINE
-    return max(states, key=lambda item: _STATE_ORDER.get(item.state, 0)).state
+    return max(states, key=lambda item: STATE_SEVERITY.get(item.state, 0)).state
 
 
-def compute_deep_health(store: ObservabilityState) -> dict[str, Any]:
+def compute_deep_health(snapshot: StateSnapshot) -> dict[str, Any]:
     now = now_ms()
     subsystems = []
-    for item in store.all():
+    for item in snapshot.all():
         subsystems.append(
             DeepHealth(
                 subsystem=item.subsystem,
@@ -41,28 +35,44 @@ def compute_deep_health(store: ObservabilityState) -> dict[str, Any]:
         )
     return {
         "generated_ts": now,
+        "version": snapshot.version,
         "subsystems": subsystems,
     }
 
 
-def compute_status_snapshot(store: ObservabilityState) -> dict[str, Any]:
+def compute_status_snapshot(
+    snapshot: StateSnapshot, rollup: DependencyRollup | None = None
+) -> dict[str, Any]:
+    """Status summary; with a dependency `rollup`, failures are attributed to root causes."""
     now = now_ms()
+    items = snapshot.all()
+    if rollup is not None:
+        attributions = rollup.evaluate(snapshot)
+        root_causes = rollup.root_causes(snapshot)
+    else:
+        attributions = {}
+        root_causes = [item.subsystem for item in items if item.state in FAILING]
     subsystems = []
-    for item in store.all():
+    for item in items:
+        attribution = attributions.get(item.subsystem)
         subsystems.append(
             {
                 "subsystem": item.subsystem,
                 "state": item.state,
+                "updated_ts": item.updated_ts,
                 "last_update_age_ms": item.age_ms(now),
                 "last_error_ts": item.last_error_ts,
+                "impacted_by": list(attribution.impacted_by) if attribution else [],
             }
         )
 
     counts = Counter(item["state"] for item in subsystems)
-    overall = _overall_state(store.all())
+    overall = _overall_state(items)
     return {
         "generated_ts": now,
+        "version": snapshot.version,
         "overall_state": overall,
         "state_counts": {str(k): int(v) for k, v in counts.items()},
+        "root_causes": root_causes,
         "subsystems": subsystems,
     }
@@ -0,0 +1,127 @@
+"""Dependency-aware health rollup."""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+
+from ..state import StateSnapshot
+from .model import HealthState
+
+# States that count as a failure for root-cause attribution.
+FAILING = frozenset({HealthState.DEGRADED, HealthState.OFFLINE})
+
+
+@dataclass(frozen=True)
+class Attribution:
+    """Whether a subsystem is failing and which root causes explain it."""
+
+    failing: bool
+    impacted_by: tuple[str, ...] = ()
+
+    @property
+    def root_cause(self) -> bool:
+        return self.failing and not self.impacted_by
+
+
+class DependencyGraph:
+    """Subsystem dependency graph with a precomputed topological order.
+
+    `depends_on` maps a subsystem to the subsystems it needs. Unknown names
+    and cycles raise `ValueError`.
+    """
+
+    def __init__(self, subsystems: Iterable[str], depends_on: Mapping[str, Iterable[str]]) -> None:
+        names = list(subsystems)
+        known = set(names)
+        self.depends_on = {name: tuple(depends_on.get(name, ())) for name in names}
+        unknown = sorted(
+            ({*depends_on} | {dep for deps in depends_on.values() for dep in deps}) - known
+        )
+        if unknown:
+            raise ValueError(f"unknown subsystems in dependencies: {', '.join(unknown)}")
+        self.dependents: dict[str, list[str]] = {name: [] for name in names}
+        for name, deps in self.depends_on.items():
+            for dep in deps:
+                self.dependents[dep].append(name)
+        self.order = self._toposort(names)
+        self.rank = {name: index for index, name in enumerate(self.order)}
+
+    def downstream(self, names: Iterable[str]) -> list[str]:
+        """`names` plus everything that depends on them, in topological order."""
+        seen = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            stack.extend(self.dependents.get(name, ()))
+        # Names outside the graph have no dependencies and sort first.
+        return sorted(seen, key=lambda name: self.rank.get(name, -1))
+
+    def _toposort(self, names: list[str]) -> tuple[str, ...]:
+        pending = {name: len(self.depends_on[name]) for name in names}
+        ready = [name for name in names if not pending[name]]
+        order: list[str] = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for dependent in self.dependents[name]:
+                pending[dependent] -= 1
+                if not pending[dependent]:
+                    ready.append(dependent)
+        if len(order) != len(names):
+            cyclic = sorted(name for name, count in pending.items() if count)
+            raise ValueError(f"dependency cycle between: {', '.join(cyclic)}")
+        return tuple(order)
+
+
+class DependencyRollup:
+    """Attribute failing subsystems to the failing upstream subsystems that explain them.
+
+    A failing subsystem with failing dependencies is `impacted_by` their
+    root causes; one without is a root cause itself. Healthy subsystems
+    never pass impact through. Each `evaluate()` only revisits subsystems
+    whose state changed and their dependents.
+    """
+
+    def __init__(self, graph: DependencyGraph) -> None:
+        self.graph = graph
+        self._lock = threading.Lock()
+        self._states: dict[str, HealthState] = {}
+        self._attributions: dict[str, Attribution] = {}
+
+    def evaluate(self, snapshot: StateSnapshot) -> dict[str, Attribution]:
+        with self._lock:
+            states = {name: record.state for name, record in snapshot.subsystems.items()}
+            changed = [name for name, state in states.items() if self._states.get(name) != state]
+            if changed:
+                attributions = dict(self._attributions)
+                for name in self.graph.downstream(changed):
+                    attributions[name] = self._attribute(name, states, attributions)
+                self._states = states
+                self._attributions = attributions
+            return self._attributions
+
+    def root_causes(self, snapshot: StateSnapshot) -> list[str]:
+        attributions = self.evaluate(snapshot)
+        return [
+            name for name in self.graph.downstream(attributions) if attributions[name].root_cause
+        ]
+
+    def _attribute(
+        self,
+        name: str,
+        states: Mapping[str, HealthState],
+        attributions: Mapping[str, Attribution],
+    ) -> Attribution:
+        if states[name] not in FAILING:
+            return Attribution(failing=False)
+        causes: set[str] = set()
+        for dep in self.graph.depends_on.get(name, ()):
+            upstream = attributions[dep]
+            if upstream.failing:
+                causes.update(upstream.impacted_by or (dep,))
+        return Attribution(failing=True, impacted_by=tuple(sorted(causes)))
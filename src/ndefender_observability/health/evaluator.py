@@ -0,0 +1,119 @@
+"""Hysteresis and flap damping between collector observations and published state."""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from ..metrics.registry import SUBSYSTEM_FLAPPING, SUBSYSTEM_SUPPRESSED_TRANSITIONS_TOTAL
+from .model import STATE_SEVERITY, HealthState
+
+FLAPPING_REASON = "flapping"
+
+
+@dataclass
+class _Track:
+    state: HealthState
+    since_s: float
+    observed: HealthState
+    candidate: HealthState | None = None
+    streak: int = 0
+    changes: deque[float] = field(default_factory=deque)
+    flapping: bool = False
+
+
+class HealthEvaluator:
+    """Decide the published state from each observed state.
+
+    A move to a worse state needs `enter_cycles` consecutive observations
+    of it, a move to a better one `exit_cycles`, and either only happens
+    once the current state has been held for `min_dwell_s`. Held
+    observations keep the published state and count as suppressed
+    transitions.
+
+    When the observed state changes `flap_threshold` times within
+    `flap_window_s`, the subsystem is published as at least DEGRADED
+    (OFFLINE observations still go through) with a `flapping` reason
+    until the changes in the window drop to half that.
+    The first observation of a subsystem is published as-is.
+    """
+
+    def __init__(
+        self,
+        enter_cycles: int = 2,
+        exit_cycles: int = 3,
+        min_dwell_s: float = 10.0,
+        flap_window_s: float = 300.0,
+        flap_threshold: int = 6,
+    ) -> None:
+        self.enter_cycles = enter_cycles
+        self.exit_cycles = exit_cycles
+        self.min_dwell_s = min_dwell_s
+        self.flap_window_s = flap_window_s
+        self.flap_threshold = flap_threshold
+        self._tracks: dict[str, _Track] = {}
+
+    def apply(
+        self,
+        subsystem: str,
+        current: HealthState,
+        observed: HealthState,
+        reasons: list[str] | None,
+        now_s: float | None = None,
+    ) -> tuple[HealthState, list[str] | None]:
+        """Return the state and reasons to publish for an observation."""
+        now_s = time.monotonic() if now_s is None else now_s
+        track = self._tracks.get(subsystem)
+        if track is None:
+            self._tracks[subsystem] = _Track(state=observed, since_s=now_s, observed=observed)
+            return observed, reasons
+        if current != track.state:
+            # Published by someone else (e.g. the staleness watchdog); dwell restarts from here.
+            track.state = current
+            track.since_s = now_s
+            track.candidate = None
+            track.streak = 0
+
+        if observed != track.observed:
+            track.observed = observed
+            track.changes.append(now_s)
+        while track.changes and track.changes[0] < now_s - self.flap_window_s:
+            track.changes.popleft()
+        if len(track.changes) >= self.flap_threshold:
+            track.flapping = True
+        elif track.flapping and len(track.changes) <= self.flap_threshold // 2:
+            track.flapping = False
+        SUBSYSTEM_FLAPPING.labels(subsystem=subsystem).set(1 if track.flapping else 0)
+
+        if track.flapping:
+            # Never publish better than DEGRADED, but never hide a worse observation either.
+            pinned = max(HealthState.DEGRADED, observed, key=STATE_SEVERITY.__getitem__)
+            if observed != pinned:
+                SUBSYSTEM_SUPPRESSED_TRANSITIONS_TOTAL.labels(subsystem=subsystem).inc()
+            self._commit(track, pinned, now_s)
+            return pinned, [*(reasons or []), FLAPPING_REASON]
+
+        if observed == track.state:
+            track.candidate = None
+            track.streak = 0
+            return observed, reasons
+        if observed != track.candidate:
+            track.candidate = observed
+            track.streak = 0
+        track.streak += 1
+        worse = STATE_SEVERITY[observed] > STATE_SEVERITY[track.state]
+        needed = self.enter_cycles if worse else self.exit_cycles
+        if track.streak >= needed and now_s - track.since_s >= self.min_dwell_s:
+            self._commit(track, observed, now_s)
+            return observed, reasons
+        SUBSYSTEM_SUPPRESSED_TRANSITIONS_TOTAL.labels(subsystem=subsystem).inc()
+        return track.state, [*(reasons or []), f"held {track.state} (hysteresis)"]
+
+    @staticmethod
+    def _commit(track: _Track, state: HealthState, now_s: float) -> None:
+        if state != track.state:
+            track.state = state
+            track.since_s = now_s
+        track.candidate = None
+        track.streak = 0
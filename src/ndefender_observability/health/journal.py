@@ -0,0 +1,228 @@
+"""Per-subsystem journal of health state transitions."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import heapq
+import json
+import threading
+import time
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from prometheus_client.core import CounterMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+from ..state import ObservabilityState, StateSnapshot, SubsystemState
+from ..utils.time import now_ms
+from .model import HealthState
+
+
+@dataclass(frozen=True)
+class Transition:
+    subsystem: str
+    ts: int
+    from_state: HealthState
+    to_state: HealthState
+    version: int
+    reasons: list[str]
+    evidence_digest: str
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "subsystem": self.subsystem,
+            "ts": self.ts,
+            "from": self.from_state,
+            "to": self.to_state,
+            "version": self.version,
+            "reasons": self.reasons,
+            "evidence_digest": self.evidence_digest,
+        }
+
+
+class TransitionRing:
+    """Fixed-size ring of transitions ordered by `ts`.
+
+    Timestamps live in a parallel `array` so `since()` can binary-search
+    the ring without touching the records it skips.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.head = 0
+        self.count = 0
+        self._ts = array("q", [0] * capacity)
+        self._items: list[Transition | None] = [None] * capacity
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def last_ts(self) -> int | None:
+        return self._ts[self._slot(self.count - 1)] if self.count else None
+
+    def append(self, item: Transition) -> None:
+        self._ts[self.head] = item.ts
+        self._items[self.head] = item
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.capacity, self.count + 1)
+
+    def since(self, ts_ms: int) -> list[Transition]:
+        """Transitions with `ts >= ts_ms`, oldest first."""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self._ts[self._slot(mid)] < ts_ms:
+                low = mid + 1
+            else:
+                high = mid
+        return [self._items[self._slot(index)] for index in range(low, self.count)]
+
+    def _slot(self, index: int) -> int:
+        return (self.head - self.count + index) % self.capacity
+
+
+class TransitionJournal(Collector):
+    """Record state transitions from the store and export transition metrics.
+
+    Fed by the store listener, or by `run()` polling stores without
+    listeners (`SnapshotState`; transitions between two snapshot writes
+    are then coalesced). Journal timestamps are forced to be
+    non-decreasing per subsystem so the rings stay searchable across wall
+    clock steps; time in state is measured on the monotonic clock and
+    includes the current state up to the scrape.
+    """
+
+    def __init__(self, store: ObservabilityState, capacity: int = 128) -> None:
+        self.store = store
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        snapshot = store.snapshot()
+        self._last_snapshot = snapshot
+        self._rings = {name: TransitionRing(capacity) for name in snapshot.subsystems}
+        self._counts: dict[tuple[str, str, str], int] = {}
+        self._time_in_state: dict[tuple[str, str], float] = {}
+        entered = time.monotonic()
+        self._current = {
+            name: (record.state, entered) for name, record in snapshot.subsystems.items()
+        }
+        self._stop = asyncio.Event()
+        self._listening = hasattr(store, "add_listener")
+        if self._listening:
+            store.add_listener(self._on_change)
+
+    @property
+    def subsystems(self) -> list[str]:
+        return list(self._rings)
+
+    def query(self, subsystem: str | None = None, since_ms: int = 0) -> list[Transition]:
+        """Transitions at or after `since_ms`, oldest first, across one or all subsystems."""
+        with self._lock:
+            names = [subsystem] if subsystem is not None else list(self._rings)
+            parts = [self._rings[name].since(since_ms) for name in names]
+        if len(parts) == 1:
+            return parts[0]
+        # Store versions order transitions that share a millisecond.
+        return list(heapq.merge(*parts, key=lambda item: (item.ts, item.version)))
+
+    async def run(self, poll_interval_s: float = 0.25) -> None:
+        if self._listening:
+            return
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=poll_interval_s)
+            except TimeoutError:
+                pass
+            snapshot = self.store.snapshot()
+            if snapshot is not self._last_snapshot:
+                self._on_change(self._last_snapshot, snapshot)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._listening:
+            self.store.remove_listener(self._on_change)
+
+    def describe(self) -> Iterable[Metric]:
+        return self._families()
+
+    def collect(self) -> Iterable[Metric]:
+        transitions, time_in_state = families = self._families()
+        now = time.monotonic()
+        with self._lock:
+            for (subsystem, old, new), count in self._counts.items():
+                transitions.add_metric([subsystem, old, new], count)
+            seconds = dict(self._time_in_state)
+            for subsystem, (state, entered) in self._current.items():
+                key = (subsystem, state.value)
+                seconds[key] = seconds.get(key, 0.0) + now - entered
+        for (subsystem, state), value in seconds.items():
+            time_in_state.add_metric([subsystem, state], value)
+        return families
+
+    def _on_change(self, old: StateSnapshot, new: StateSnapshot) -> None:
+        now = time.monotonic()
+        wall_ms = now_ms()
+        with self._lock:
+            self._last_snapshot = new
+            for name, record in new.subsystems.items():
+                previous = old.subsystems.get(name)
+                if previous is record or previous is None or previous.state == record.state:
+                    continue
+                self._record(record, previous.state, new.version, now, wall_ms)
+
+    def _record(
+        self,
+        record: SubsystemState,
+        from_state: HealthState,
+        version: int,
+        now: float,
+        wall_ms: int,
+    ) -> None:
+        name = record.subsystem
+        ring = self._rings.setdefault(name, TransitionRing(self.capacity))
+        ts = max(wall_ms, ring.last_ts or 0)
+        ring.append(
+            Transition(
+                subsystem=name,
+                ts=ts,
+                from_state=from_state,
+                to_state=record.state,
+                version=version,
+                reasons=record.reasons,
+                evidence_digest=evidence_digest(record.evidence),
+            )
+        )
+        key = (name, from_state.value, record.state.value)
+        self._counts[key] = self._counts.get(key, 0) + 1
+        state, entered = self._current.get(name, (from_state, now))
+        spent = (name, state.value)
+        self._time_in_state[spent] = self._time_in_state.get(spent, 0.0) + now - entered
+        self._current[name] = (record.state, now)
+
+    @staticmethod
+    def _families() -> list[CounterMetricFamily]:
+        return [
+            CounterMetricFamily(
+                "ndefender_subsystem_transitions",
+                "Subsystem health state transitions",
+                labels=["subsystem", "from", "to"],
+            ),
+            CounterMetricFamily(
+                "ndefender_subsystem_time_in_state_seconds",
+                "Seconds spent in each health state since the service started",
+                labels=["subsystem", "state"],
+            ),
+        ]
+
+
+def evidence_digest(evidence: dict[str, Any]) -> str:
+    """Short stable hash of the evidence, enough to tell whether two transitions saw the same."""
+    if not evidence:
+        return ""
+    encoded = json.dumps(evidence, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode(), digest_size=6).hexdigest()
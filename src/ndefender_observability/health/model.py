@@ -15,6 +15,15 @@ class HealthState(StrEnum):
     REPLAY = "REPLAY"
 
 
+# Worst state wins when states are combined; higher is worse.
+STATE_SEVERITY = {
+    HealthState.OFFLINE: 3,
+    HealthState.DEGRADED: 2,
+    HealthState.REPLAY: 1,
+    HealthState.OK: 0,
+}
+
+
 class DeepHealth(BaseModel):
     subsystem: str
     state: HealthState
@@ -0,0 +1,154 @@
+"""Staleness watchdog independent of collector polls."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import threading
+from collections.abc import Iterable, Mapping
+
+from prometheus_client.core import GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+from ..metrics.registry import WATCHDOG_DEMOTIONS_TOTAL
+from ..state import ObservabilityState, StateSnapshot
+from ..utils.time import now_ms
+from .model import HealthState
+
+STALLED_REASON = "collector stalled"
+
+
+class StalenessWatchdog(Collector):
+    """Demote subsystems whose state has not been refreshed within `stale_after_s`.
+
+    Each refresh of `updated_ts` pushes a deadline onto a min-heap;
+    superseded entries are skipped when popped, so `check()` costs
+    O(log n) per due deadline and nothing while none are due. At a
+    deadline, a subsystem whose collector still completes cycles
+    (`store.mark_cycle`) is left to that collector's own staleness logic
+    and re-armed from its last cycle; otherwise it is demoted to DEGRADED
+    (OFFLINE stays OFFLINE) with a `collector stalled` reason appended to
+    the collector's last ones, bypassing the health evaluator. The next
+    refresh clears the stall.
+    """
+
+    def __init__(
+        self,
+        store: ObservabilityState,
+        stale_after_s: Mapping[str, float],
+        interval_s: float = 1.0,
+    ) -> None:
+        self.store = store
+        self.stale_after_ms = {name: int(value * 1000) for name, value in stale_after_s.items()}
+        self.interval_s = interval_s
+        self._lock = threading.Lock()
+        self._heap: list[tuple[int, str]] = []
+        self._deadlines: dict[str, int] = {}
+        self.stalled: set[str] = set()
+        self._stop = asyncio.Event()
+        for record in store.all():
+            if record.updated_ts is not None:
+                self._arm(record.subsystem, record.updated_ts)
+        store.add_listener(self._on_change)
+
+    async def run(self) -> None:
+        while not self._stop.is_set():
+            self.check()
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval_s)
+            except TimeoutError:
+                pass
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.store.remove_listener(self._on_change)
+
+    def check(self, now: int | None = None) -> list[str]:
+        """Demote subsystems past their deadline; return the ones demoted."""
+        now = now_ms() if now is None else now
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, name = heapq.heappop(self._heap)
+                if self._deadlines.get(name) != deadline:
+                    continue
+                del self._deadlines[name]
+                due.append(name)
+        demoted = []
+        for name in due:
+            record = self.store.get(name)
+            stale_ms = self.stale_after_ms[name]
+            if record.updated_ts is not None and record.updated_ts + stale_ms > now:
+                # Refreshed between the pop and here; the listener re-armed it.
+                continue
+            last_cycle = self.store.last_cycle(name)
+            if last_cycle is not None and last_cycle + stale_ms > now:
+                with self._lock:
+                    self._arm(name, last_cycle)
+                continue
+            self.stalled.add(name)
+            state = HealthState.DEGRADED
+            if record.state == HealthState.OFFLINE:
+                state = HealthState.OFFLINE
+            # Keep the collector's last diagnosis next to the stall.
+            reasons = [item for item in record.reasons or [] if item != STALLED_REASON]
+            reasons.append(STALLED_REASON)
+            self.store.update(name, state=state, reasons=reasons, evaluate=False)
+            WATCHDOG_DEMOTIONS_TOTAL.labels(subsystem=name).inc()
+            demoted.append(name)
+        return demoted
+
+    def describe(self) -> Iterable[Metric]:
+        return self._families()
+
+    def collect(self) -> Iterable[Metric]:
+        stalled, cycle_age = families = self._families()
+        now = now_ms()
+        for name in self.stale_after_ms:
+            stalled.add_metric([name], 1 if name in self.stalled else 0)
+            last_cycle = self.store.last_cycle(name)
+            if last_cycle is not None:
+                cycle_age.add_metric([name], max(0, now - last_cycle) / 1000)
+        return families
+
+    def _on_change(self, old: StateSnapshot, new: StateSnapshot) -> None:
+        for name, record in new.subsystems.items():
+            previous = old.subsystems.get(name)
+            if previous is record or record.updated_ts is None:
+                continue
+            if name in self.stalled and STALLED_REASON not in record.reasons:
+                # The collector published again without a newer `updated_ts` (e.g. ingest
+                # sources between events); watch it from its last cycle.
+                self.stalled.discard(name)
+                since = max(record.updated_ts, self.store.last_cycle(name) or 0)
+                with self._lock:
+                    self._arm(name, since)
+                continue
+            if previous is not None and previous.updated_ts == record.updated_ts:
+                continue
+            self.stalled.discard(name)
+            with self._lock:
+                self._arm(name, record.updated_ts)
+
+    def _arm(self, name: str, since_ms: int) -> None:
+        stale_ms = self.stale_after_ms.get(name)
+        if stale_ms is None:
+            return
+        deadline = since_ms + stale_ms
+        self._deadlines[name] = deadline
+        heapq.heappush(self._heap, (deadline, name))
+
+    @staticmethod
+    def _families() -> list[GaugeMetricFamily]:
+        return [
+            GaugeMetricFamily(
+                "ndefender_subsystem_stalled",
+                "1 while the watchdog holds a subsystem demoted for a stalled collector",
+                labels=["subsystem"],
+            ),
+            GaugeMetricFamily(
+                "ndefender_collector_last_cycle_age_seconds",
+                "Seconds since the subsystem's collector last completed a cycle",
+                labels=["subsystem"],
+            ),
+        ]
@@ -0,0 +1,210 @@
+"""Memory-mapped on-disk segments for the history store."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections.abc import Iterator
+
+from ..metrics.registry import HISTORY_DISK_BYTES, HISTORY_DISK_FLUSHES_TOTAL
+
+# magic, version, record size, capacity, head (next slot), count; padded to HEADER_SIZE.
+HEADER = struct.Struct("<4sHHIII")
+HEADER_SIZE = 32
+MAGIC = b"NDHS"
+VERSION = 1
+# (timestamp_ms, value)
+RECORD = struct.Struct("<qd")
+INDEX_FILE = "index.json"
+
+
+class Segment:
+    """Fixed-size ring of packed `RECORD`s in one memory-mapped file.
+
+    Opening maps the file and reads the header only; records are unpacked
+    on demand when queried. Appends are buffered in memory and copied into
+    the map by `flush()`, so the file is dirtied once per flush interval.
+    """
+
+    def __init__(self, path: str, capacity: int) -> None:
+        self.path = path
+        self.capacity = capacity
+        size = HEADER_SIZE + capacity * RECORD.size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            resized = os.fstat(fd).st_size != size
+            if resized:
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        magic, version, record_size, stored_capacity, head, count = HEADER.unpack_from(self._map)
+        valid = (
+            not resized
+            and magic == MAGIC
+            and version == VERSION
+            and record_size == RECORD.size
+            and stored_capacity == capacity
+            and head < capacity
+            and count <= capacity
+        )
+        self.head = head if valid else 0
+        self.count = count if valid else 0
+        if not valid:
+            self._write_header()
+        self.last_ts_ms = self._ts_at(self.count - 1) if self.count else None
+        self._pending_ts = array("q")
+        self._pending_values = array("d")
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending_ts)
+
+    def append(self, ts_ms: int, value: float) -> bool:
+        # Records stay sorted so reads can bisect; drop samples from a clock step back.
+        if self.last_ts_ms is not None and ts_ms < self.last_ts_ms:
+            return False
+        self._pending_ts.append(ts_ms)
+        self._pending_values.append(value)
+        self.last_ts_ms = ts_ms
+        return True
+
+    def write_pending(self) -> int:
+        """Copy buffered records into the map; return the number written."""
+        written = len(self._pending_ts)
+        for ts_ms, value in zip(self._pending_ts, self._pending_values, strict=True):
+            RECORD.pack_into(self._map, HEADER_SIZE + self.head * RECORD.size, ts_ms, value)
+            self.head = (self.head + 1) % self.capacity
+        self.count = min(self.capacity, self.count + written)
+        self._pending_ts = array("q")
+        self._pending_values = array("d")
+        if written:
+            self._write_header()
+        return written
+
+    def sync(self) -> None:
+        self._map.flush()
+
+    def records(self, from_ms: int, to_ms: int) -> Iterator[tuple[int, float]]:
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self._ts_at(mid) < from_ms:
+                low = mid + 1
+            else:
+                high = mid
+        for index in range(low, self.count):
+            ts_ms, value = RECORD.unpack_from(self._map, self._offset(index))
+            if ts_ms > to_ms:
+                return
+            yield ts_ms, value
+        for ts_ms, value in zip(self._pending_ts, self._pending_values, strict=True):
+            if from_ms <= ts_ms <= to_ms:
+                yield ts_ms, value
+
+    def close(self) -> None:
+        self._map.close()
+
+    def _offset(self, index: int) -> int:
+        slot = (self.head - self.count + index) % self.capacity
+        return HEADER_SIZE + slot * RECORD.size
+
+    def _ts_at(self, index: int) -> int:
+        return RECORD.unpack_from(self._map, self._offset(index))[0]
+
+    def _write_header(self) -> None:
+        HEADER.pack_into(
+            self._map, 0, MAGIC, VERSION, RECORD.size, self.capacity, self.head, self.count
+        )
+
+
+class SegmentStore:
+    """One `Segment` per history series under `path`, capped at `max_bytes` in total.
+
+    `index.json` maps series keys to segment files and is only rewritten
+    when a series is added. Each series gets `max_bytes / max_series`.
+    """
+
+    def __init__(self, path: str, max_bytes: int, max_series: int = 64) -> None:
+        self.path = path
+        self.max_series = max_series
+        self.capacity = max(1, (max_bytes // max_series - HEADER_SIZE) // RECORD.size)
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._index = self._load_index()
+        self._segments = {
+            key: Segment(os.path.join(path, name), self.capacity)
+            for key, name in list(self._index.items())[:max_series]
+        }
+        HISTORY_DISK_BYTES.set(self.nbytes)
+
+    @property
+    def series(self) -> list[str]:
+        return sorted(self._segments)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._segments) * (HEADER_SIZE + self.capacity * RECORD.size)
+
+    def append(self, key: str, ts_s: float, value: float) -> bool:
+        with self._lock:
+            segment = self._segments.get(key)
+            if segment is None:
+                if len(self._segments) >= self.max_series:
+                    return False
+                segment = self._create(key)
+            return segment.append(int(ts_s * 1000), value)
+
+    def flush(self) -> int:
+        """Write buffered records to the maps, then sync them; return records written."""
+        with self._lock:
+            dirty = [segment for segment in self._segments.values() if segment.pending]
+            written = sum(segment.write_pending() for segment in dirty)
+        for segment in dirty:
+            segment.sync()
+        if dirty:
+            HISTORY_DISK_FLUSHES_TOTAL.inc()
+        return written
+
+    def records(self, key: str, from_s: float, to_s: float) -> list[tuple[float, float]]:
+        with self._lock:
+            segment = self._segments.get(key)
+            if segment is None:
+                return []
+            return [
+                (ts_ms / 1000, value)
+                for ts_ms, value in segment.records(int(from_s * 1000), int(to_s * 1000))
+            ]
+
+    def close(self) -> None:
+        with self._lock:
+            for segment in self._segments.values():
+                segment.close()
+            self._segments = {}
+
+    def _create(self, key: str) -> Segment:
+        name = hashlib.blake2b(key.encode(), digest_size=8).hexdigest() + ".seg"
+        segment = Segment(os.path.join(self.path, name), self.capacity)
+        self._segments[key] = segment
+        self._index[key] = name
+        tmp_path = os.path.join(self.path, INDEX_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(self._index, handle, sort_keys=True)
+        os.replace(tmp_path, os.path.join(self.path, INDEX_FILE))
+        HISTORY_DISK_BYTES.set(self.nbytes)
+        return segment
+
+    def _load_index(self) -> dict[str, str]:
+        try:
+            with open(os.path.join(self.path, INDEX_FILE), encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return {str(key): str(name) for key, name in data.items() if "/" not in str(name)}
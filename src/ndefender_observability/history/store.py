@@ -0,0 +1,295 @@
+"""In-process short-term history for key series."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from array import array
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+from prometheus_client import CollectorRegistry
+
+from ..health.model import STATE_SEVERITY
+from ..metrics.instruments import timed_cycle
+from ..metrics.registry import (
+    HISTORY_DROPPED_SAMPLES_TOTAL,
+    HISTORY_SERIES,
+    REGISTRY,
+)
+from .segments import SegmentStore
+
+DEFAULT_FAMILIES = (
+    "ndefender_subsystem_state",
+    "ndefender_jsonl_tail_lag_seconds",
+    "ndefender_events_rate_60s",
+    "ndefender_ups_soc_percent",
+    "ndefender_pi_cpu_temp_c",
+)
+# (step_s, retention_s) of the downsampled tiers kept next to the raw ring.
+DEFAULT_TIERS = ((60, 6 * 3600), (300, 24 * 3600))
+
+# `ndefender_subsystem_state` is one-hot; history stores the state's severity instead, so
+# min/max/avg rollups order states by how bad they are.
+STATE_FAMILY = "ndefender_subsystem_state"
+STATE_CODES = {state.value: severity for state, severity in STATE_SEVERITY.items()}
+
+NAN = float("nan")
+
+
+@dataclass(frozen=True)
+class Point:
+    ts_s: float
+    total: float
+    count: int
+    min: float
+    max: float
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count
+
+
+class Tier:
+    """Fixed-size ring of time buckets for one series.
+
+    Slots are addressed by `epoch % slots` and tagged with their absolute
+    epoch, so stale slots are recognised without clearing. The raw tier keeps
+    one value per slot; aggregate tiers keep min, max, sum and count.
+    """
+
+    def __init__(self, step_s: float, retention_s: float, aggregate: bool) -> None:
+        self.step_s = step_s
+        self.retention_s = retention_s
+        self.aggregate = aggregate
+        self.slots = max(1, math.ceil(retention_s / step_s))
+        self.epochs = array("q", [-1]) * self.slots
+        self.mins = array("d", [NAN]) * self.slots
+        if aggregate:
+            self.maxs = array("d", [NAN]) * self.slots
+            self.sums = array("d", [0.0]) * self.slots
+            self.counts = array("q", [0]) * self.slots
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.epochs, self.mins]
+        if self.aggregate:
+            arrays += [self.maxs, self.sums, self.counts]
+        return sum(item.itemsize * len(item) for item in arrays)
+
+    def add(self, ts_s: float, value: float) -> None:
+        epoch = int(ts_s // self.step_s)
+        slot = epoch % self.slots
+        if not self.aggregate:
+            self.epochs[slot] = epoch
+            self.mins[slot] = value
+            return
+        if self.epochs[slot] != epoch:
+            self.epochs[slot] = epoch
+            self.mins[slot] = value
+            self.maxs[slot] = value
+            self.sums[slot] = value
+            self.counts[slot] = 1
+            return
+        self.mins[slot] = min(self.mins[slot], value)
+        self.maxs[slot] = max(self.maxs[slot], value)
+        self.sums[slot] += value
+        self.counts[slot] += 1
+
+    def points(self, from_s: float, to_s: float) -> Iterator[Point]:
+        last = int(to_s // self.step_s)
+        first = max(int(from_s // self.step_s), last - self.slots + 1)
+        for epoch in range(first, last + 1):
+            slot = epoch % self.slots
+            if self.epochs[slot] != epoch:
+                continue
+            ts_s = epoch * self.step_s
+            if self.aggregate:
+                yield Point(
+                    ts_s, self.sums[slot], self.counts[slot], self.mins[slot], self.maxs[slot]
+                )
+            else:
+                value = self.mins[slot]
+                yield Point(ts_s, value, 1, value, value)
+
+
+class HistoryStore:
+    """Sample selected metric families into fixed-size per-series rings.
+
+    Each tick runs one restricted `REGISTRY.collect()` over `families` and
+    appends every sample to a raw tier (`sample_interval_s` for
+    `raw_retention_s`) and to the downsampled `tiers`. Memory per series is
+    fixed at creation and the number of series is capped at `max_series`.
+
+    With `segments`, raw samples are also persisted and flushed every
+    `flush_interval_s`; ranges that start before this process did, or reach
+    past the longest in-memory tier, are served from disk.
+    """
+
+    def __init__(
+        self,
+        families: Iterable[str] = DEFAULT_FAMILIES,
+        sample_interval_s: float = 5.0,
+        raw_retention_s: float = 3600.0,
+        tiers: Iterable[tuple[float, float]] = DEFAULT_TIERS,
+        max_series: int = 64,
+        registry: CollectorRegistry = REGISTRY,
+        segments: SegmentStore | None = None,
+        flush_interval_s: float = 60.0,
+    ) -> None:
+        self.families = tuple(families)
+        self.sample_interval_s = sample_interval_s
+        self.raw_retention_s = raw_retention_s
+        self.tiers = tuple(sorted(tiers))
+        self.max_series = max_series
+        self._source = registry.restricted_registry(self.families)
+        self.segments = segments
+        self.flush_interval_s = flush_interval_s
+        self._started_s = time.time()
+        self._series: dict[str, list[Tier]] = {}
+        self._stop = asyncio.Event()
+
+    @property
+    def series(self) -> list[str]:
+        if self.segments is None:
+            return sorted(self._series)
+        return sorted(set(self._series) | set(self.segments.series))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(tier.nbytes for tiers in self._series.values() for tier in tiers)
+
+    def sample(self, now_s: float | None = None) -> int:
+        now_s = time.time() if now_s is None else now_s
+        recorded = 0
+        for metric in self._source.collect():
+            for sample in metric.samples:
+                if metric.name == STATE_FAMILY:
+                    if sample.value != 1:
+                        continue
+                    labels = {"subsystem": sample.labels.get("subsystem", "")}
+                    value = float(STATE_CODES.get(sample.labels.get("state", ""), -1))
+                else:
+                    labels = sample.labels
+                    value = sample.value
+                if self.record(series_key(metric.name, labels), now_s, value):
+                    recorded += 1
+        return recorded
+
+    def record(self, key: str, ts_s: float, value: float) -> bool:
+        tiers = self._series.get(key)
+        if tiers is None:
+            if len(self._series) >= self.max_series:
+                HISTORY_DROPPED_SAMPLES_TOTAL.inc()
+                return False
+            tiers = [Tier(self.sample_interval_s, self.raw_retention_s, aggregate=False)]
+            tiers += [Tier(step, retention, aggregate=True) for step, retention in self.tiers]
+            self._series[key] = tiers
+            HISTORY_SERIES.set(len(self._series))
+        for tier in tiers:
+            tier.add(ts_s, value)
+        if self.segments is not None:
+            self.segments.append(key, ts_s, value)
+        return True
+
+    def query(
+        self,
+        selectors: Iterable[str],
+        from_s: float,
+        step_s: float | None = None,
+        now_s: float | None = None,
+    ) -> tuple[float, dict[str, list[Point]]]:
+        """Return `(step_s, {series: points})` between `from_s` and now.
+
+        A selector is an exact series key or a metric name matching every
+        label set. The coarsest tier that still covers the range at `step_s`
+        (the finest covering tier when no step is given) is read; when
+        `step_s` is coarser than that tier, points are merged into `step_s`
+        buckets.
+        """
+        now_s = time.time() if now_s is None else now_s
+        wanted = set(selectors)
+        keys = [key for key in self.series if key in wanted or _name(key) in wanted]
+        index, tier_step, covered = self._pick_tier(now_s - from_s, step_s)
+        bucket_s = max(step_s or tier_step, tier_step)
+        from_disk = self.segments is not None and (from_s < self._started_s or not covered)
+        result = {}
+        for key in keys:
+            if from_disk:
+                records = self.segments.records(key, from_s, now_s)
+                points = (Point(ts_s, value, 1, value, value) for ts_s, value in records)
+                result[key] = _rebucket(points, bucket_s)
+                continue
+            tiers = self._series.get(key)
+            if tiers is None:
+                result[key] = []
+                continue
+            points = tiers[index].points(from_s, now_s)
+            result[key] = list(points) if bucket_s == tier_step else _rebucket(points, bucket_s)
+        return bucket_s, result
+
+    def _pick_tier(self, span_s: float, step_s: float | None) -> tuple[int, float, bool]:
+        candidates = [(self.sample_interval_s, self.raw_retention_s), *self.tiers]
+        covering = [index for index, (_, retention) in enumerate(candidates) if retention >= span_s]
+        if not covering:
+            index = len(candidates) - 1
+        elif step_s is None:
+            index = covering[0]
+        else:
+            fitting = [index for index in covering if candidates[index][0] <= step_s]
+            index = fitting[-1] if fitting else covering[0]
+        return index, candidates[index][0], bool(covering)
+
+    async def run(self) -> None:
+        flushed_at = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                with timed_cycle("history"):
+                    self.sample()
+                if (
+                    self.segments is not None
+                    and time.monotonic() - flushed_at >= self.flush_interval_s
+                ):
+                    await asyncio.to_thread(self.segments.flush)
+                    flushed_at = time.monotonic()
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=self.sample_interval_s)
+                except TimeoutError:
+                    pass
+        finally:
+            if self.segments is not None:
+                self.segments.flush()
+                self.segments.close()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def series_key(name: str, labels: dict[str, str]) -> str:
+    if not labels:
+        return name
+    inner = ",".join(f'{key}="{labels[key]}"' for key in sorted(labels))
+    return f"{name}{{{inner}}}"
+
+
+def _name(key: str) -> str:
+    return key.split("{", 1)[0]
+
+
+def _rebucket(points: Iterable[Point], bucket_s: float) -> list[Point]:
+    merged: list[Point] = []
+    for point in points:
+        ts_s = (point.ts_s // bucket_s) * bucket_s
+        if merged and merged[-1].ts_s == ts_s:
+            last = merged[-1]
+            merged[-1] = Point(
+                ts_s,
+                last.total + point.total,
+                last.count + point.count,
+                min(last.min, point.min),
+                max(last.max, point.max),
+            )
+        else:
+            merged.append(Point(ts_s, point.total, point.count, point.min, point.max))
+    return merged
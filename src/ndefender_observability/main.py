@@ -4,95 +4,335 @@ import asyncio
 import os
 import time
 from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse, Response
+from fastapi import FastAPI, HTTPException, Request, WebSocket
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from prometheus_client import multiprocess
+from starlette.requests import HTTPConnection
+from starlette.status import WS_1008_POLICY_VIOLATION
 
 from .collectors.aggregator_http import AggregatorHttpCollector
+from .collectors.esp32_udp import Esp32UdpCollector
+from .collectors.ingest import IngestCollector
 from .collectors.jsonl_tail import JsonlTailCollector
 from .collectors.pi_stats import PiStatsCollector
+from .collectors.status_flatten import StatusFlattener
 from .collectors.system_controller_http import SystemControllerHttpCollector
 from .config import AppConfig, load_config
 from .diagnostics import DiagnosticsOptions, create_bundle
 from .health.compute import compute_deep_health, compute_status_snapshot
-from .metrics.registry import init_metrics, render_metrics, update_subsystem_metrics
-from .state import ObservabilityState
-from .utils.http import RateLimiter, get_client_key
+from .health.dependencies import DependencyGraph, DependencyRollup
+from .health.evaluator import HealthEvaluator
+from .health.journal import TransitionJournal
+from .health.watchdog import StalenessWatchdog
+from .history.segments import SegmentStore
+from .history.store import HistoryStore
+from .metrics.exposition import (
+    CONTENT_TYPES,
+    FORMAT_OPENMETRICS,
+    FORMAT_TEXT,
+    ExpositionCache,
+    negotiate,
+)
+from .metrics.instruments import LoopLagMonitor, RequestMetricsMiddleware
+from .metrics.registry import (
+    LONG_POLL_REJECTED_TOTAL,
+    LONG_POLL_WAITERS,
+    REGISTRY,
+    SubsystemStateCollector,
+    init_metrics,
+    multiprocess_registry,
+    render_metrics,
+    render_openmetrics,
+)
+from .snapshot import SnapshotState, SnapshotWriter
+from .state import ObservabilityState, StateSnapshot, VersionNotifier, WaiterLimitError
+from .stream import EventBroadcaster, SubscriberLimitError
+from .utils.http import RateLimiter, VersionedJsonCache, cached_json_response, get_client_key
 from .version import GIT_SHA, VERSION
+from .ws.server import WsHub
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_metrics(VERSION, GIT_SHA)
     app.state.config = load_config()
-    app.state.store = ObservabilityState()
-    app.state.pi_collector = PiStatsCollector()
+    service = app.state.config.service
+    if service.mode != "single" and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        raise RuntimeError(f"service.mode={service.mode} requires PROMETHEUS_MULTIPROC_DIR")
+    # API workers own no collectors: state comes from the collector's snapshot file and
+    # metrics from the shared multiprocess directory.
+    api_only = service.mode == "api"
+    evaluator_config = app.state.config.health.evaluator
+    app.state.store = (
+        SnapshotState(service.state_snapshot_path)
+        if api_only
+        else ObservabilityState(
+            evaluator=HealthEvaluator(
+                enter_cycles=evaluator_config.enter_cycles,
+                exit_cycles=evaluator_config.exit_cycles,
+                min_dwell_s=evaluator_config.min_dwell_s,
+                flap_window_s=evaluator_config.flap_window_s,
+                flap_threshold=evaluator_config.flap_threshold,
+            )
+            if evaluator_config.enabled
+            else None
+        )
+    )
     app.state.tasks = []
+    collectors: list[Any] = []
+    rate_limit = app.state.config.rate_limit
     app.state.rate_limiter = RateLimiter(
-        app.state.config.rate_limit.max_requests,
-        app.state.config.rate_limit.window_s,
+        rate_limit.max_requests, rate_limit.window_s, max_keys=rate_limit.max_keys
     )
+    app.state.rate_limiter.add_budget(
+        "expensive",
+        rate_limit.expensive.max_requests,
+        rate_limit.expensive.window_s,
+        rate_limit.expensive_routes,
+    )
+    for route, rule in rate_limit.routes.items():
+        app.state.rate_limiter.add_budget(route, rule.max_requests, rule.window_s, [route])
     app.state.diag_last_ts_ms = 0
+    app.state.dependency_rollup = DependencyRollup(
+        DependencyGraph(
+            [record.subsystem for record in app.state.store.all()],
+            app.state.config.health.dependencies,
+        )
+    )
+    app.state.status_cache = VersionedJsonCache(
+        partial(compute_status_snapshot, rollup=app.state.dependency_rollup)
+    )
+    app.state.health_detail_cache = VersionedJsonCache(_deep_health_payload)
+    app.state.version_notifier = VersionNotifier(
+        app.state.store, max_waiters=app.state.config.long_poll.max_waiters
+    )
+    if api_only:
+        # Snapshot-backed stores have no listeners; poll the file for changes instead.
+        app.state.tasks.append(asyncio.create_task(app.state.version_notifier.run()))
+
+    store: ObservabilityState = app.state.store
+    app.state.pi_collector = None
+    if not api_only:
+        polling = app.state.config.polling
+        app.state.pi_collector = PiStatsCollector(
+            cadences_s={
+                "system": polling.pi_system_s,
+                "temp": polling.pi_temp_s,
+                "throttled": polling.pi_throttled_s,
+                "disk": polling.pi_disk_s,
+            }
+        )
+        collectors.append(app.state.pi_collector)
+        app.state.tasks.append(asyncio.create_task(app.state.pi_collector.run()))
+
+    metrics_registry = multiprocess_registry() if api_only else REGISTRY
+    state_collector = SubsystemStateCollector(store)
+    metrics_registry.register(state_collector)
+    journal = TransitionJournal(store, capacity=app.state.config.health.journal_size)
+    metrics_registry.register(journal)
+    app.state.tasks.append(asyncio.create_task(journal.run()))
+    app.state.journal = journal
+    watchdog_config = app.state.config.health.watchdog
+    watchdog: StalenessWatchdog | None = None
+    if watchdog_config.enabled and not api_only:
+        watchdog = StalenessWatchdog(
+            store,
+            app.state.config.thresholds.stale_after_s.model_dump(),
+            interval_s=watchdog_config.interval_s,
+        )
+        metrics_registry.register(watchdog)
+        collectors.append(watchdog)
+        app.state.tasks.append(asyncio.create_task(watchdog.run()))
+
+    metrics_config = app.state.config.metrics
+    app.state.exposition = ExpositionCache(
+        {
+            FORMAT_TEXT: partial(render_metrics, metrics_registry),
+            FORMAT_OPENMETRICS: partial(render_openmetrics, metrics_registry),
+        },
+        max_staleness_s=metrics_config.max_staleness_s,
+        interval_s=metrics_config.render_interval_s,
+        min_interval_s=metrics_config.min_render_interval_s,
+    )
+    app.state.tasks.append(asyncio.create_task(app.state.exposition.run(store)))
+    app.state.loop_lag_monitor = LoopLagMonitor(metrics_config.loop_lag_interval_s)
+    app.state.tasks.append(asyncio.create_task(app.state.loop_lag_monitor.run()))
+
+    history_config = app.state.config.history
+    history: HistoryStore | None = None
+    if history_config.enabled and not api_only:
+        persist = history_config.persist
+        history = HistoryStore(
+            history_config.series,
+            sample_interval_s=history_config.sample_interval_s,
+            raw_retention_s=history_config.raw_retention_s,
+            tiers=[(tier.step_s, tier.retention_s) for tier in history_config.tiers],
+            max_series=history_config.max_series,
+            segments=(
+                SegmentStore(persist.path, persist.max_bytes, history_config.max_series)
+                if persist.enabled
+                else None
+            ),
+            flush_interval_s=persist.flush_interval_s,
+        )
+        app.state.tasks.append(asyncio.create_task(history.run()))
+    app.state.history = history
+
+    ws_config = app.state.config.ws
+    ws_hub: WsHub | None = None
+    if ws_config.enabled:
+        ws_hub = WsHub(
+            store,
+            ws_config.metrics,
+            update_hz=ws_config.metrics_update_hz,
+            max_clients=ws_config.max_clients,
+            queue_size=ws_config.queue_size,
+            registry=metrics_registry,
+        )
+        app.state.tasks.append(asyncio.create_task(ws_hub.run()))
+    app.state.ws_hub = ws_hub
+
+    stream_config = app.state.config.stream
+    broadcaster: EventBroadcaster | None = None
+    if stream_config.enabled:
+        broadcaster = EventBroadcaster(
+            store,
+            replay_size=stream_config.replay_size,
+            rate_tick_interval_s=stream_config.rate_tick_interval_s,
+            max_subscribers=stream_config.max_subscribers,
+            queue_size=stream_config.queue_size,
+            registry=metrics_registry,
+        )
+        app.state.tasks.append(asyncio.create_task(broadcaster.run()))
+    app.state.broadcaster = broadcaster
 
     disable_collectors = os.getenv("NDEFENDER_OBS_DISABLE_COLLECTORS") == "1"
-    if "PYTEST_CURRENT_TEST" in os.environ:
+    if "PYTEST_CURRENT_TEST" in os.environ or api_only:
         disable_collectors = True
 
+    event_types = app.state.config.jsonl.event_types
+    ingest_config = app.state.config.ingest
+    ingest: IngestCollector | None = None
+    if ingest_config.enabled and not api_only:
+        known = {item.subsystem for item in app.state.store.all()}
+        ingest = IngestCollector(
+            {
+                name: (
+                    event_types.get(name, []),
+                    getattr(app.state.config.thresholds.stale_after_s, name),
+                )
+                for name in ingest_config.sources
+                if name in known
+            },
+            interval_s=ingest_config.publish_interval_s,
+            queue_max_batches=ingest_config.queue_max_batches,
+            queue_max_bytes=ingest_config.queue_max_bytes,
+            max_extra_event_types=app.state.config.jsonl.max_extra_event_types,
+        )
+    app.state.ingest_collector = ingest
+
+    if service.mode == "collector":
+        snapshot_writer = SnapshotWriter(
+            store, service.state_snapshot_path, service.snapshot_interval_s
+        )
+        collectors.append(snapshot_writer)
+        app.state.tasks.append(asyncio.create_task(snapshot_writer.run()))
+
     if not disable_collectors:
+        status_metrics = app.state.config.backend_aggregator.status_metrics
+        max_errors_per_min = app.state.config.thresholds.error_budget.max_poll_errors_per_min
         agg_collector = AggregatorHttpCollector(
             app.state.config.backend_aggregator.base_url,
             interval_s=app.state.config.polling.aggregator_s,
+            stale_after_s=app.state.config.thresholds.stale_after_s.aggregator,
+            max_errors_per_min=max_errors_per_min,
+            status_flattener=(
+                StatusFlattener(status_metrics.paths, max_series=status_metrics.max_series)
+                if status_metrics.enabled
+                else None
+            ),
         )
         app.state.aggregator_collector = agg_collector
+        collectors.append(agg_collector)
         app.state.tasks.append(asyncio.create_task(agg_collector.run(app.state.store)))
 
         system_collector = SystemControllerHttpCollector(
             app.state.config.system_controller.base_url,
             interval_s=app.state.config.polling.system_controller_s,
+            stale_after_s=app.state.config.thresholds.stale_after_s.system_controller,
+            max_errors_per_min=max_errors_per_min,
         )
         app.state.system_controller_collector = system_collector
+        collectors.append(system_collector)
         app.state.tasks.append(asyncio.create_task(system_collector.run(app.state.store)))
 
-        antsdr_collector = JsonlTailCollector(
-            subsystem="antsdr",
-            path=app.state.config.jsonl.antsdr_path,
-            event_types=["RF_CONTACT_NEW", "RF_CONTACT_UPDATE", "RF_CONTACT_LOST"],
-            interval_s=app.state.config.polling.antsdr_jsonl_s,
-            stale_after_s=app.state.config.thresholds.stale_after_s.antsdr,
-        )
-        app.state.antsdr_collector = antsdr_collector
-        app.state.tasks.append(asyncio.create_task(antsdr_collector.run(app.state.store)))
-
-        remoteid_collector = JsonlTailCollector(
-            subsystem="remoteid",
-            path=app.state.config.jsonl.remoteid_path,
-            event_types=[
-                "CONTACT_NEW",
-                "CONTACT_UPDATE",
-                "CONTACT_LOST",
-                "TELEMETRY_UPDATE",
-                "REPLAY_STATE",
-            ],
-            interval_s=app.state.config.polling.remoteid_jsonl_s,
-            stale_after_s=app.state.config.thresholds.stale_after_s.remoteid,
-        )
-        app.state.remoteid_collector = remoteid_collector
-        app.state.tasks.append(asyncio.create_task(remoteid_collector.run(app.state.store)))
+        for subsystem, path in (
+            ("antsdr", app.state.config.jsonl.antsdr_path),
+            ("remoteid", app.state.config.jsonl.remoteid_path),
+        ):
+            if ingest is not None and subsystem in ingest.sources:
+                continue
+            jsonl_collector = JsonlTailCollector(
+                subsystem=subsystem,
+                path=path,
+                event_types=event_types.get(subsystem, []),
+                interval_s=getattr(app.state.config.polling, f"{subsystem}_jsonl_s"),
+                stale_after_s=getattr(app.state.config.thresholds.stale_after_s, subsystem),
+                max_errors_per_min=max_errors_per_min,
+                max_extra_event_types=app.state.config.jsonl.max_extra_event_types,
+            )
+            setattr(app.state, f"{subsystem}_collector", jsonl_collector)
+            collectors.append(jsonl_collector)
+            app.state.tasks.append(asyncio.create_task(jsonl_collector.run(app.state.store)))
+
+        esp32_config = app.state.config.esp32
+        if esp32_config.enabled:
+            esp32_collector = Esp32UdpCollector(
+                host=esp32_config.bind_host,
+                port=esp32_config.port,
+                interval_s=app.state.config.polling.esp32_s,
+                stale_after_s=app.state.config.thresholds.stale_after_s.esp32,
+                loss_degraded_ratio=esp32_config.loss_degraded_ratio,
+            )
+            app.state.esp32_collector = esp32_collector
+            collectors.append(esp32_collector)
+            app.state.tasks.append(asyncio.create_task(esp32_collector.run(app.state.store)))
+
+        if ingest is not None:
+            collectors.append(ingest)
+            app.state.tasks.append(asyncio.create_task(ingest.run(app.state.store)))
     yield
-    if not disable_collectors:
-        agg_collector.stop()
-        system_collector.stop()
-        antsdr_collector.stop()
-        remoteid_collector.stop()
+    app.state.exposition.stop()
+    app.state.version_notifier.stop()
+    app.state.loop_lag_monitor.stop()
+    if history is not None:
+        history.stop()
+    if ws_hub is not None:
+        ws_hub.stop()
+    if broadcaster is not None:
+        broadcaster.stop()
+    for collector in collectors:
+        collector.stop()
     for task in app.state.tasks:
         task.cancel()
     await asyncio.gather(*app.state.tasks, return_exceptions=True)
+    journal.stop()
+    metrics_registry.unregister(state_collector)
+    metrics_registry.unregister(journal)
+    if watchdog is not None:
+        metrics_registry.unregister(watchdog)
+    if service.mode != "single":
+        multiprocess.mark_process_dead(os.getpid())
 
 
 app = FastAPI(title="N-Defender Observability", version=VERSION, lifespan=lifespan)
+app.add_middleware(RequestMetricsMiddleware)
 
 
-def _require_api_key(request: Request, config: AppConfig) -> None:
+def _require_api_key(request: HTTPConnection, config: AppConfig) -> None:
     if not config.auth.enabled:
         return
     key = request.headers.get("x-api-key") or request.query_params.get("api_key")
@@ -105,7 +345,7 @@ def _require_rate_limit(request: Request, config: AppConfig) -> None:
         return
     limiter: RateLimiter = request.app.state.rate_limiter
     key = get_client_key(request)
-    if not limiter.allow(key):
+    if not limiter.allow(key, route=request.url.path):
         raise HTTPException(status_code=429, detail="rate limit exceeded")
 
 
@@ -129,21 +369,101 @@ def health(request: Request) -> JSONResponse:
     return JSONResponse({"status": "ok"})
 
 
+def _deep_health_payload(snapshot: StateSnapshot) -> dict[str, Any]:
+    data = compute_deep_health(snapshot)
+    data["status"] = "ok"
+    return data
+
+
 @app.get("/api/v1/health/detail")
-def health_detail(request: Request) -> JSONResponse:
+def health_detail(request: Request) -> Response:
     _guarded(request)
-    store: ObservabilityState = app.state.store
-    data = compute_deep_health(store)
-    data["status"] = "ok"
-    return JSONResponse(data)
+    store: ObservabilityState = request.app.state.store
+    cache: VersionedJsonCache = request.app.state.health_detail_cache
+    return cached_json_response(request, cache.get(store.snapshot()))
+
+
+@app.get("/api/v1/health/transitions")
+def health_transitions(request: Request) -> JSONResponse:
+    _guarded(request)
+    journal: TransitionJournal = request.app.state.journal
+    subsystem = request.query_params.get("subsystem") or None
+    if subsystem is not None and subsystem not in journal.subsystems:
+        raise HTTPException(status_code=404, detail="unknown subsystem")
+    try:
+        since = int(request.query_params.get("since", "0"))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="invalid since") from exc
+    transitions = journal.query(subsystem, since)
+    return JSONResponse(
+        {
+            "generated_ts": int(time.time() * 1000),
+            "transitions": [item.to_dict() for item in transitions],
+        }
+    )
 
 
 @app.get("/api/v1/status")
-def status(request: Request) -> JSONResponse:
+async def status(request: Request) -> Response:
     _guarded(request)
-    store: ObservabilityState = app.state.store
-    data = compute_status_snapshot(store)
-    return JSONResponse(data)
+    store: ObservabilityState = request.app.state.store
+    wait_for_version = request.query_params.get("wait_for_version")
+    if wait_for_version is not None:
+        config: AppConfig = request.app.state.config
+        try:
+            version = int(wait_for_version)
+            timeout_s = float(request.query_params.get("timeout_s", "30"))
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=400, detail="invalid wait_for_version/timeout_s"
+            ) from exc
+        timeout_s = min(max(timeout_s, 0.0), config.long_poll.max_timeout_s)
+        notifier: VersionNotifier = request.app.state.version_notifier
+        LONG_POLL_WAITERS.inc()
+        try:
+            await notifier.wait(version, timeout_s)
+        except WaiterLimitError as exc:
+            LONG_POLL_REJECTED_TOTAL.inc()
+            raise HTTPException(status_code=503, detail="too many long-poll waiters") from exc
+        finally:
+            LONG_POLL_WAITERS.dec()
+    cache: VersionedJsonCache = request.app.state.status_cache
+    return cached_json_response(request, cache.get(store.snapshot()))
+
+
+@app.websocket("/ws")
+async def ws(websocket: WebSocket) -> None:
+    hub: WsHub | None = websocket.app.state.ws_hub
+    if hub is None:
+        await websocket.close(code=WS_1008_POLICY_VIOLATION, reason="ws disabled")
+        return
+    try:
+        _require_api_key(websocket, websocket.app.state.config)
+    except HTTPException:
+        await websocket.close(code=WS_1008_POLICY_VIOLATION, reason="unauthorized")
+        return
+    await hub.serve(websocket)
+
+
+@app.get("/api/v1/stream")
+def stream(request: Request) -> StreamingResponse:
+    _guarded(request)
+    broadcaster: EventBroadcaster | None = request.app.state.broadcaster
+    if broadcaster is None:
+        raise HTTPException(status_code=404, detail="stream disabled")
+    last_event_id = request.headers.get("last-event-id")
+    try:
+        subscriber = broadcaster.subscribe(last_event_id or None)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="invalid Last-Event-ID") from exc
+    except SubscriberLimitError as exc:
+        raise HTTPException(status_code=503, detail="too many stream subscribers") from exc
+    config: AppConfig = request.app.state.config
+    return StreamingResponse(
+        broadcaster.events(subscriber, keepalive_s=config.stream.keepalive_s),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/api/v1/version")
@@ -162,14 +482,76 @@ def config(request: Request) -> JSONResponse:
 @app.get("/metrics")
 def metrics(request: Request) -> Response:
     _guarded(request)
-    collector: PiStatsCollector = app.state.pi_collector
+    exposition: ExpositionCache = request.app.state.exposition
+    fmt, encoding = negotiate(request.headers.get("accept"), request.headers.get("accept-encoding"))
+    data = exposition.get(fmt, encoding)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=data, media_type=CONTENT_TYPES[fmt], headers=headers)
+
+
+@app.get("/api/v1/history")
+def history(request: Request) -> JSONResponse:
+    _guarded(request)
+    store: HistoryStore | None = request.app.state.history
+    if store is None:
+        raise HTTPException(status_code=404, detail="history disabled")
+    selectors = [item for item in request.query_params.get("series", "").split(",") if item]
+    if not selectors:
+        return JSONResponse({"available": store.series})
+    now_s = time.time()
     try:
-        collector.collect()
-    except Exception:
-        pass
-    update_subsystem_metrics(app.state.store)
-    data = render_metrics()
-    return Response(content=data, media_type="text/plain; version=0.0.4")
+        from_s = float(request.query_params.get("from", "-3600"))
+        step = request.query_params.get("step")
+        step_s = float(step) if step else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="invalid from/step") from exc
+    if step_s is not None and step_s <= 0:
+        raise HTTPException(status_code=400, detail="invalid from/step")
+    if from_s <= 0:
+        from_s = now_s + from_s
+    step_s, series = store.query(selectors, from_s, step_s, now_s=now_s)
+    return JSONResponse(
+        {
+            "from": from_s,
+            "to": now_s,
+            "step_s": step_s,
+            "series": [
+                {
+                    "series": key,
+                    "points": [[point.ts_s, point.avg, point.min, point.max] for point in points],
+                }
+                for key, points in series.items()
+            ],
+        }
+    )
+
+
+async def _read_capped_body(request: Request, max_bytes: int) -> bytes:
+    """Read the body, failing with 413 before more than `max_bytes` are buffered."""
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > max_bytes:
+        raise HTTPException(status_code=413, detail="batch too large")
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > max_bytes:
+            raise HTTPException(status_code=413, detail="batch too large")
+    return bytes(body)
+
+
+@app.post("/api/v1/ingest")
+async def ingest_batch(request: Request) -> JSONResponse:
+    _guarded(request)
+    collector: IngestCollector | None = request.app.state.ingest_collector
+    if collector is None:
+        raise HTTPException(status_code=404, detail="ingest disabled")
+    config: AppConfig = request.app.state.config
+    body = await _read_capped_body(request, config.ingest.max_batch_bytes)
+    if not collector.offer(body):
+        raise HTTPException(status_code=429, detail="ingest queue full")
+    return JSONResponse({"accepted": True, "lines": body.count(b"\n")}, status_code=202)
 
 
 @app.post("/api/v1/diag/bundle")
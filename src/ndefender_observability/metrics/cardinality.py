@@ -0,0 +1,53 @@
+"""Label cardinality guards for metrics labelled from untrusted input."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from .registry import LABEL_OVERFLOW_TOTAL
+
+OVERFLOW_LABEL = "other"
+MAX_LABEL_LENGTH = 64
+
+
+class LabelGuard:
+    """Bound the values one label may take.
+
+    Values in `allowed` always pass. Up to `max_extra` other values are
+    admitted first come, first served; anything after that, and any value
+    that is too long or not printable, maps to `overflow`. Rejections are
+    counted in `ndefender_observability_label_overflow_total{metric,reason}`.
+    """
+
+    def __init__(
+        self,
+        metric: str,
+        allowed: Iterable[str] = (),
+        max_extra: int = 16,
+        overflow: str = OVERFLOW_LABEL,
+    ) -> None:
+        self.metric = metric
+        self.allowed = frozenset(allowed)
+        self.max_extra = max_extra
+        self.overflow = overflow
+        self._extra: set[str] = set()
+        self._rejected = {
+            reason: LABEL_OVERFLOW_TOTAL.labels(metric=metric, reason=reason)
+            for reason in ("overflow", "invalid")
+        }
+
+    @property
+    def values(self) -> frozenset[str]:
+        return self.allowed | self._extra
+
+    def resolve(self, value: str) -> str:
+        if value in self.allowed or value in self._extra:
+            return value
+        if len(value) > MAX_LABEL_LENGTH or not value.isprintable():
+            self._rejected["invalid"].inc()
+            return self.overflow
+        if len(self._extra) >= self.max_extra:
+            self._rejected["overflow"].inc()
+            return self.overflow
+        self._extra.add(value)
+        return value
@@ -0,0 +1,139 @@
+"""Pre-rendered, cached Prometheus exposition."""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import threading
+import time
+from collections.abc import Callable
+
+from prometheus_client.openmetrics.exposition import (
+    CONTENT_TYPE_LATEST as OPENMETRICS_CONTENT_TYPE,
+)
+
+from ..state import ObservabilityState
+from .registry import (
+    METRICS_BYTES_SERVED_TOTAL,
+    METRICS_CACHE_AGE_SECONDS,
+    METRICS_RENDER_SECONDS,
+)
+
+FORMAT_TEXT = "text"
+FORMAT_OPENMETRICS = "openmetrics"
+CONTENT_TYPES = {
+    FORMAT_TEXT: "text/plain; version=0.0.4",
+    FORMAT_OPENMETRICS: OPENMETRICS_CONTENT_TYPE,
+}
+
+
+def negotiate(accept: str | None, accept_encoding: str | None) -> tuple[str, str]:
+    """Pick `(format, encoding)` from request `Accept` / `Accept-Encoding` headers."""
+    fmt = FORMAT_TEXT
+    if accept and "application/openmetrics-text" in accept:
+        fmt = FORMAT_OPENMETRICS
+    encoding = "identity"
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip().lower() != "gzip":
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        encoding = "gzip"
+    return fmt, encoding
+
+
+class ExpositionCache:
+    """Serve `/metrics` bytes from memory with a max-staleness guarantee.
+
+    A background task re-renders on a fixed cadence or when the state store
+    changes. Scrapes read the cached bytes; if they are older than
+    `max_staleness_s` the first scraper renders under a lock while
+    concurrent scrapers wait and reuse its result. Each render produces
+    every format requested so far; gzip variants are compressed lazily,
+    at most once per render.
+
+    Time-derived gauges (`*_age_seconds`) are evaluated at render time, so
+    a scrape may see them up to `max_staleness_s` behind wall time even
+    when the store has not changed.
+    """
+
+    def __init__(
+        self,
+        renderers: dict[str, Callable[[], bytes]],
+        *,
+        max_staleness_s: float = 10.0,
+        interval_s: float = 5.0,
+        min_interval_s: float = 2.0,
+    ) -> None:
+        self._renderers = renderers
+        self.max_staleness_s = max_staleness_s
+        self.interval_s = interval_s
+        self.min_interval_s = min_interval_s
+        self._lock = threading.Lock()
+        self._formats = {FORMAT_TEXT}
+        self._variants: dict[tuple[str, str], bytes] = {}
+        self._rendered_at: float | None = None
+        self._stop = asyncio.Event()
+
+    def age_s(self) -> float | None:
+        if self._rendered_at is None:
+            return None
+        return time.monotonic() - self._rendered_at
+
+    def get(self, fmt: str = FORMAT_TEXT, encoding: str = "identity") -> bytes:
+        variants = self._variants
+        age = self.age_s()
+        if age is None or age > self.max_staleness_s or (fmt, "identity") not in variants:
+            with self._lock:
+                # Another scraper may have rendered while we waited.
+                self._formats.add(fmt)
+                age = self.age_s()
+                variants = self._variants
+                if age is None or age > self.max_staleness_s or (fmt, "identity") not in variants:
+                    self._refresh_locked()
+                    age = 0.0
+                    variants = self._variants
+        data = variants.get((fmt, encoding))
+        if data is None:
+            with self._lock:
+                data = variants.get((fmt, encoding))
+                if data is None:
+                    data = gzip.compress(variants[(fmt, "identity")], compresslevel=6)
+                    variants[(fmt, encoding)] = data
+        METRICS_CACHE_AGE_SECONDS.set(age)
+        METRICS_BYTES_SERVED_TOTAL.labels(format=fmt, encoding=encoding).inc(len(data))
+        return data
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self) -> None:
+        start = time.perf_counter()
+        self._variants = {
+            (fmt, "identity"): self._renderers[fmt]() for fmt in sorted(self._formats)
+        }
+        self._rendered_at = time.monotonic()
+        METRICS_RENDER_SECONDS.observe(time.perf_counter() - start)
+
+    async def run(self, store: ObservabilityState) -> None:
+        rendered_version: int | None = None
+        while not self._stop.is_set():
+            age = self.age_s()
+            version = store.version
+            if age is None or age >= self.interval_s or version != rendered_version:
+                await asyncio.to_thread(self.refresh)
+                rendered_version = version
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.min_interval_s)
+            except TimeoutError:
+                pass
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -1 +1,147 @@
-"""Metric instrument definitions (reserved for future use)."""
+"""Self-instrumentation: request latency, event-loop lag and collector cycles."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from prometheus_client import Histogram
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .registry import REGISTRY, Gauge
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "ndefender_observability_http_request_seconds",
+    "HTTP request latency by route template",
+    ["route", "method", "status"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    registry=REGISTRY,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "ndefender_observability_http_requests_in_flight",
+    "HTTP requests currently being served",
+    ["route"],
+    registry=REGISTRY,
+    multiprocess_mode="livesum",
+)
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "ndefender_observability_event_loop_lag_seconds",
+    "Delay between scheduled and actual event-loop wakeups",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+    registry=REGISTRY,
+)
+EVENT_LOOP_LAG_LAST_SECONDS = Gauge(
+    "ndefender_observability_event_loop_lag_last_seconds",
+    "Most recent event-loop wakeup delay",
+    registry=REGISTRY,
+)
+COLLECTOR_CYCLE_SECONDS = Histogram(
+    "ndefender_observability_collector_cycle_seconds",
+    "Wall time of one collector cycle",
+    ["collector"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    registry=REGISTRY,
+)
+COLLECTOR_CYCLE_CPU_SECONDS = Histogram(
+    "ndefender_observability_collector_cycle_cpu_seconds",
+    "Thread CPU time of one collector cycle",
+    ["collector"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+    registry=REGISTRY,
+)
+
+# Requests that match no route share one label value so paths cannot mint series.
+UNMATCHED_ROUTE = "other"
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware timing HTTP requests per route template.
+
+    The route is resolved against the app's routes before the request runs,
+    so `/api/v1/status` and `/api/v1/status?x=1` share a series and unknown
+    paths collapse into `other`.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route = _route_template(scope)
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(route=route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            HTTP_REQUEST_SECONDS.labels(
+                route=route, method=scope["method"], status=str(status)
+            ).observe(time.perf_counter() - start)
+
+
+def _route_template(scope: Scope) -> str:
+    app: Any = scope.get("app")
+    router = getattr(app, "router", None)
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes a task that sleeps `interval_s`."""
+
+    def __init__(self, interval_s: float = 0.5) -> None:
+        self.interval_s = interval_s
+        self._stop = asyncio.Event()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._stop.is_set():
+            expected = loop.time() + self.interval_s
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval_s)
+            except TimeoutError:
+                pass
+            lag = max(0.0, loop.time() - expected)
+            EVENT_LOOP_LAG_SECONDS.observe(lag)
+            EVENT_LOOP_LAG_LAST_SECONDS.set(lag)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+@contextmanager
+def timed_cycle(collector: str) -> Iterator[None]:
+    """Record wall and CPU time of one collector cycle.
+
+    CPU time is `time.thread_time()` of the calling thread. For async
+    cycles that await I/O it also includes any other coroutine that ran on
+    the loop in between, so it is an upper bound there; for cycles run in a
+    worker thread it is exact.
+    """
+    start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        COLLECTOR_CYCLE_CPU_SECONDS.labels(collector=collector).observe(
+            time.thread_time() - cpu_start
+        )
+        COLLECTOR_CYCLE_SECONDS.labels(collector=collector).observe(time.perf_counter() - start)
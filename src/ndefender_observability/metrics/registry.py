@@ -2,7 +2,15 @@
 
 from __future__ import annotations
 
-from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from collections.abc import Iterable
+from typing import Any
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import Gauge as _Gauge
+from prometheus_client.core import GaugeMetricFamily, Metric
+from prometheus_client.multiprocess import MultiProcessCollector
+from prometheus_client.openmetrics.exposition import generate_latest as generate_openmetrics
+from prometheus_client.registry import Collector
 
 from ..health.model import HealthState
 from ..state import ObservabilityState
@@ -10,6 +18,18 @@ from ..utils.time import now_ms
 
 REGISTRY = CollectorRegistry()
 
+
+class Gauge(_Gauge):
+    """Gauge aggregated as `mostrecent` across processes in multiprocess mode.
+
+    Outside multiprocess mode the mode has no effect. Gauges that are
+    incremented rather than set must pass another mode (e.g. `livesum`).
+    """
+
+    def __init__(self, *args: Any, multiprocess_mode: Any = "mostrecent", **kwargs: Any) -> None:
+        super().__init__(*args, multiprocess_mode=multiprocess_mode, **kwargs)
+
+
 OBSERVABILITY_UP = Gauge(
     "ndefender_observability_up",
     "Observability service up",
@@ -35,34 +55,150 @@ POLL_LATENCY_SECONDS = Histogram(
     buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
     registry=REGISTRY,
 )
+POLL_CACHE_HITS_TOTAL = Counter(
+    "ndefender_observability_poll_cache_hits_total",
+    "Polls that reused the cached payload (304 or unchanged body)",
+    ["subsystem", "endpoint", "reason"],
+    registry=REGISTRY,
+)
+POLL_CACHE_MISSES_TOTAL = Counter(
+    "ndefender_observability_poll_cache_misses_total",
+    "Polls that decoded a new payload",
+    ["subsystem", "endpoint"],
+    registry=REGISTRY,
+)
+METRICS_RENDER_SECONDS = Histogram(
+    "ndefender_observability_metrics_render_seconds",
+    "Time to render the /metrics exposition",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+    registry=REGISTRY,
+)
+METRICS_CACHE_AGE_SECONDS = Gauge(
+    "ndefender_observability_metrics_cache_age_seconds",
+    "Age of the cached exposition served to the previous scrape",
+    registry=REGISTRY,
+)
+METRICS_BYTES_SERVED_TOTAL = Counter(
+    "ndefender_observability_metrics_bytes_served_total",
+    "Bytes of /metrics exposition served",
+    ["format", "encoding"],
+    registry=REGISTRY,
+)
 
-SUBSYSTEM_UP = Gauge(
-    "ndefender_subsystem_up",
-    "Subsystem up",
+LONG_POLL_WAITERS = Gauge(
+    "ndefender_observability_long_poll_waiters",
+    "Status requests parked waiting for a state change",
+    registry=REGISTRY,
+    multiprocess_mode="livesum",
+)
+LONG_POLL_REJECTED_TOTAL = Counter(
+    "ndefender_observability_long_poll_rejected_total",
+    "Long-poll requests rejected because the waiter cap was reached",
+    registry=REGISTRY,
+)
+WS_CLIENTS = Gauge(
+    "ndefender_observability_ws_clients",
+    "Connected /ws clients",
+    registry=REGISTRY,
+    multiprocess_mode="livesum",
+)
+WS_FRAMES_SENT_TOTAL = Counter(
+    "ndefender_observability_ws_frames_sent_total",
+    "Frames pushed to /ws clients",
+    ["type"],
+    registry=REGISTRY,
+)
+WS_FRAMES_DROPPED_TOTAL = Counter(
+    "ndefender_observability_ws_frames_dropped_total",
+    "Queued /ws deltas discarded for slow clients (replaced by a snapshot)",
+    registry=REGISTRY,
+)
+WS_REJECTED_TOTAL = Counter(
+    "ndefender_observability_ws_rejected_total",
+    "/ws connections closed because the client cap was reached",
+    registry=REGISTRY,
+)
+STREAM_SUBSCRIBERS = Gauge(
+    "ndefender_observability_stream_subscribers",
+    "Connected /api/v1/stream subscribers",
+    registry=REGISTRY,
+    multiprocess_mode="livesum",
+)
+STREAM_EVENTS_TOTAL = Counter(
+    "ndefender_observability_stream_events_total",
+    "Events published to /api/v1/stream",
+    ["type"],
+    registry=REGISTRY,
+)
+STREAM_SLOW_DISCONNECTS_TOTAL = Counter(
+    "ndefender_observability_stream_slow_disconnects_total",
+    "Stream subscribers disconnected for falling behind",
+    registry=REGISTRY,
+)
+STREAM_REJECTED_TOTAL = Counter(
+    "ndefender_observability_stream_rejected_total",
+    "Stream subscriptions rejected because the subscriber cap was reached",
+    registry=REGISTRY,
+)
+RATE_LIMIT_REJECTED_TOTAL = Counter(
+    "ndefender_observability_rate_limit_rejected_total",
+    "Requests rejected with 429, by rate limit budget",
+    ["budget"],
+    registry=REGISTRY,
+)
+RATE_LIMIT_KEYS = Gauge(
+    "ndefender_observability_rate_limit_keys",
+    "Client buckets held by the rate limiter",
+    registry=REGISTRY,
+    multiprocess_mode="livesum",
+)
+HISTORY_SERIES = Gauge(
+    "ndefender_observability_history_series",
+    "Series held in the in-process history store",
+    registry=REGISTRY,
+)
+HISTORY_DROPPED_SAMPLES_TOTAL = Counter(
+    "ndefender_observability_history_dropped_samples_total",
+    "History samples dropped because the series cap was reached",
+    registry=REGISTRY,
+)
+HISTORY_DISK_BYTES = Gauge(
+    "ndefender_observability_history_disk_bytes",
+    "Bytes allocated to on-disk history segments",
+    registry=REGISTRY,
+)
+HISTORY_DISK_FLUSHES_TOTAL = Counter(
+    "ndefender_observability_history_disk_flushes_total",
+    "Batched writes of buffered history samples to disk",
+    registry=REGISTRY,
+)
+SUBSYSTEM_ERROR_BUDGET_REMAINING = Gauge(
+    "ndefender_subsystem_error_budget_remaining",
+    "Poll errors left in the sliding 60s error budget",
     ["subsystem"],
     registry=REGISTRY,
 )
-SUBSYSTEM_LAST_UPDATE_AGE_SECONDS = Gauge(
-    "ndefender_subsystem_last_update_age_seconds",
-    "Subsystem last update age in seconds",
+SUBSYSTEM_ERROR_BUDGET_BURN_RATE = Gauge(
+    "ndefender_subsystem_error_budget_burn_rate",
+    "Errors in the sliding 60s window divided by the budget (1 = fully spent)",
     ["subsystem"],
     registry=REGISTRY,
 )
-SUBSYSTEM_STATE = Gauge(
-    "ndefender_subsystem_state",
-    "Subsystem health state",
-    ["subsystem", "state"],
+SUBSYSTEM_SUPPRESSED_TRANSITIONS_TOTAL = Counter(
+    "ndefender_subsystem_suppressed_transitions_total",
+    "Observed state changes held back by hysteresis or flap damping",
+    ["subsystem"],
     registry=REGISTRY,
 )
-SUBSYSTEM_LAST_SUCCESS_TS = Gauge(
-    "ndefender_subsystem_last_success_ts",
-    "Subsystem last success unix timestamp",
+SUBSYSTEM_FLAPPING = Gauge(
+    "ndefender_subsystem_flapping",
+    "1 while a subsystem is pinned to DEGRADED for flapping",
     ["subsystem"],
     registry=REGISTRY,
 )
-SUBSYSTEM_LAST_ERROR_TS = Gauge(
-    "ndefender_subsystem_last_error_ts",
-    "Subsystem last error unix timestamp",
+WATCHDOG_DEMOTIONS_TOTAL = Counter(
+    "ndefender_watchdog_demotions_total",
+    "Subsystems demoted by the staleness watchdog for a stalled collector",
     ["subsystem"],
     registry=REGISTRY,
 )
@@ -73,9 +209,15 @@ COLLECTOR_EXCEPTIONS_TOTAL = Counter(
     registry=REGISTRY,
 )
 
-AGGREGATOR_UP = Gauge(
-    "ndefender_aggregator_up",
-    "Backend aggregator up",
+AGGREGATOR_STATUS_VALUE = Gauge(
+    "ndefender_aggregator_status_value",
+    "Numeric value from the aggregator /status payload",
+    ["path"],
+    registry=REGISTRY,
+)
+AGGREGATOR_STATUS_DROPPED_PATHS = Gauge(
+    "ndefender_aggregator_status_dropped_paths",
+    "Matching status paths not exported due to the series cap",
     registry=REGISTRY,
 )
 
@@ -91,6 +233,12 @@ EVENTS_RATE_60S = Gauge(
     ["subsystem", "type"],
     registry=REGISTRY,
 )
+LABEL_OVERFLOW_TOTAL = Counter(
+    "ndefender_observability_label_overflow_total",
+    "Label values folded into the overflow bucket by a cardinality guard",
+    ["metric", "reason"],
+    registry=REGISTRY,
+)
 JSONL_TAIL_LAG_SECONDS = Gauge(
     "ndefender_jsonl_tail_lag_seconds",
     "JSONL tail lag seconds",
@@ -116,6 +264,73 @@ JSONL_BYTES_DELTA_5M = Gauge(
     registry=REGISTRY,
 )
 
+INGEST_BATCHES_TOTAL = Counter(
+    "ndefender_ingest_batches_total",
+    "Pushed NDJSON batches by result",
+    ["result"],
+    registry=REGISTRY,
+)
+INGEST_REJECTED_LINES_TOTAL = Counter(
+    "ndefender_ingest_rejected_lines_total",
+    "Pushed lines dropped during processing",
+    ["reason"],
+    registry=REGISTRY,
+)
+INGEST_QUEUE_DEPTH = Gauge(
+    "ndefender_ingest_queue_depth",
+    "Pushed batches waiting to be processed",
+    registry=REGISTRY,
+)
+INGEST_QUEUE_BYTES = Gauge(
+    "ndefender_ingest_queue_bytes",
+    "Bytes of pushed batches waiting to be processed",
+    registry=REGISTRY,
+)
+INGEST_SEQ_LOST_TOTAL = Counter(
+    "ndefender_ingest_seq_lost_total",
+    "Pushed lines missing according to per-source sequence numbers",
+    ["subsystem"],
+    registry=REGISTRY,
+)
+INGEST_HEARTBEATS_TOTAL = Counter(
+    "ndefender_ingest_heartbeats_total",
+    "Pushed health heartbeats",
+    ["subsystem"],
+    registry=REGISTRY,
+)
+
+ESP32_PACKETS_TOTAL = Counter(
+    "ndefender_esp32_packets_total",
+    "ESP32 datagrams received",
+    ["format"],
+    registry=REGISTRY,
+)
+ESP32_MALFORMED_TOTAL = Counter(
+    "ndefender_esp32_malformed_total",
+    "ESP32 datagrams that could not be parsed",
+    registry=REGISTRY,
+)
+ESP32_PACKETS_LOST_TOTAL = Counter(
+    "ndefender_esp32_packets_lost_total",
+    "ESP32 datagrams missing according to sequence numbers",
+    registry=REGISTRY,
+)
+ESP32_JITTER_SECONDS = Gauge(
+    "ndefender_esp32_jitter_seconds",
+    "ESP32 interarrival jitter estimate (RFC 3550)",
+    registry=REGISTRY,
+)
+ESP32_RSSI_DBM = Gauge(
+    "ndefender_esp32_rssi_dbm",
+    "ESP32 reported RSSI",
+    registry=REGISTRY,
+)
+ESP32_VBAT_V = Gauge(
+    "ndefender_esp32_vbat_v",
+    "ESP32 reported supply voltage",
+    registry=REGISTRY,
+)
+
 PI_CPU_TEMP_C = Gauge(
     "ndefender_pi_cpu_temp_c",
     "Raspberry Pi CPU temperature in C",
@@ -160,6 +375,13 @@ PI_LOAD15 = Gauge(
     registry=REGISTRY,
 )
 
+PI_SAMPLE_AGE_SECONDS = Gauge(
+    "ndefender_pi_sample_age_seconds",
+    "Age of the latest Pi stats sample per source (-1 if never sampled)",
+    ["source"],
+    registry=REGISTRY,
+)
+
 UPS_PACK_VOLTAGE_V = Gauge(
     "ndefender_ups_pack_voltage_v",
     "UPS pack voltage",
@@ -214,25 +436,77 @@ def init_metrics(version: str, git_sha: str) -> None:
     BUILD_INFO.labels(version=version, git_sha=git_sha).set(1)
 
 
-def update_subsystem_metrics(store: ObservabilityState) -> None:
-    now = now_ms()
-    for item in store.all():
-        is_up = 1 if item.state != HealthState.OFFLINE else 0
-        SUBSYSTEM_UP.labels(subsystem=item.subsystem).set(is_up)
-        age_ms = item.age_ms(now)
-        age_seconds = age_ms / 1000 if age_ms is not None else -1
-        SUBSYSTEM_LAST_UPDATE_AGE_SECONDS.labels(subsystem=item.subsystem).set(age_seconds)
-        for state in HealthState:
-            SUBSYSTEM_STATE.labels(subsystem=item.subsystem, state=state.value).set(
-                1 if item.state == state else 0
-            )
-        if item.subsystem == "aggregator":
-            AGGREGATOR_UP.set(is_up)
-        if item.updated_ts is not None:
-            SUBSYSTEM_LAST_SUCCESS_TS.labels(subsystem=item.subsystem).set(item.updated_ts / 1000)
-        if item.last_error:
-            SUBSYSTEM_LAST_ERROR_TS.labels(subsystem=item.subsystem).set(now / 1000)
-
-
-def render_metrics() -> bytes:
-    return generate_latest(REGISTRY)
+class SubsystemStateCollector(Collector):
+    """Build subsystem health families from the state store at scrape time.
+
+    Every series comes from one `store.snapshot()`, so nothing is
+    mutated between scrapes and the families always agree with each other.
+    """
+
+    def __init__(self, store: ObservabilityState) -> None:
+        self.store = store
+
+    def describe(self) -> Iterable[Metric]:
+        return self._families()
+
+    def collect(self) -> Iterable[Metric]:
+        families = self._families()
+        up, age, state, last_success, last_error, aggregator_up = families
+        now = now_ms()
+        for item in self.store.snapshot().all():
+            labels = [item.subsystem]
+            is_up = 1 if item.state != HealthState.OFFLINE else 0
+            up.add_metric(labels, is_up)
+            age_ms = item.age_ms(now)
+            age.add_metric(labels, age_ms / 1000 if age_ms is not None else -1)
+            for value in HealthState:
+                state.add_metric([item.subsystem, value.value], 1 if item.state == value else 0)
+            if item.updated_ts is not None:
+                last_success.add_metric(labels, item.updated_ts / 1000)
+            if item.last_error_ts is not None:
+                last_error.add_metric(labels, item.last_error_ts / 1000)
+            if item.subsystem == "aggregator":
+                aggregator_up.add_metric([], is_up)
+        return families
+
+    @staticmethod
+    def _families() -> list[GaugeMetricFamily]:
+        return [
+            GaugeMetricFamily("ndefender_subsystem_up", "Subsystem up", labels=["subsystem"]),
+            GaugeMetricFamily(
+                "ndefender_subsystem_last_update_age_seconds",
+                "Subsystem last update age in seconds",
+                labels=["subsystem"],
+            ),
+            GaugeMetricFamily(
+                "ndefender_subsystem_state",
+                "Subsystem health state",
+                labels=["subsystem", "state"],
+            ),
+            GaugeMetricFamily(
+                "ndefender_subsystem_last_success_ts",
+                "Subsystem last success unix timestamp",
+                labels=["subsystem"],
+            ),
+            GaugeMetricFamily(
+                "ndefender_subsystem_last_error_ts",
+                "Subsystem last error unix timestamp",
+                labels=["subsystem"],
+            ),
+            GaugeMetricFamily("ndefender_aggregator_up", "Backend aggregator up"),
+        ]
+
+
+def multiprocess_registry() -> CollectorRegistry:
+    """Registry merging the metric files of every process in `PROMETHEUS_MULTIPROC_DIR`."""
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    return registry
+
+
+def render_metrics(registry: CollectorRegistry = REGISTRY) -> bytes:
+    return generate_latest(registry)
+
+
+def render_openmetrics(registry: CollectorRegistry = REGISTRY) -> bytes:
+    return generate_openmetrics(registry)
@@ -0,0 +1,128 @@
+"""State snapshot file shared between the collector process and API workers."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+from dataclasses import asdict
+from types import MappingProxyType
+from typing import Any
+
+from .health.model import HealthState
+from .state import ObservabilityState, StateSnapshot, SubsystemState
+from .utils.time import now_ms
+
+SNAPSHOT_SCHEMA = 1
+
+
+def write_snapshot(store: ObservabilityState, path: str) -> None:
+    """Atomically replace `path` with the current store contents."""
+    snapshot = store.snapshot()
+    payload = {
+        "schema": SNAPSHOT_SCHEMA,
+        "version": snapshot.version,
+        "generated_ts": now_ms(),
+        "pid": os.getpid(),
+        "subsystems": [asdict(item) for item in snapshot.all()],
+    }
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, default=str, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+class SnapshotWriter:
+    """Publish the collector process's state for API workers (`service.mode: collector`)."""
+
+    def __init__(self, store: ObservabilityState, path: str, interval_s: float = 1.0) -> None:
+        self.store = store
+        self.path = path
+        self.interval_s = interval_s
+        self._stop = asyncio.Event()
+
+    async def run(self) -> None:
+        written: int | None = None
+        while not self._stop.is_set():
+            version = self.store.version
+            if version != written:
+                await asyncio.to_thread(write_snapshot, self.store, self.path)
+                written = version
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval_s)
+            except TimeoutError:
+                pass
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+class SnapshotState:
+    """Read-only state store backed by the collector's snapshot file (`service.mode: api`).
+
+    The file is re-read only when its inode, size or mtime changes, so
+    readers pay one `stat` per access. Until a snapshot exists every
+    subsystem reports OFFLINE.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature: tuple[int, int, int] | None = None
+        self._snapshot = StateSnapshot(0, MappingProxyType(_placeholder_states()))
+
+    def snapshot(self) -> StateSnapshot:
+        self._refresh()
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self.snapshot().version
+
+    def get(self, subsystem: str) -> SubsystemState:
+        return self.snapshot().subsystems[subsystem]
+
+    def all(self) -> list[SubsystemState]:
+        return self.snapshot().all()
+
+    def update(self, subsystem: str, **_: Any) -> None:
+        raise RuntimeError("SnapshotState is read-only; updates belong to the collector process")
+
+    def _refresh(self) -> None:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            try:
+                with open(self.path, encoding="utf-8") as handle:
+                    payload = json.load(handle)
+            except (OSError, ValueError):
+                return
+            if payload.get("schema") != SNAPSHOT_SCHEMA:
+                return
+            states = dict(self._snapshot.subsystems)
+            for item in payload.get("subsystems", []):
+                item["state"] = HealthState(item["state"])
+                states[item["subsystem"]] = SubsystemState(**item)
+            self._snapshot = StateSnapshot(int(payload.get("version", 0)), MappingProxyType(states))
+            self._signature = signature
+
+
+def _placeholder_states() -> dict[str, SubsystemState]:
+    return {
+        item.subsystem: SubsystemState(
+            subsystem=item.subsystem,
+            state=HealthState.OFFLINE,
+            reasons=["no collector snapshot yet"],
+        )
+        for item in ObservabilityState().all()
+    }
@@ -2,14 +2,27 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Any
+import asyncio
+import threading
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any
 
 from .health.model import HealthState
+from .utils.time import now_ms
 
+if TYPE_CHECKING:
+    from .health.evaluator import HealthEvaluator
 
-@dataclass
+
+@dataclass(frozen=True)
 class SubsystemState:
+    """Immutable record of one subsystem; `version` bumps whenever it is replaced.
+
+    `reasons` and `evidence` are shared with readers and must not be mutated.
+    """
+
     subsystem: str
     state: HealthState = HealthState.OFFLINE
     updated_ts: int | None = None
@@ -17,6 +30,7 @@ class SubsystemState:
     last_error_ts: int | None = None
     reasons: list[str] = field(default_factory=list)
     evidence: dict[str, Any] = field(default_factory=dict)
+    version: int = 0
 
     def age_ms(self, now_ms: int) -> int | None:
         if self.updated_ts is None:
@@ -24,21 +38,71 @@ class SubsystemState:
         return max(0, now_ms - self.updated_ts)
 
 
+@dataclass(frozen=True)
+class StateSnapshot:
+    """Consistent view of every subsystem at one global `version`."""
+
+    version: int
+    subsystems: Mapping[str, SubsystemState]
+
+    def all(self) -> list[SubsystemState]:
+        return list(self.subsystems.values())
+
+
 class ObservabilityState:
-    def __init__(self) -> None:
-        self._states: dict[str, SubsystemState] = {}
-        for name in ("aggregator", "system_controller", "antsdr", "remoteid", "esp32"):
-            self._states[name] = SubsystemState(
-                subsystem=name,
-                state=HealthState.OFFLINE,
-                reasons=["no data yet"],
-            )
+    """Copy-on-write store of `SubsystemState` records.
+
+    `update` builds a new record and publishes a new `StateSnapshot` by
+    swapping one reference, so readers on other threads always see a
+    complete record and `snapshot()` is O(1). Updates that change nothing
+    keep both the record and the versions. Listeners are called with
+    `(old, new)` snapshots after each effective update, on the updating
+    thread; they must be cheap and must not raise.
+
+    With an `evaluator`, every observed `state` passes through it before
+    it is published (see `HealthEvaluator`).
+
+    Collector liveness (`mark_cycle`) is kept outside the records so a
+    completed cycle does not publish a new version.
+    """
+
+    def __init__(self, evaluator: HealthEvaluator | None = None) -> None:
+        self.evaluator = evaluator
+        self._lock = threading.Lock()
+        self._listeners: list[Callable[[StateSnapshot, StateSnapshot], None]] = []
+        self._cycles: dict[str, int] = {}
+        states = {
+            name: SubsystemState(subsystem=name, state=HealthState.OFFLINE, reasons=["no data yet"])
+            for name in ("aggregator", "system_controller", "antsdr", "remoteid", "esp32")
+        }
+        self._snapshot = StateSnapshot(0, MappingProxyType(states))
+
+    def snapshot(self) -> StateSnapshot:
+        return self._snapshot
 
     def get(self, subsystem: str) -> SubsystemState:
-        return self._states[subsystem]
+        return self._snapshot.subsystems[subsystem]
 
     def all(self) -> list[SubsystemState]:
-        return list(self._states.values())
+        return self._snapshot.all()
+
+    @property
+    def version(self) -> int:
+        """Incremented on every effective update; lets readers skip unchanged state."""
+        return self._snapshot.version
+
+    def add_listener(self, listener: Callable[[StateSnapshot, StateSnapshot], None]) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[StateSnapshot, StateSnapshot], None]) -> None:
+        self._listeners.remove(listener)
+
+    def mark_cycle(self, subsystem: str, ts_ms: int | None = None) -> None:
+        """Record that the collector for `subsystem` completed a cycle."""
+        self._cycles[subsystem] = now_ms() if ts_ms is None else ts_ms
+
+    def last_cycle(self, subsystem: str) -> int | None:
+        return self._cycles.get(subsystem)
 
     def update(
         self,
@@ -50,17 +114,125 @@ class ObservabilityState:
         last_error_ts: int | None = None,
         reasons: list[str] | None = None,
         evidence: dict[str, Any] | None = None,
-    ) -> None:
-        current = self._states[subsystem]
-        if state is not None:
-            current.state = state
-        if updated_ts is not None:
-            current.updated_ts = updated_ts
-        if last_error is not None:
-            current.last_error = last_error
-        if last_error_ts is not None:
-            current.last_error_ts = last_error_ts
-        if reasons is not None:
-            current.reasons = reasons
-        if evidence is not None:
-            current.evidence = evidence
+        evaluate: bool = True,
+    ) -> bool:
+        """Apply the non-None fields; return False when nothing changed.
+
+        `evaluate=False` publishes `state` without consulting the evaluator.
+        """
+        with self._lock:
+            current = self._snapshot
+            record = current.subsystems[subsystem]
+            if self.evaluator is not None and state is not None and evaluate:
+                state, reasons = self.evaluator.apply(subsystem, record.state, state, reasons)
+            changes: dict[str, Any] = {
+                key: value
+                for key, value in (
+                    ("state", state),
+                    ("updated_ts", updated_ts),
+                    ("last_error", last_error),
+                    ("last_error_ts", last_error_ts),
+                    ("reasons", reasons),
+                    ("evidence", evidence),
+                )
+                if value is not None
+            }
+            if all(getattr(record, key) == value for key, value in changes.items()):
+                return False
+            version = current.version + 1
+            states = dict(current.subsystems)
+            states[subsystem] = replace(record, **changes, version=version)
+            new = StateSnapshot(version, MappingProxyType(states))
+            self._snapshot = new
+        for listener in self._listeners:
+            listener(current, new)
+        return True
+
+
+class WaiterLimitError(RuntimeError):
+    pass
+
+
+class VersionNotifier:
+    """Let coroutines park until the store version moves past a known value.
+
+    All waiters of one generation share a single future, resolved on the
+    next change, so a parked request costs little more than its coroutine.
+    Stores with listeners notify directly; others (`SnapshotState`) are
+    polled by `run()`.
+    """
+
+    def __init__(self, store: ObservabilityState, max_waiters: int = 256) -> None:
+        self.store = store
+        self.max_waiters = max_waiters
+        self.waiters = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._future: asyncio.Future[None] | None = None
+        self._stop = asyncio.Event()
+        if hasattr(store, "add_listener"):
+            store.add_listener(self._on_change)
+
+    async def wait(self, version: int, timeout_s: float) -> bool:
+        """Return True once `store.version != version`, False on timeout.
+
+        A `version` ahead of the store (e.g. after a collector restart) is
+        treated as changed so clients resynchronise immediately.
+        """
+        if self.store.version != version:
+            return True
+        if self.waiters >= self.max_waiters:
+            raise WaiterLimitError("too many parked waiters")
+        self._loop = asyncio.get_running_loop()
+        future = self._future
+        if future is None or future.done():
+            future = self._loop.create_future()
+            self._future = future
+        # Re-check: an update may have landed before the future existed.
+        if self.store.version != version:
+            return True
+        self.waiters += 1
+        try:
+            async with asyncio.timeout(timeout_s):
+                await asyncio.shield(future)
+        except TimeoutError:
+            return self.store.version != version
+        finally:
+            self.waiters -= 1
+        return True
+
+    async def run(self, poll_interval_s: float = 0.25) -> None:
+        seen = self.store.version
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=poll_interval_s)
+            except TimeoutError:
+                pass
+            version = self.store.version
+            if version != seen:
+                seen = version
+                self._wake()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if hasattr(self.store, "remove_listener"):
+            self.store.remove_listener(self._on_change)
+        self._wake()
+
+    def _on_change(self, old: StateSnapshot, new: StateSnapshot) -> None:
+        loop = self._loop
+        if loop is None or self._future is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._wake()
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self) -> None:
+        future = self._future
+        self._future = None
+        if future is not None and not future.done():
+            future.set_result(None)
@@ -0,0 +1,227 @@
+"""Server-Sent Events broadcaster for health transitions and event-rate ticks."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import secrets
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Any
+
+from prometheus_client import CollectorRegistry
+
+from .metrics.registry import (
+    REGISTRY,
+    STREAM_EVENTS_TOTAL,
+    STREAM_REJECTED_TOTAL,
+    STREAM_SLOW_DISCONNECTS_TOTAL,
+    STREAM_SUBSCRIBERS,
+)
+from .state import ObservabilityState, StateSnapshot
+from .utils.time import now_ms
+
+# Ask EventSource clients to reconnect after 3s.
+RETRY_FIELD = b"retry: 3000\n\n"
+KEEPALIVE = b": keepalive\n\n"
+RATE_FAMILY = "ndefender_events_rate_60s"
+
+
+class SubscriberLimitError(RuntimeError):
+    pass
+
+
+class Subscriber:
+    """Per-client queue; live events beyond `queue_size` pending frames close it."""
+
+    def __init__(self, queue_size: int) -> None:
+        # `None` closes the stream; the client resumes from the ring via Last-Event-ID.
+        self.queue: asyncio.Queue[bytes | None] = asyncio.Queue()
+        self.queue_size = queue_size
+
+    def offer(self, frame: bytes) -> bool:
+        if self.queue.qsize() >= self.queue_size:
+            self.queue.put_nowait(None)
+            return False
+        self.queue.put_nowait(frame)
+        return True
+
+
+class EventBroadcaster:
+    """Fan SSE events out to every subscriber, encoding each event once.
+
+    Event ids are `<epoch>-<n>`: a random per-broadcaster epoch and an
+    increasing counter. The last `replay_size` encoded events are kept, so a
+    client reconnecting with `Last-Event-ID` gets what it missed. When the id
+    is no longer in the ring or carries another epoch (a restarted process or
+    another API worker), a `resync` event tells it to refetch `/api/v1/status`.
+
+    Transitions come from a store listener; stores without listeners
+    (`SnapshotState`) are polled. Subscribers that fall `queue_size` frames
+    behind are disconnected and resume from the ring.
+    """
+
+    def __init__(
+        self,
+        store: ObservabilityState,
+        replay_size: int = 512,
+        rate_tick_interval_s: float = 5.0,
+        max_subscribers: int = 64,
+        queue_size: int = 128,
+        registry: CollectorRegistry = REGISTRY,
+        epoch: str | None = None,
+    ) -> None:
+        self.store = store
+        self.epoch = epoch or secrets.token_hex(4)
+        self.rate_tick_interval_s = rate_tick_interval_s
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._rates = registry.restricted_registry([RATE_FAMILY])
+        self._ring: deque[tuple[int, bytes]] = deque(maxlen=replay_size)
+        self._next_id = 1
+        self._subscribers: set[Subscriber] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._last_snapshot = store.snapshot()
+        self._stop = asyncio.Event()
+        self._listening = hasattr(store, "add_listener")
+        if self._listening:
+            store.add_listener(self._on_change)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def last_id(self) -> str:
+        return f"{self.epoch}-{self._next_id - 1}"
+
+    def publish(self, event: str, data: dict[str, Any]) -> str:
+        seq = self._next_id
+        self._next_id += 1
+        event_id = f"{self.epoch}-{seq}"
+        payload = json.dumps(data, default=str, separators=(",", ":"))
+        frame = f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode()
+        self._ring.append((seq, frame))
+        STREAM_EVENTS_TOTAL.labels(type=event).inc()
+        for subscriber in list(self._subscribers):
+            if not subscriber.offer(frame):
+                STREAM_SLOW_DISCONNECTS_TOTAL.inc()
+                self.unsubscribe(subscriber)
+        return event_id
+
+    def subscribe(self, last_event_id: str | None = None) -> Subscriber:
+        """Add a subscriber; a malformed `last_event_id` raises `ValueError`."""
+        replay = self.replay(last_event_id) if last_event_id is not None else []
+        if len(self._subscribers) >= self.max_subscribers:
+            STREAM_REJECTED_TOTAL.inc()
+            raise SubscriberLimitError("too many stream subscribers")
+        subscriber = Subscriber(self.queue_size)
+        subscriber.queue.put_nowait(RETRY_FIELD)
+        # Replay is bounded by the ring, not by the live queue limit.
+        for frame in replay:
+            subscriber.queue.put_nowait(frame)
+        self._subscribers.add(subscriber)
+        STREAM_SUBSCRIBERS.set(len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+        STREAM_SUBSCRIBERS.set(len(self._subscribers))
+
+    def replay(self, last_event_id: str) -> list[bytes]:
+        """Encoded events after `last_event_id`, or a lone `resync` event if some are gone."""
+        epoch, _, seq_text = last_event_id.rpartition("-")
+        if not epoch or not seq_text.isdigit():
+            raise ValueError(f"invalid event id: {last_event_id!r}")
+        seq = int(seq_text)
+        last_seq = self._next_id - 1
+        if epoch == self.epoch and seq == last_seq:
+            return []
+        oldest = self._ring[0][0] if self._ring else self._next_id
+        if epoch != self.epoch or seq > last_seq or seq < oldest - 1:
+            data = json.dumps({"version": self.store.version, "last_id": self.last_id})
+            return [f"event: resync\ndata: {data}\n\n".encode()]
+        # Ids are contiguous, so the position in the ring follows from the id.
+        start = seq - oldest + 1
+        return [frame for _, frame in list(self._ring)[start:]]
+
+    async def events(
+        self, subscriber: Subscriber, keepalive_s: float = 15.0
+    ) -> AsyncIterator[bytes]:
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscriber.queue.get(), timeout=keepalive_s)
+                except TimeoutError:
+                    yield KEEPALIVE
+                    continue
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def run(self, poll_interval_s: float = 0.25) -> None:
+        self._loop = asyncio.get_running_loop()
+        interval_s = self.rate_tick_interval_s if self._listening else poll_interval_s
+        next_tick = self._loop.time() + self.rate_tick_interval_s
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=interval_s)
+            except TimeoutError:
+                pass
+            if not self._listening:
+                snapshot = self.store.snapshot()
+                if snapshot is not self._last_snapshot:
+                    self._publish_transitions(self._last_snapshot, snapshot)
+            if self._loop.time() >= next_tick:
+                next_tick = self._loop.time() + self.rate_tick_interval_s
+                if self._subscribers:
+                    self.publish_rates()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._listening:
+            self.store.remove_listener(self._on_change)
+        for subscriber in list(self._subscribers):
+            subscriber.queue.put_nowait(None)
+            self.unsubscribe(subscriber)
+
+    def publish_rates(self) -> int:
+        rates: dict[str, dict[str, float]] = {}
+        for metric in self._rates.collect():
+            for sample in metric.samples:
+                subsystem = sample.labels.get("subsystem", "")
+                rates.setdefault(subsystem, {})[sample.labels.get("type", "")] = round(
+                    sample.value, 4
+                )
+        return self.publish("rates", {"ts": now_ms(), "rates": rates})
+
+    def _on_change(self, old: StateSnapshot, new: StateSnapshot) -> None:
+        loop = self._loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is None or running is loop:
+            self._publish_transitions(old, new)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._publish_transitions, old, new)
+
+    def _publish_transitions(self, old: StateSnapshot, new: StateSnapshot) -> None:
+        self._last_snapshot = new
+        for name, record in new.subsystems.items():
+            previous = old.subsystems.get(name)
+            if previous is record or (previous is not None and previous.state == record.state):
+                continue
+            self.publish(
+                "transition",
+                {
+                    "subsystem": name,
+                    "from": previous.state if previous is not None else None,
+                    "to": record.state,
+                    "ts": record.updated_ts or now_ms(),
+                    "version": new.version,
+                    "reasons": record.reasons,
+                },
+            )
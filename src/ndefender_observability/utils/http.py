@@ -1,28 +1,82 @@
-"""HTTP utilities for auth and rate limiting."""
+"""HTTP utilities for auth, rate limiting and cached responses."""
 
 from __future__ import annotations
 
+import hashlib
+import json
+import threading
 import time
-from collections import deque
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
 
 from fastapi import Request
+from fastapi.responses import Response
+
+from ..metrics.registry import RATE_LIMIT_KEYS, RATE_LIMIT_REJECTED_TOTAL
+from ..state import StateSnapshot
+
+
+@dataclass(frozen=True)
+class RateBudget:
+    name: str
+    capacity: float
+    refill_per_s: float
 
 
 class RateLimiter:
-    def __init__(self, max_requests: int, window_s: int) -> None:
-        self.max_requests = max_requests
-        self.window_s = window_s
-        self._events: dict[str, deque[float]] = {}
-
-    def allow(self, key: str) -> bool:
-        now = time.time()
-        bucket = self._events.setdefault(key, deque())
-        while bucket and now - bucket[0] > self.window_s:
-            bucket.popleft()
-        if len(bucket) >= self.max_requests:
-            return False
-        bucket.append(now)
-        return True
+    """Token-bucket rate limiter keyed by client and budget.
+
+    Every budget allows `max_requests` per `window_s` with bursts up to
+    `max_requests`. A bucket is two floats (tokens, last refill), so
+    `allow()` is O(1); buckets live in an LRU table capped at `max_keys`
+    and the least recently used one is evicted (i.e. reset to full) when
+    a new key arrives at the cap. Routes without a budget of their own
+    use the default one.
+    """
+
+    def __init__(self, max_requests: int, window_s: float, max_keys: int = 10_000) -> None:
+        self.max_keys = max_keys
+        self.default = RateBudget("default", max_requests, max_requests / window_s)
+        self._routes: dict[str, RateBudget] = {}
+        self._buckets: OrderedDict[tuple[str, str], list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add_budget(
+        self, name: str, max_requests: int, window_s: float, routes: Iterable[str]
+    ) -> None:
+        """Give `routes` a shared budget, separate from the default one."""
+        budget = RateBudget(name, max_requests, max_requests / window_s)
+        for route in routes:
+            self._routes[route] = budget
+
+    def allow(self, key: str, route: str | None = None, now: float | None = None) -> bool:
+        budget = self._routes.get(route, self.default) if route is not None else self.default
+        now = time.monotonic() if now is None else now
+        slot = (budget.name, key)
+        with self._lock:
+            bucket = self._buckets.get(slot)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[slot] = [budget.capacity, now]
+            else:
+                self._buckets.move_to_end(slot)
+                elapsed = max(0.0, now - bucket[1])
+                bucket[0] = min(budget.capacity, bucket[0] + elapsed * budget.refill_per_s)
+                bucket[1] = now
+            allowed = bucket[0] >= 1
+            if allowed:
+                bucket[0] -= 1
+            size = len(self._buckets)
+        RATE_LIMIT_KEYS.set(size)
+        if not allowed:
+            RATE_LIMIT_REJECTED_TOTAL.labels(budget=budget.name).inc()
+        return allowed
+
+    def __len__(self) -> int:
+        return len(self._buckets)
 
 
 def get_client_key(request: Request) -> str:
@@ -33,3 +87,48 @@ def get_client_key(request: Request) -> str:
     if client is None:
         return "unknown"
     return client.host
+
+
+@dataclass(frozen=True)
+class EncodedResponse:
+    version: int
+    body: bytes
+    etag: str
+
+
+class VersionedJsonCache:
+    """Encode a JSON payload once per state version.
+
+    Requests for an unchanged snapshot reuse the encoded bytes and their
+    strong ETag (a hash of the bytes); concurrent misses may both build,
+    and the last one wins.
+    """
+
+    def __init__(self, build: Callable[[StateSnapshot], dict[str, Any]]) -> None:
+        self._build = build
+        self._cached: EncodedResponse | None = None
+
+    def get(self, snapshot: StateSnapshot) -> EncodedResponse:
+        cached = self._cached
+        if cached is not None and cached.version == snapshot.version:
+            return cached
+        body = json.dumps(self._build(snapshot), separators=(",", ":")).encode()
+        etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+        cached = EncodedResponse(snapshot.version, body, etag)
+        self._cached = cached
+        return cached
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {item.strip().removeprefix("W/") for item in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def cached_json_response(request: Request, encoded: EncodedResponse) -> Response:
+    headers = {"ETag": encoded.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, encoded.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=encoded.body, media_type="application/json", headers=headers)
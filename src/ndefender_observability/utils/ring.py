@@ -1 +1,43 @@
-"""Ring buffer utilities (reserved for future use)."""
+"""Ring buffer utilities."""
+
+from __future__ import annotations
+
+from array import array
+
+
+class CounterRing:
+    """Sliding-window counter with a fixed number of time buckets.
+
+    Memory is constant regardless of event volume: each slot holds a count
+    and the absolute bucket index it belongs to, so stale slots are reset
+    lazily when reused and ignored when summing.
+    """
+
+    def __init__(self, window_s: float = 60.0, buckets: int = 60) -> None:
+        if window_s <= 0 or buckets <= 0:
+            raise ValueError("window_s and buckets must be positive")
+        self.window_s = window_s
+        self.buckets = buckets
+        self.bucket_s = window_s / buckets
+        self._counts = array("q", [0] * buckets)
+        self._epochs = array("q", [-1] * buckets)
+
+    def add(self, ts_s: float, amount: int = 1) -> None:
+        epoch = int(ts_s // self.bucket_s)
+        slot = epoch % self.buckets
+        if self._epochs[slot] != epoch:
+            self._epochs[slot] = epoch
+            self._counts[slot] = 0
+        self._counts[slot] += amount
+
+    def total(self, now_s: float) -> int:
+        newest = int(now_s // self.bucket_s)
+        oldest = newest - self.buckets + 1
+        total = 0
+        for epoch, count in zip(self._epochs, self._counts, strict=True):
+            if oldest <= epoch <= newest:
+                total += count
+        return total
+
+    def rate(self, now_s: float) -> float:
+        return self.total(now_s) / self.window_s
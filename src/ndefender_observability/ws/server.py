@@ -1 +1,234 @@
-"""Websocket server reserved for future use."""
+"""Websocket push of live subsystem state and selected metrics."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+from collections import deque
+from collections.abc import Iterable
+from typing import Any
+
+from prometheus_client import CollectorRegistry
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from ..history.store import series_key
+from ..metrics.registry import (
+    REGISTRY,
+    WS_CLIENTS,
+    WS_FRAMES_DROPPED_TOTAL,
+    WS_FRAMES_SENT_TOTAL,
+    WS_REJECTED_TOTAL,
+)
+from ..state import ObservabilityState, StateSnapshot, SubsystemState
+from ..utils.time import now_ms
+
+DEFAULT_METRICS = (
+    "ndefender_pi_cpu_temp_c",
+    "ndefender_pi_disk_used_percent",
+    "ndefender_ups_soc_percent",
+    "ndefender_ups_time_to_empty_s",
+    "ndefender_events_rate_60s",
+    "ndefender_jsonl_tail_lag_seconds",
+)
+# Subsystem fields pushed to clients; ages are derived client-side from `updated_ts`.
+STATE_FIELDS = ("state", "updated_ts", "last_error", "last_error_ts", "reasons")
+# Close code telling clients to back off and reconnect later (RFC 6455 "Try Again Later").
+WS_TRY_AGAIN_LATER = 1013
+
+# Queue marker replaced by a full snapshot when the frame is sent.
+_RESYNC = object()
+
+
+class WsClient:
+    """Bounded per-connection send queue.
+
+    When a slow consumer lets the queue fill up, its pending deltas are
+    discarded and replaced by a single resync marker, which is sent as a
+    fresh snapshot. Deltas never have to be replayed in order.
+    """
+
+    def __init__(self, websocket: WebSocket, queue_size: int) -> None:
+        self.websocket = websocket
+        self.queue_size = queue_size
+        self.frames: deque[Any] = deque()
+        self.ready = asyncio.Event()
+
+    def offer(self, frame: str) -> None:
+        if self.frames and self.frames[-1] is _RESYNC:
+            return
+        if len(self.frames) >= self.queue_size:
+            WS_FRAMES_DROPPED_TOTAL.inc(len(self.frames))
+            self.frames.clear()
+            self.frames.append(_RESYNC)
+        else:
+            self.frames.append(frame)
+        self.ready.set()
+
+    def resync(self) -> None:
+        self.frames.clear()
+        self.frames.append(_RESYNC)
+        self.ready.set()
+
+
+class WsHub:
+    """Diff state and metrics at `update_hz` and fan one encoded delta out to every client.
+
+    Updates that land between two ticks are coalesced into one delta.
+    Subsystems whose record did not change are skipped by identity (the
+    store is copy-on-write), and metric values are compared per series.
+    Each frame is serialised once no matter how many clients receive it.
+    """
+
+    def __init__(
+        self,
+        store: ObservabilityState,
+        metrics: Iterable[str] = DEFAULT_METRICS,
+        update_hz: float = 1.0,
+        max_clients: int = 16,
+        queue_size: int = 8,
+        registry: CollectorRegistry = REGISTRY,
+    ) -> None:
+        self.store = store
+        self.metrics = tuple(metrics)
+        self.interval_s = 1.0 / update_hz
+        self.max_clients = max_clients
+        self.queue_size = queue_size
+        self._source = registry.restricted_registry(self.metrics)
+        self.clients: set[WsClient] = set()
+        self._snapshot: StateSnapshot | None = None
+        self._subsystems: dict[str, dict[str, Any]] = {}
+        self._values: dict[str, float | None] = {}
+        self._snapshot_frame: str | None = None
+        self._stop = asyncio.Event()
+
+    async def run(self) -> None:
+        while not self._stop.is_set():
+            if self.clients:
+                self.tick()
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval_s)
+            except TimeoutError:
+                pass
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def tick(self) -> int:
+        """Advance the view, broadcast the delta if any; return the number of clients sent to."""
+        snapshot = self.store.snapshot()
+        subsystems: dict[str, dict[str, Any]] = {}
+        if snapshot is not self._snapshot:
+            previous = self._snapshot.subsystems if self._snapshot is not None else {}
+            for name, record in snapshot.subsystems.items():
+                if previous.get(name) is record:
+                    continue
+                fields = _state_fields(record)
+                old = self._subsystems.get(name, {})
+                changed = {key: value for key, value in fields.items() if old.get(key) != value}
+                if changed:
+                    subsystems[name] = changed
+                self._subsystems[name] = fields
+            self._snapshot = snapshot
+        values = self._sample()
+        metrics = {key: value for key, value in values.items() if self._values.get(key) != value}
+        metrics.update({key: None for key in self._values if key not in values})
+        self._values = values
+        if not subsystems and not metrics:
+            return 0
+        self._snapshot_frame = None
+        frame = _encode(
+            {
+                "type": "delta",
+                "version": snapshot.version,
+                "ts": now_ms(),
+                "subsystems": subsystems,
+                "metrics": metrics,
+            }
+        )
+        for client in self.clients:
+            client.offer(frame)
+        return len(self.clients)
+
+    def snapshot_frame(self) -> str:
+        if self._snapshot_frame is None:
+            version = self._snapshot.version if self._snapshot is not None else 0
+            self._snapshot_frame = _encode(
+                {
+                    "type": "snapshot",
+                    "version": version,
+                    "ts": now_ms(),
+                    "subsystems": self._subsystems,
+                    "metrics": self._values,
+                }
+            )
+        return self._snapshot_frame
+
+    async def serve(self, websocket: WebSocket) -> None:
+        """Accept `websocket` and push frames until it disconnects."""
+        await websocket.accept()
+        if len(self.clients) >= self.max_clients:
+            WS_REJECTED_TOTAL.inc()
+            await websocket.close(code=WS_TRY_AGAIN_LATER, reason="too many clients")
+            return
+        client = WsClient(websocket, self.queue_size)
+        # Bring the shared view up to date so the first delta follows this snapshot.
+        self.tick()
+        client.resync()
+        self.clients.add(client)
+        WS_CLIENTS.inc()
+        sender = asyncio.create_task(self._send(client))
+        receiver = asyncio.create_task(_drain(websocket))
+        try:
+            await asyncio.wait((sender, receiver), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.clients.discard(client)
+            WS_CLIENTS.dec()
+            for task in (sender, receiver):
+                task.cancel()
+            # Not gather(): a cancelled gather would mask the server's own cancellation.
+            await asyncio.wait((sender, receiver))
+
+    async def _send(self, client: WsClient) -> None:
+        try:
+            while True:
+                await client.ready.wait()
+                client.ready.clear()
+                while client.frames:
+                    frame = client.frames.popleft()
+                    if frame is _RESYNC:
+                        frame = self.snapshot_frame()
+                        kind = "snapshot"
+                    else:
+                        kind = "delta"
+                    await client.websocket.send_text(frame)
+                    WS_FRAMES_SENT_TOTAL.labels(type=kind).inc()
+        except (WebSocketDisconnect, RuntimeError, OSError):
+            return
+
+    def _sample(self) -> dict[str, float | None]:
+        values: dict[str, float | None] = {}
+        for metric in self._source.collect():
+            for sample in metric.samples:
+                value = sample.value if math.isfinite(sample.value) else None
+                values[series_key(sample.name, sample.labels)] = value
+        return values
+
+
+async def _drain(websocket: WebSocket) -> None:
+    # Clients only listen; reading is how a disconnect is noticed.
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+    except (WebSocketDisconnect, RuntimeError):
+        return
+
+
+def _state_fields(record: SubsystemState) -> dict[str, Any]:
+    return {key: getattr(record, key) for key in STATE_FIELDS}
+
+
+def _encode(payload: dict[str, Any]) -> str:
+    return json.dumps(payload, default=str, separators=(",", ":"))
@@ -1,14 +1,18 @@
 import asyncio
+import json
 
 from ndefender_observability.collectors.aggregator_http import AggregatorHttpCollector
 from ndefender_observability.health.model import HealthState
+from ndefender_observability.metrics.registry import POLL_CACHE_HITS_TOTAL
 from ndefender_observability.state import ObservabilityState
 
 
 class ResponseStub:
-    def __init__(self, status_code: int, payload: dict):
+    def __init__(self, status_code: int, payload: dict, headers: dict | None = None):
         self.status_code = status_code
         self._payload = payload
+        self.headers = headers or {}
+        self.content = json.dumps(payload).encode()
 
     def json(self):
         return self._payload
@@ -17,8 +21,10 @@ class ResponseStub:
 class ClientStub:
     def __init__(self, responses: dict[str, ResponseStub]):
         self._responses = responses
+        self.requests: list[tuple[str, dict | None]] = []
 
-    async def get(self, endpoint: str):
+    async def get(self, endpoint: str, headers: dict | None = None):
+        self.requests.append((endpoint, headers))
         if endpoint not in self._responses:
             raise RuntimeError("missing stub")
         return self._responses[endpoint]
@@ -64,3 +70,61 @@ def test_aggregator_offline() -> None:
     asyncio.run(collector._poll_once(store, client))
     state = store.get("aggregator")
     assert state.state == HealthState.OFFLINE
+
+
+def test_aggregator_unchanged_body_skips_decode() -> None:
+    store = ObservabilityState()
+    collector = AggregatorHttpCollector("http://localhost:8000")
+    status = ResponseStub(200, {"queues": {"rf": 1}})
+    client = ClientStub(
+        {
+            "/api/v1/health": ResponseStub(200, {"status": "ok"}),
+            "/api/v1/status": status,
+        }
+    )
+    asyncio.run(collector._poll_once(store, client))
+    status.json = None  # a second decode would fail
+    hits = POLL_CACHE_HITS_TOTAL.labels(
+        subsystem="aggregator", endpoint="status", reason="unchanged"
+    )._value.get()
+    asyncio.run(collector._poll_once(store, client))
+    state = store.get("aggregator")
+    assert state.state == HealthState.OK
+    assert state.evidence["status_keys"] == ["queues"]
+    after = POLL_CACHE_HITS_TOTAL.labels(
+        subsystem="aggregator", endpoint="status", reason="unchanged"
+    )._value.get()
+    assert after == hits + 1
+
+
+def test_aggregator_sends_etag_and_accepts_304() -> None:
+    store = ObservabilityState()
+    collector = AggregatorHttpCollector("http://localhost:8000")
+    responses = {
+        "/api/v1/health": ResponseStub(200, {"status": "ok"}),
+        "/api/v1/status": ResponseStub(200, {"ok": True}, headers={"etag": '"v1"'}),
+    }
+    client = ClientStub(responses)
+    asyncio.run(collector._poll_once(store, client))
+    responses["/api/v1/status"] = ResponseStub(304, {})
+    asyncio.run(collector._poll_once(store, client))
+    assert client.requests[-1] == ("/api/v1/status", {"If-None-Match": '"v1"'})
+    state = store.get("aggregator")
+    assert state.state == HealthState.OK
+    assert state.evidence["status_keys"] == ["ok"]
+
+
+def test_aggregator_single_failure_within_budget_keeps_ok() -> None:
+    store = ObservabilityState()
+    collector = AggregatorHttpCollector("http://localhost:8000")
+    responses = {
+        "/api/v1/health": ResponseStub(200, {"status": "ok"}),
+        "/api/v1/status": ResponseStub(200, {"ok": True}),
+    }
+    client = ClientStub(responses)
+    asyncio.run(collector._poll_once(store, client))
+    responses["/api/v1/status"] = ResponseStub(500, {})
+    asyncio.run(collector._poll_once(store, client))
+    state = store.get("aggregator")
+    assert state.state == HealthState.OK
+    assert state.last_error == "partial success"
@@ -0,0 +1,44 @@
+from ndefender_observability.health.budget import ErrorBudget
+from ndefender_observability.health.model import HealthState
+from ndefender_observability.metrics.registry import (
+    SUBSYSTEM_ERROR_BUDGET_BURN_RATE,
+    SUBSYSTEM_ERROR_BUDGET_REMAINING,
+)
+from ndefender_observability.utils.ring import CounterRing
+
+
+def test_counter_ring_slides_window() -> None:
+    ring = CounterRing(window_s=60, buckets=60)
+    ring.add(100.0, 3)
+    ring.add(130.5)
+    assert ring.total(131.0) == 4
+    assert ring.total(159.9) == 4
+    assert ring.total(160.0) == 1
+    assert ring.total(200.0) == 0
+    ring.add(220.0, 2)
+    assert ring.total(220.0) == 2
+
+
+def test_budget_holds_state_until_spent() -> None:
+    budget = ErrorBudget("esp32", max_errors_per_min=2, hold_s=10)
+    state, _ = budget.apply(HealthState.OK, ["ok"], errors=0, now_s=0.0)
+    assert state == HealthState.OK
+
+    state, reasons = budget.apply(HealthState.DEGRADED, ["x failed"], errors=1, now_s=2.0)
+    assert state == HealthState.OK
+    assert reasons[0] == "x failed"
+    assert "error budget" in reasons[-1]
+    state, _ = budget.apply(HealthState.OFFLINE, ["poll failed"], errors=1, now_s=4.0)
+    assert state == HealthState.OK
+    assert SUBSYSTEM_ERROR_BUDGET_REMAINING.labels(subsystem="esp32")._value.get() == 0
+
+    state, _ = budget.apply(HealthState.OFFLINE, ["poll failed"], errors=1, now_s=6.0)
+    assert state == HealthState.OFFLINE
+    assert SUBSYSTEM_ERROR_BUDGET_BURN_RATE.labels(subsystem="esp32")._value.get() == 1.5
+
+
+def test_budget_does_not_hold_past_hold_window() -> None:
+    budget = ErrorBudget("esp32", max_errors_per_min=5, hold_s=5)
+    budget.apply(HealthState.OK, ["ok"], errors=0, now_s=0.0)
+    state, _ = budget.apply(HealthState.OFFLINE, ["poll failed"], errors=1, now_s=6.0)
+    assert state == HealthState.OFFLINE
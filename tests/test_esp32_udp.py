@@ -0,0 +1,95 @@
+import asyncio
+import json
+import socket
+
+from ndefender_observability.collectors.esp32_udp import BINARY_HEADER, Esp32UdpCollector
+from ndefender_observability.health.model import HealthState
+from ndefender_observability.metrics.registry import ESP32_MALFORMED_TOTAL, ESP32_RSSI_DBM
+from ndefender_observability.state import ObservabilityState
+
+
+def _binary(seq: int, uptime_ms: int, rssi: int = -61, vbat_mv: int = 3300) -> bytes:
+    return BINARY_HEADER.pack(b"NE", 1, 0, seq, uptime_ms, rssi, vbat_mv)
+
+
+def test_esp32_parses_formats_and_tracks_loss() -> None:
+    store = ObservabilityState()
+    collector = Esp32UdpCollector(loss_degraded_ratio=0.2)
+    malformed = ESP32_MALFORMED_TOTAL._value.get()
+
+    assert collector.handle_datagram(_binary(1, 1000))
+    assert collector.handle_datagram(json.dumps({"seq": 2, "uptime_ms": 2000}).encode())
+    assert not collector.handle_datagram(b"XX garbage")
+    assert ESP32_MALFORMED_TOTAL._value.get() == malformed + 1
+    assert ESP32_RSSI_DBM._value.get() == -61
+    collector.evaluate(store)
+    assert store.get("esp32").state == HealthState.OK
+
+    collector.handle_datagram(_binary(5, 5000))
+    collector.evaluate(store)
+    state = store.get("esp32")
+    assert state.state == HealthState.DEGRADED
+    assert state.evidence["lost"] == 2
+
+
+def test_esp32_udp_listener_receives_datagrams() -> None:
+    store = ObservabilityState()
+    collector = Esp32UdpCollector(host="127.0.0.1", port=0, interval_s=1)
+
+    async def scenario() -> None:
+        task = asyncio.create_task(collector.run(store))
+        while collector.bound_port is None:
+            await asyncio.sleep(0.01)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+            for seq in range(1, 4):
+                sender.sendto(_binary(seq, seq * 500), ("127.0.0.1", collector.bound_port))
+        for _ in range(100):
+            if collector._received == 3:
+                break
+            await asyncio.sleep(0.01)
+        collector.evaluate(store)
+        collector.stop()
+        await task
+
+    asyncio.run(scenario())
+    state = store.get("esp32")
+    assert state.state == HealthState.OK
+    assert state.evidence["packets"] == 3
+    assert state.evidence["lost"] == 0
+
+
+def test_esp32_telemetry_evidence_is_whitelisted() -> None:
+    store = ObservabilityState()
+    collector = Esp32UdpCollector()
+    datagram = {
+        "seq": 1,
+        "uptime_ms": 1000,
+        "rssi_dbm": -60,
+        "vbat_mv": True,
+        "kind": "x" * 1000,
+        "nested": {"a": [1, 2, 3]},
+        "blob": "y" * 10_000,
+    }
+    assert collector.handle_datagram(json.dumps(datagram).encode())
+    collector.evaluate(store)
+    assert store.get("esp32").evidence["telemetry"] == {
+        "seq": 1,
+        "uptime_ms": 1000,
+        "rssi_dbm": -60,
+    }
+
+
+def test_esp32_rejects_non_finite_and_nested_json() -> None:
+    collector = Esp32UdpCollector()
+    malformed = ESP32_MALFORMED_TOTAL._value.get()
+    assert collector.handle_datagram(b'{"seq": 1, "rssi_dbm": -55}')
+    for datagram in (
+        b'{"seq": 2, "rssi_dbm": NaN}',
+        b'{"seq": 2, "vbat_mv": Infinity}',
+        b'{"seq": 2, "uptime_ms": -Infinity}',
+        b'{"seq": 2, "x": ' + b"[" * 100_000 + b"]" * 100_000 + b"}",
+    ):
+        assert not collector.handle_datagram(datagram)
+    assert ESP32_MALFORMED_TOTAL._value.get() == malformed + 4
+    assert ESP32_RSSI_DBM._value.get() == -55
+    assert collector._last_uptime_ms is None
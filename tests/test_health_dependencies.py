@@ -0,0 +1,81 @@
+import pytest
+
+from ndefender_observability.health.compute import compute_status_snapshot
+from ndefender_observability.health.dependencies import DependencyGraph, DependencyRollup
+from ndefender_observability.health.model import HealthState
+from ndefender_observability.state import ObservabilityState
+
+SUBSYSTEMS = ["aggregator", "system_controller", "antsdr", "remoteid", "esp32"]
+DEPENDENCIES = {
+    "aggregator": ["antsdr", "remoteid", "system_controller"],
+    "antsdr": ["system_controller"],
+    "remoteid": ["system_controller"],
+    "esp32": ["system_controller"],
+}
+
+
+def _store(**states: HealthState) -> ObservabilityState:
+    store = ObservabilityState()
+    for name in SUBSYSTEMS:
+        store.update(name, state=states.get(name, HealthState.OK))
+    return store
+
+
+def test_graph_orders_dependencies_first() -> None:
+    graph = DependencyGraph(SUBSYSTEMS, DEPENDENCIES)
+    order = list(graph.order)
+    assert order[0] == "system_controller"
+    assert order.index("antsdr") < order.index("aggregator")
+    assert graph.downstream(["antsdr"]) == ["antsdr", "aggregator"]
+
+
+def test_graph_rejects_cycles_and_unknown_subsystems() -> None:
+    with pytest.raises(ValueError, match="cycle"):
+        DependencyGraph(SUBSYSTEMS, {"antsdr": ["aggregator"], "aggregator": ["antsdr"]})
+    with pytest.raises(ValueError, match="ups"):
+        DependencyGraph(SUBSYSTEMS, {"esp32": ["ups"]})
+
+
+def test_downstream_failures_are_attributed_to_root_cause() -> None:
+    store = _store(
+        system_controller=HealthState.OFFLINE,
+        antsdr=HealthState.DEGRADED,
+        aggregator=HealthState.OFFLINE,
+    )
+    rollup = DependencyRollup(DependencyGraph(SUBSYSTEMS, DEPENDENCIES))
+    attributions = rollup.evaluate(store.snapshot())
+
+    assert rollup.root_causes(store.snapshot()) == ["system_controller"]
+    assert attributions["antsdr"].impacted_by == ("system_controller",)
+    # Impact passes through antsdr to the aggregator as the same root cause.
+    assert attributions["aggregator"].impacted_by == ("system_controller",)
+    assert not attributions["esp32"].failing
+
+
+def test_rollup_is_recomputed_on_state_changes_only() -> None:
+    store = _store(antsdr=HealthState.DEGRADED, aggregator=HealthState.DEGRADED)
+    rollup = DependencyRollup(DependencyGraph(SUBSYSTEMS, DEPENDENCIES))
+    first = rollup.evaluate(store.snapshot())
+    assert first["aggregator"].impacted_by == ("antsdr",)
+
+    store.update("esp32", updated_ts=5)
+    assert rollup.evaluate(store.snapshot()) is first
+
+    store.update("antsdr", state=HealthState.OK)
+    assert rollup.root_causes(store.snapshot()) == ["aggregator"]
+
+
+def test_status_snapshot_reports_root_causes() -> None:
+    store = _store(system_controller=HealthState.OFFLINE, esp32=HealthState.OFFLINE)
+    rollup = DependencyRollup(DependencyGraph(SUBSYSTEMS, DEPENDENCIES))
+    payload = compute_status_snapshot(store.snapshot(), rollup=rollup)
+
+    assert payload["overall_state"] == HealthState.OFFLINE
+    assert payload["root_causes"] == ["system_controller"]
+    by_name = {item["subsystem"]: item for item in payload["subsystems"]}
+    assert by_name["esp32"]["impacted_by"] == ["system_controller"]
+    assert by_name["antsdr"]["impacted_by"] == []
+
+    # Without a graph every failing subsystem is its own root cause.
+    plain = compute_status_snapshot(store.snapshot())
+    assert plain["root_causes"] == ["system_controller", "esp32"]
@@ -0,0 +1,93 @@
+from ndefender_observability.health.evaluator import FLAPPING_REASON, HealthEvaluator
+from ndefender_observability.health.model import HealthState
+from ndefender_observability.metrics.registry import REGISTRY
+from ndefender_observability.state import ObservabilityState
+
+OK = HealthState.OK
+DEGRADED = HealthState.DEGRADED
+OFFLINE = HealthState.OFFLINE
+
+
+def _suppressed(subsystem: str) -> float:
+    value = REGISTRY.get_sample_value(
+        "ndefender_subsystem_suppressed_transitions_total", {"subsystem": subsystem}
+    )
+    return value or 0.0
+
+
+def _run(evaluator: HealthEvaluator, subsystem: str, observations) -> list[HealthState]:
+    published = OFFLINE
+    states = []
+    for now_s, observed in observations:
+        published, _ = evaluator.apply(subsystem, published, observed, ["r"], now_s=now_s)
+        states.append(published)
+    return states
+
+
+def test_enter_and_exit_need_consecutive_cycles() -> None:
+    evaluator = HealthEvaluator(enter_cycles=2, exit_cycles=3, min_dwell_s=0, flap_threshold=100)
+    before = _suppressed("eval_cycles")
+    observed = [OK, DEGRADED, OK, DEGRADED, DEGRADED, OK, OK, OK]
+    states = _run(evaluator, "eval_cycles", enumerate(observed))
+    # First observation is taken as-is; one-off blips are held.
+    assert states == [OK, OK, OK, OK, DEGRADED, DEGRADED, DEGRADED, OK]
+    assert _suppressed("eval_cycles") - before == 4
+
+
+def test_min_dwell_holds_new_state() -> None:
+    evaluator = HealthEvaluator(enter_cycles=1, exit_cycles=1, min_dwell_s=10, flap_threshold=100)
+    observations = [(0, OK), (1, DEGRADED), (5, DEGRADED), (10, DEGRADED), (12, OK), (21, OK)]
+    states = _run(evaluator, "eval_dwell", observations)
+    assert states == [OK, OK, OK, DEGRADED, DEGRADED, OK]
+
+
+def test_held_observation_explains_itself() -> None:
+    evaluator = HealthEvaluator(enter_cycles=2, min_dwell_s=0)
+    evaluator.apply("eval_reason", OFFLINE, OK, ["ok"], now_s=0)
+    state, reasons = evaluator.apply("eval_reason", OK, OFFLINE, ["poll failed"], now_s=1)
+    assert state == OK
+    assert reasons == ["poll failed", "held OK (hysteresis)"]
+
+
+def test_flapping_pins_degraded_until_it_settles() -> None:
+    evaluator = HealthEvaluator(
+        enter_cycles=1, exit_cycles=1, min_dwell_s=0, flap_window_s=60, flap_threshold=4
+    )
+    published = OFFLINE
+    for now_s, observed in enumerate([OK, OFFLINE, OK, OFFLINE, OK]):
+        published, reasons = evaluator.apply("eval_flap", published, observed, [], now_s=now_s)
+    assert published == DEGRADED
+    assert reasons == [FLAPPING_REASON]
+    assert (
+        REGISTRY.get_sample_value("ndefender_subsystem_flapping", {"subsystem": "eval_flap"}) == 1
+    )
+
+    # Still flapping while changes stay in the window, released once they age out.
+    published, reasons = evaluator.apply("eval_flap", published, OK, ["ok"], now_s=30)
+    assert (published, reasons) == (DEGRADED, ["ok", FLAPPING_REASON])
+    # A real outage while flapping is not softened to DEGRADED.
+    published, reasons = evaluator.apply("eval_flap", published, OFFLINE, ["down"], now_s=31)
+    assert (published, reasons) == (OFFLINE, ["down", FLAPPING_REASON])
+    published, reasons = evaluator.apply("eval_flap", published, OK, ["ok"], now_s=32)
+    assert (published, reasons) == (DEGRADED, ["ok", FLAPPING_REASON])
+    published, reasons = evaluator.apply("eval_flap", published, OK, ["ok"], now_s=93)
+    assert (published, reasons) == (OK, ["ok"])
+    assert (
+        REGISTRY.get_sample_value("ndefender_subsystem_flapping", {"subsystem": "eval_flap"}) == 0
+    )
+
+
+def test_store_routes_observed_states_through_evaluator() -> None:
+    store = ObservabilityState(evaluator=HealthEvaluator(enter_cycles=2, min_dwell_s=0))
+    store.update("esp32", state=OK, reasons=["ok"])
+    assert store.get("esp32").state == OK
+
+    store.update("esp32", state=OFFLINE, reasons=["timeout"])
+    assert store.get("esp32").state == OK
+    assert store.get("esp32").reasons == ["timeout", "held OK (hysteresis)"]
+
+    store.update("esp32", state=OFFLINE, reasons=["timeout"])
+    assert store.get("esp32").state == OFFLINE
+    # Field-only updates bypass the evaluator.
+    assert store.update("esp32", updated_ts=5)
+    assert store.get("esp32").state == OFFLINE
@@ -41,3 +41,32 @@ def test_status_snapshot() -> None:
         data = resp.json()
         assert "overall_state" in data
         assert len(data["subsystems"]) == 5
+
+
+def test_status_etag_and_not_modified() -> None:
+    with TestClient(app) as client:
+        first = client.get("/api/v1/status")
+        etag = first.headers["etag"]
+        assert etag.startswith('"')
+        assert first.json()["version"] == 0
+        assert "updated_ts" in first.json()["subsystems"][0]
+
+        cached = client.get("/api/v1/status", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.headers["etag"] == etag
+        assert cached.content == b""
+        # The encoded body is reused while the version is unchanged.
+        assert client.get("/api/v1/status").content == first.content
+
+        client.app.state.store.update("aggregator", state=HealthState.OK, updated_ts=1)
+        changed = client.get("/api/v1/status", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert changed.json()["version"] == 1
+
+        detail = client.get("/api/v1/health/detail")
+        assert detail.json()["status"] == "ok"
+        again = client.get(
+            "/api/v1/health/detail", headers={"If-None-Match": detail.headers["etag"]}
+        )
+        assert again.status_code == 304
@@ -0,0 +1,121 @@
+import math
+
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, Gauge
+
+from ndefender_observability.history.segments import SegmentStore
+from ndefender_observability.history.store import HistoryStore, Tier
+from ndefender_observability.main import app
+
+
+def _store(**kwargs) -> tuple[HistoryStore, Gauge]:
+    registry = CollectorRegistry()
+    gauge = Gauge("test_lag_seconds", "lag", ["subsystem"], registry=registry)
+    store = HistoryStore(["test_lag_seconds"], registry=registry, **kwargs)
+    return store, gauge
+
+
+def test_tier_memory_is_fixed_and_nan_initialised() -> None:
+    tier = Tier(step_s=5, retention_s=3600, aggregate=False)
+    before = tier.nbytes
+    for index in range(10_000):
+        tier.add(index * 5, float(index))
+    assert tier.nbytes == before == 720 * 16
+    assert math.isnan(Tier(60, 600, aggregate=True).mins[0])
+    points = list(tier.points(49_000, 49_995))
+    assert [point.avg for point in points][-1] == 9_999
+
+
+def test_history_samples_and_downsamples() -> None:
+    store, gauge = _store(sample_interval_s=5, raw_retention_s=600, tiers=[(60, 3600)])
+    start = 1_700_000_000 // 60 * 60
+    for index in range(24):
+        gauge.labels(subsystem="antsdr").set(index)
+        store.sample(now_s=start + index * 5)
+    now_s = start + 23 * 5
+    key = 'test_lag_seconds{subsystem="antsdr"}'
+    assert store.series == [key]
+
+    step_s, series = store.query(["test_lag_seconds"], start, now_s=now_s)
+    assert step_s == 5
+    assert [point.avg for point in series[key]] == list(range(24))
+
+    step_s, series = store.query([key], start, step_s=60, now_s=now_s)
+    assert step_s == 60
+    first, second = series[key]
+    assert (first.min, first.max, first.avg) == (0, 11, 5.5)
+    assert (second.min, second.max, second.avg) == (12, 23, 17.5)
+
+    # Ranges beyond raw retention fall through to the downsampled tier.
+    step_s, _ = store.query([key], now_s - 1800, now_s=now_s)
+    assert step_s == 60
+
+
+def test_history_caps_series() -> None:
+    store, gauge = _store(max_series=2)
+    for name in ("a", "b", "c"):
+        gauge.labels(subsystem=name).set(1)
+    assert store.sample(now_s=1_700_000_000) == 2
+    assert len(store.series) == 2
+
+
+def test_history_endpoint_returns_state_codes() -> None:
+    with TestClient(app) as client:
+        client.app.state.history.sample()
+        available = client.get("/api/v1/history").json()["available"]
+        assert 'ndefender_subsystem_state{subsystem="aggregator"}' in available
+        resp = client.get(
+            "/api/v1/history", params={"series": "ndefender_subsystem_state", "from": "-60"}
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["step_s"] == 5
+        by_key = {item["series"]: item["points"] for item in data["series"]}
+        # Codes follow severity: OK 0, REPLAY 1, DEGRADED 2, OFFLINE 3.
+        assert by_key['ndefender_subsystem_state{subsystem="aggregator"}'][-1][1] == 3
+        assert client.get("/api/v1/history", params={"series": "x", "step": "0"}).status_code == 400
+
+
+def test_segments_survive_reopen_and_serve_older_ranges(tmp_path) -> None:
+    key = 'test_lag_seconds{subsystem="antsdr"}'
+    start = 1_700_000_000
+    segments = SegmentStore(str(tmp_path), max_bytes=2 * (32 + 10 * 16), max_series=2)
+    assert segments.capacity == 10
+    for index in range(15):
+        segments.append(key, start + index * 5, float(index))
+    assert segments.records(key, start, start + 100)[-1] == (start + 70, 14.0)
+    assert segments.flush() == 15
+    segments.close()
+
+    reopened = SegmentStore(str(tmp_path), max_bytes=2 * (32 + 10 * 16), max_series=2)
+    assert reopened.series == [key]
+    # The ring keeps the newest `capacity` records.
+    assert [value for _, value in reopened.records(key, 0, start + 100)] == [
+        float(index) for index in range(5, 15)
+    ]
+    assert reopened.records(key, start + 50, start + 60) == [
+        (start + 50, 10.0),
+        (start + 55, 11.0),
+        (start + 60, 12.0),
+    ]
+    # Samples from a clock stepping backwards are dropped to keep records sorted.
+    assert reopened.append(key, start, 99.0) is False
+
+    store, _ = _store(segments=reopened)
+    assert store.series == [key]
+    step_s, series = store.query([key], start, now_s=start + 100)
+    assert step_s == 5
+    assert [point.avg for point in series[key]] == [float(index) for index in range(5, 15)]
+    reopened.close()
+
+
+def test_segment_resets_on_capacity_change(tmp_path) -> None:
+    key = "test_series"
+    segments = SegmentStore(str(tmp_path), max_bytes=32 + 4 * 16, max_series=1)
+    segments.append(key, 1_700_000_000, 1.0)
+    segments.flush()
+    segments.close()
+
+    resized = SegmentStore(str(tmp_path), max_bytes=32 + 8 * 16, max_series=1)
+    assert resized.records(key, 0, 2_000_000_000) == []
+    resized.close()
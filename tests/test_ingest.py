@@ -0,0 +1,171 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from ndefender_observability.collectors.ingest import IngestCollector
+from ndefender_observability.health.model import HealthState
+from ndefender_observability.main import app
+from ndefender_observability.metrics.registry import (
+    EVENTS_TOTAL,
+    INGEST_BATCHES_TOTAL,
+    INGEST_REJECTED_LINES_TOTAL,
+    INGEST_SEQ_LOST_TOTAL,
+)
+from ndefender_observability.state import ObservabilityState
+from ndefender_observability.utils.time import now_ms
+
+
+def _ndjson(lines: list[dict]) -> bytes:
+    return b"".join(json.dumps(line).encode() + b"\n" for line in lines)
+
+
+def test_ingest_counts_events_and_detects_loss() -> None:
+    store = ObservabilityState()
+    collector = IngestCollector({"antsdr": (["RF_CONTACT_NEW"], 10)})
+    before = EVENTS_TOTAL.labels(subsystem="antsdr", type="RF_CONTACT_NEW")._value.get()
+    lost_before = INGEST_SEQ_LOST_TOTAL.labels(subsystem="antsdr")._value.get()
+    body = _ndjson(
+        [
+            {"source": "antsdr", "seq": 1, "type": "RF_CONTACT_NEW", "timestamp_ms": now_ms()},
+            {"source": "antsdr", "seq": 4, "type": "RF_CONTACT_NEW", "timestamp_ms": now_ms()},
+            {"source": "nope", "seq": 1, "type": "RF_CONTACT_NEW"},
+        ]
+    )
+    recorded = asyncio.run(collector.process(body + b"not json\n"))
+    collector.publish(store)
+
+    assert recorded == 2
+    after = EVENTS_TOTAL.labels(subsystem="antsdr", type="RF_CONTACT_NEW")._value.get()
+    assert after == before + 2
+    assert INGEST_SEQ_LOST_TOTAL.labels(subsystem="antsdr")._value.get() == lost_before + 2
+    state = store.get("antsdr")
+    assert state.state == HealthState.OK
+    assert state.evidence["transport"] == "ingest"
+    assert state.evidence["seq_lost"] == 2
+    assert store.get("remoteid").reasons == ["no data yet"]
+
+
+def test_ingest_heartbeat_reports_source_state() -> None:
+    store = ObservabilityState()
+    collector = IngestCollector({"remoteid": ([], 10)})
+    body = _ndjson(
+        [{"source": "remoteid", "heartbeat": True, "state": "degraded", "reasons": ["gps lost"]}]
+    )
+    assert asyncio.run(collector.process(body)) == 0
+    collector.publish(store)
+    state = store.get("remoteid")
+    assert state.state == HealthState.DEGRADED
+    assert state.reasons == ["gps lost"]
+
+
+def test_ingest_endpoint_backpressure(monkeypatch) -> None:
+    monkeypatch.setenv("NDEFENDER_OBS_INGEST__ENABLED", "true")
+    monkeypatch.setenv("NDEFENDER_OBS_INGEST__QUEUE_MAX_BATCHES", "1")
+    body = _ndjson([{"source": "antsdr", "type": "RF_CONTACT_NEW"}])
+    with TestClient(app) as client:
+        resp = client.post("/api/v1/ingest", content=body)
+        assert resp.status_code == 202
+        assert resp.json()["lines"] == 1
+        resp = client.post("/api/v1/ingest", content=body)
+        assert resp.status_code == 429
+
+
+def test_ingest_endpoint_disabled() -> None:
+    with TestClient(app) as client:
+        resp = client.post("/api/v1/ingest", content=b"{}\n")
+        assert resp.status_code == 404
+
+
+def test_ingest_endpoint_rejects_oversized_body(monkeypatch) -> None:
+    monkeypatch.setenv("NDEFENDER_OBS_INGEST__ENABLED", "true")
+    monkeypatch.setenv("NDEFENDER_OBS_INGEST__MAX_BATCH_BYTES", "64")
+    line = _ndjson([{"source": "antsdr", "type": "RF_CONTACT_NEW"}])
+
+    def chunked():
+        for _ in range(1000):
+            yield line
+
+    with TestClient(app) as client:
+        # Rejected from Content-Length alone.
+        resp = client.post("/api/v1/ingest", content=line * 10)
+        assert resp.status_code == 413
+        # Without Content-Length the stream is cut off once it passes the cap.
+        resp = client.post("/api/v1/ingest", content=chunked())
+        assert resp.status_code == 413
+        assert client.post("/api/v1/ingest", content=line).status_code == 202
+
+
+def test_ingest_survives_hostile_lines() -> None:
+    store = ObservabilityState()
+    collector = IngestCollector({"antsdr": (["RF_CONTACT_NEW"], 10)})
+    rejected = INGEST_REJECTED_LINES_TOTAL.labels(reason="parse")._value.get()
+    nested = b'{"source":"antsdr","type":"X","x":' + b"[" * 100_000 + b"]" * 100_000 + b"}\n"
+    body = (
+        b'{"source":"antsdr","type":"X","ts":NaN}\n'
+        b'{"source":"antsdr","type":"X","ts":Infinity}\n'
+        b'{"source":"antsdr","type":"X","ts":1e400}\n'
+        + nested
+        + b"[" * 100_000
+        + b"\n"
+        + _ndjson([{"source": "antsdr", "type": "RF_CONTACT_NEW", "timestamp_ms": now_ms()}])
+    )
+    recorded = asyncio.run(collector.process(body))
+    collector.publish(store)
+
+    # Non-finite timestamps are ignored and the events still count.
+    assert recorded == 4
+    assert INGEST_REJECTED_LINES_TOTAL.labels(reason="parse")._value.get() == rejected + 2
+    assert store.get("antsdr").state == HealthState.OK
+
+
+def test_ingest_loop_outlives_a_failing_batch(monkeypatch) -> None:
+    store = ObservabilityState()
+    collector = IngestCollector({"antsdr": (["RF_CONTACT_NEW"], 10)}, interval_s=0.01)
+    failed = INGEST_BATCHES_TOTAL.labels(result="failed")._value.get()
+    process = collector.process
+    calls = []
+
+    async def flaky(body: bytes) -> int:
+        calls.append(body)
+        if len(calls) == 1:
+            raise ValueError("boom")
+        return await process(body)
+
+    monkeypatch.setattr(collector, "process", flaky)
+
+    async def scenario() -> None:
+        task = asyncio.create_task(collector.run(store))
+        collector.offer(b"first\n")
+        collector.offer(_ndjson([{"source": "antsdr", "type": "RF_CONTACT_NEW"}]))
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if store.get("antsdr").state == HealthState.OK:
+                break
+        collector.stop()
+        await task
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+    assert INGEST_BATCHES_TOTAL.labels(result="failed")._value.get() == failed + 1
+    assert store.get("antsdr").state == HealthState.OK
+
+
+def test_ingest_queue_is_bounded_in_bytes() -> None:
+    store = ObservabilityState()
+    collector = IngestCollector({"antsdr": ([], 10)}, queue_max_batches=100, queue_max_bytes=100)
+
+    async def scenario() -> None:
+        # An empty queue takes even an oversized batch; then the byte budget applies.
+        assert collector.offer(b"x" * 150)
+        assert not collector.offer(b"x")
+        task = asyncio.create_task(collector.run(store))
+        while not collector._queue.empty():
+            await asyncio.sleep(0.01)
+        collector.stop()
+        await task
+        assert collector.offer(b"x" * 60)
+        assert not collector.offer(b"x" * 41)
+        assert collector.offer(b"x" * 40)
+
+    asyncio.run(scenario())
@@ -0,0 +1,49 @@
+from ndefender_observability.collectors.events import EventTracker
+from ndefender_observability.metrics.cardinality import LabelGuard
+from ndefender_observability.metrics.registry import (
+    EVENTS_RATE_60S,
+    EVENTS_TOTAL,
+    LABEL_OVERFLOW_TOTAL,
+    REGISTRY,
+)
+from ndefender_observability.utils.time import now_ms
+
+
+def test_label_guard_admits_allowed_and_caps_extras() -> None:
+    guard = LabelGuard("test_guard_metric", ["A", "B"], max_extra=2)
+    overflow = LABEL_OVERFLOW_TOTAL.labels(metric="test_guard_metric", reason="overflow")
+    invalid = LABEL_OVERFLOW_TOTAL.labels(metric="test_guard_metric", reason="invalid")
+
+    assert [guard.resolve(value) for value in ("A", "x", "y", "z", "x", "B")] == [
+        "A",
+        "x",
+        "y",
+        "other",
+        "x",
+        "B",
+    ]
+    assert guard.resolve("q" * 200) == "other"
+    assert guard.resolve("bad\nvalue") == "other"
+    assert guard.values == {"A", "B", "x", "y"}
+    assert overflow._value.get() == 1
+    assert invalid._value.get() == 2
+
+
+def test_event_tracker_bounds_type_labels_under_garbage() -> None:
+    tracker = EventTracker("fuzz", ["KNOWN"], max_extra_types=3)
+    now = now_ms()
+    for index in range(1_000):
+        tracker.record({"type": f"GARBAGE_{index}"}, now)
+    tracker.record({"type": "KNOWN"}, now)
+    tracker.publish(now)
+
+    types = {
+        sample.labels["type"]
+        for metric in REGISTRY.collect()
+        if metric.name == "ndefender_events"
+        for sample in metric.samples
+        if sample.labels.get("subsystem") == "fuzz"
+    }
+    assert types == {"KNOWN", "GARBAGE_0", "GARBAGE_1", "GARBAGE_2", "other"}
+    assert EVENTS_TOTAL.labels(subsystem="fuzz", type="other")._value.get() == 997
+    assert EVENTS_RATE_60S.labels(subsystem="fuzz", type="other")._value.get() > 0
@@ -1,6 +1,15 @@
+import gzip
+import threading
+import time
+
 from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry
 
+from ndefender_observability.health.model import HealthState
 from ndefender_observability.main import app
+from ndefender_observability.metrics.exposition import ExpositionCache, negotiate
+from ndefender_observability.metrics.registry import REGISTRY, SubsystemStateCollector
+from ndefender_observability.state import ObservabilityState
 
 
 def test_metrics_contains_core_metrics() -> None:
@@ -19,3 +28,100 @@ def test_metrics_contains_core_metrics() -> None:
         assert "ndefender_subsystem_last_success_ts" in text
         assert "ndefender_subsystem_last_error_ts" in text
         assert "ndefender_collector_exceptions_total" in text
+
+
+def test_exposition_cache_coalesces_and_honours_staleness() -> None:
+    calls = []
+
+    def render() -> bytes:
+        calls.append(1)
+        time.sleep(0.05)
+        return f"render {len(calls)}".encode()
+
+    cache = ExpositionCache({"text": render}, max_staleness_s=60)
+    threads = [threading.Thread(target=cache.get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert cache.get() == b"render 1"
+
+    cache.max_staleness_s = 0
+    assert cache.get() == b"render 2"
+
+
+def test_metrics_gzip_and_openmetrics_negotiation() -> None:
+    with TestClient(app) as client:
+        resp = client.get(
+            "/metrics",
+            headers={"Accept": "application/openmetrics-text", "Accept-Encoding": "gzip"},
+        )
+        assert resp.status_code == 200
+        assert resp.headers["content-encoding"] == "gzip"
+        assert resp.headers["content-type"].startswith("application/openmetrics-text")
+        assert resp.text.rstrip().endswith("# EOF")
+
+        resp = client.get("/metrics", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in resp.headers
+        assert resp.headers["content-type"].startswith("text/plain")
+
+
+def test_exposition_compresses_once_per_render() -> None:
+    cache = ExpositionCache({"text": lambda: b"payload " * 100}, max_staleness_s=60)
+    first = cache.get("text", "gzip")
+    assert cache.get("text", "gzip") is first
+    assert gzip.decompress(first) == b"payload " * 100
+    assert negotiate(None, "br, gzip;q=0") == ("text", "identity")
+    assert negotiate("application/openmetrics-text", "gzip, br") == ("openmetrics", "gzip")
+
+
+def test_subsystem_state_collector_reads_store_at_collect_time() -> None:
+    store = ObservabilityState()
+    store.update(
+        "aggregator",
+        state=HealthState.DEGRADED,
+        updated_ts=1_700_000_000_000,
+        last_error_ts=1_700_000_001_000,
+    )
+    registry = CollectorRegistry()
+    registry.register(SubsystemStateCollector(store))
+
+    def sample(name: str, **labels: str) -> float | None:
+        return registry.get_sample_value(name, labels)
+
+    assert sample("ndefender_subsystem_up", subsystem="aggregator") == 1
+    assert sample("ndefender_aggregator_up") == 1
+    assert sample("ndefender_subsystem_state", subsystem="aggregator", state="DEGRADED") == 1
+    assert sample("ndefender_subsystem_state", subsystem="aggregator", state="OK") == 0
+    assert sample("ndefender_subsystem_last_success_ts", subsystem="aggregator") == 1_700_000_000
+    assert sample("ndefender_subsystem_last_error_ts", subsystem="aggregator") == 1_700_000_001
+    assert sample("ndefender_subsystem_last_error_ts", subsystem="esp32") is None
+    assert sample("ndefender_subsystem_last_update_age_seconds", subsystem="esp32") == -1
+
+    store.update("aggregator", state=HealthState.OFFLINE)
+    assert sample("ndefender_aggregator_up") == 0
+
+
+def test_request_metrics_use_route_templates() -> None:
+    def count(route: str, status: str) -> float:
+        value = REGISTRY.get_sample_value(
+            "ndefender_observability_http_request_seconds_count",
+            {"route": route, "method": "GET", "status": status},
+        )
+        return value or 0.0
+
+    before_status = count("/api/v1/status", "200")
+    before_other = count("other", "404")
+    with TestClient(app) as client:
+        client.get("/api/v1/status")
+        client.get("/api/v1/does-not-exist-123")
+    assert count("/api/v1/status", "200") == before_status + 1
+    assert count("other", "404") == before_other + 1
+    assert count("/api/v1/does-not-exist-123", "404") == 0
+    assert (
+        REGISTRY.get_sample_value(
+            "ndefender_observability_http_requests_in_flight", {"route": "/api/v1/status"}
+        )
+        == 0
+    )
@@ -0,0 +1,102 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ndefender_observability.health.model import HealthState
+from ndefender_observability.main import app
+from ndefender_observability.snapshot import SnapshotState, write_snapshot
+from ndefender_observability.state import ObservabilityState
+
+COLLECTOR_SCRIPT = """
+import sys
+from ndefender_observability.health.model import HealthState
+from ndefender_observability.metrics.registry import POLL_ERRORS_TOTAL, UPS_SOC_PERCENT
+from ndefender_observability.snapshot import write_snapshot
+from ndefender_observability.state import ObservabilityState
+
+store = ObservabilityState()
+store.update("aggregator", state=HealthState.OK, updated_ts=1_700_000_000_000, reasons=["ok"])
+write_snapshot(store, sys.argv[1])
+UPS_SOC_PERCENT.set(55)
+POLL_ERRORS_TOTAL.labels(subsystem="aggregator", kind="timeout").inc(3)
+"""
+
+API_SCRIPT = """
+import json
+from fastapi.testclient import TestClient
+from ndefender_observability.main import app
+
+with TestClient(app) as client:
+    metrics = client.get("/metrics").text
+    status = client.get("/api/v1/status").json()
+    history = client.get("/api/v1/history").status_code
+print(json.dumps({"metrics": metrics, "status": status, "history": history}))
+"""
+
+
+def _run(script: str, env: dict[str, str], *args: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(script), *args],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=60,
+    )
+    return result.stdout
+
+
+def test_api_worker_serves_collector_state_and_metrics(tmp_path: Path) -> None:
+    multiproc_dir = tmp_path / "prom"
+    multiproc_dir.mkdir()
+    snapshot_path = str(tmp_path / "state.json")
+    env = {
+        **os.environ,
+        "PROMETHEUS_MULTIPROC_DIR": str(multiproc_dir),
+        "NDEFENDER_OBS_SERVICE__STATE_SNAPSHOT_PATH": snapshot_path,
+    }
+    _run(COLLECTOR_SCRIPT, env, snapshot_path)
+    output = _run(API_SCRIPT, {**env, "NDEFENDER_OBS_SERVICE__MODE": "api"})
+    data = json.loads(output.strip().splitlines()[-1])
+
+    metrics = data["metrics"]
+    assert "ndefender_ups_soc_percent 55.0" in metrics
+    assert (
+        'ndefender_observability_poll_errors_total{kind="timeout",subsystem="aggregator"} 3.0'
+        in metrics
+    )
+    assert 'ndefender_subsystem_up{subsystem="aggregator"} 1.0' in metrics
+    assert data["history"] == 404
+
+
+def test_snapshot_state_reloads_on_change(tmp_path: Path) -> None:
+    path = str(tmp_path / "state.json")
+    reader = SnapshotState(path)
+    assert reader.get("aggregator").state == HealthState.OFFLINE
+
+    store = ObservabilityState()
+    store.update("aggregator", state=HealthState.DEGRADED, reasons=["slow"], evidence={"a": 1})
+    write_snapshot(store, path)
+    item = reader.get("aggregator")
+    assert (item.state, item.reasons, item.evidence) == (HealthState.DEGRADED, ["slow"], {"a": 1})
+    assert reader.version == store.version
+
+    store.update("aggregator", state=HealthState.OK)
+    write_snapshot(store, path)
+    assert reader.get("aggregator").state == HealthState.OK
+    with pytest.raises(RuntimeError):
+        reader.update("aggregator", state=HealthState.OK)
+
+
+def test_split_mode_requires_multiproc_dir(monkeypatch) -> None:
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    monkeypatch.setenv("NDEFENDER_OBS_SERVICE__MODE", "api")
+    with pytest.raises(RuntimeError, match="PROMETHEUS_MULTIPROC_DIR"):
+        with TestClient(app):
+            pass
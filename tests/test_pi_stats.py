@@ -0,0 +1,92 @@
+from pathlib import Path
+
+from ndefender_observability.collectors import pi_stats
+from ndefender_observability.collectors.pi_stats import PiStatsCollector, SysfsReader
+from ndefender_observability.metrics.registry import REGISTRY
+
+
+def test_pi_sampler_respects_per_source_cadence() -> None:
+    collector = PiStatsCollector(cadences_s={"system": 5, "temp": 5, "throttled": 10, "disk": 30})
+    assert set(collector.due(now=0.0)) == {"system", "temp", "throttled", "disk"}
+
+    collector.sample(["system", "disk"])
+    sampled = collector._attempted_at["system"]
+    assert set(collector.due(now=sampled + 1)) == {"temp", "throttled"}
+    assert "system" in collector.due(now=sampled + 5)
+    assert "disk" not in collector.due(now=sampled + 29)
+
+
+def test_pi_sample_age_exported() -> None:
+    collector = PiStatsCollector()
+    assert REGISTRY.get_sample_value("ndefender_pi_sample_age_seconds", {"source": "disk"}) == -1
+    collector.sample(["disk"])
+    age = REGISTRY.get_sample_value("ndefender_pi_sample_age_seconds", {"source": "disk"})
+    assert 0 <= age < 5
+    assert REGISTRY.get_sample_value("ndefender_pi_disk_free_bytes", {"mount": "/"}) > 0
+
+
+def _fake_sysfs(root: Path, temp_milli: str, throttled: str) -> None:
+    pmic = root / "sys/class/thermal/thermal_zone0"
+    cpu = root / "sys/class/thermal/thermal_zone1"
+    firmware = root / "sys/devices/platform/soc/soc:firmware"
+    for path in (pmic, cpu, firmware):
+        path.mkdir(parents=True)
+    (pmic / "type").write_text("pmic\n")
+    (pmic / "temp").write_text("99000\n")
+    (cpu / "type").write_text("cpu-thermal\n")
+    (cpu / "temp").write_text(temp_milli)
+    (firmware / "get_throttled").write_text(throttled)
+
+
+def test_sysfs_reader_uses_cpu_zone_and_firmware_node(tmp_path: Path) -> None:
+    _fake_sysfs(tmp_path, "48312\n", "50005\n")
+    reader = SysfsReader(str(tmp_path))
+    try:
+        assert reader.temp_path.endswith("thermal_zone1/temp")
+        assert reader.read_temp_c() == 48.312
+        assert reader.read_throttled() == 0x50005
+
+        (tmp_path / "sys/class/thermal/thermal_zone1/temp").write_text("51000\n")
+        assert reader.read_temp_c() == 51.0
+    finally:
+        reader.close()
+
+
+def test_pi_collector_reads_sysfs_without_vcgencmd(tmp_path: Path, monkeypatch) -> None:
+    _fake_sysfs(tmp_path, "47000\n", "0x1\n")
+
+    def _no_fork(args):
+        raise AssertionError("vcgencmd must not be called")
+
+    monkeypatch.setattr(pi_stats, "_run_vcgencmd", _no_fork)
+    collector = PiStatsCollector(sysfs=SysfsReader(str(tmp_path)))
+    collector.sample(["temp", "throttled"])
+    assert REGISTRY.get_sample_value("ndefender_pi_cpu_temp_c") == 47.0
+    assert REGISTRY.get_sample_value("ndefender_pi_throttled_flags", {"flag": "under_voltage"}) == 1
+    assert REGISTRY.get_sample_value("ndefender_pi_throttled_flags", {"flag": "throttled"}) == 0
+    collector.sysfs.close()
+
+
+def test_sysfs_reader_missing_sources(tmp_path: Path) -> None:
+    reader = SysfsReader(str(tmp_path))
+    assert not reader.has_temp
+    assert not reader.has_throttled
+    assert reader.read_temp_c() is None
+
+
+def test_missing_reading_does_not_refresh_sample_age(tmp_path: Path, monkeypatch) -> None:
+    _fake_sysfs(tmp_path, "47000\n", "0x0\n")
+    monkeypatch.setattr(pi_stats, "_run_vcgencmd", lambda args: None)
+    collector = PiStatsCollector(sysfs=SysfsReader(str(tmp_path)))
+    try:
+        collector.sample(["temp"])
+        sampled_at = collector._sampled_at["temp"]
+
+        (tmp_path / "sys/class/thermal/thermal_zone1/temp").write_text("garbage\n")
+        collector.sample(["temp", "throttled"])
+        assert collector._sampled_at["temp"] == sampled_at
+        assert collector._attempted_at["temp"] > sampled_at
+        assert REGISTRY.get_sample_value("ndefender_pi_cpu_temp_c") == 47.0
+        assert "throttled" in collector._sampled_at
+    finally:
+        collector.sysfs.close()
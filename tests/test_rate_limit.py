@@ -0,0 +1,54 @@
+from fastapi.testclient import TestClient
+
+from ndefender_observability.main import app
+from ndefender_observability.metrics.registry import REGISTRY
+from ndefender_observability.utils.http import RateLimiter
+
+
+def _rejected(budget: str) -> float:
+    value = REGISTRY.get_sample_value(
+        "ndefender_observability_rate_limit_rejected_total", {"budget": budget}
+    )
+    return value or 0.0
+
+
+def test_token_bucket_allows_burst_then_refills() -> None:
+    limiter = RateLimiter(max_requests=3, window_s=3)
+    assert [limiter.allow("a", now=0) for _ in range(4)] == [True, True, True, False]
+    # One token per second.
+    assert limiter.allow("a", now=0.5) is False
+    assert limiter.allow("a", now=1.0) is True
+    assert limiter.allow("a", now=1.0) is False
+    # Refill never exceeds the burst size.
+    assert [limiter.allow("a", now=100) for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow("b", now=100) is True
+
+
+def test_key_table_is_bounded() -> None:
+    limiter = RateLimiter(max_requests=1, window_s=60, max_keys=3)
+    for index in range(1000):
+        limiter.allow(f"10.0.{index // 256}.{index % 256}", now=0)
+    assert len(limiter) == 3
+    assert REGISTRY.get_sample_value("ndefender_observability_rate_limit_keys") == 3
+
+
+def test_route_budgets_are_separate() -> None:
+    limiter = RateLimiter(max_requests=5, window_s=60)
+    limiter.add_budget("expensive", 1, 60, ["/metrics", "/api/v1/diag/bundle"])
+    before = _rejected("expensive")
+
+    assert limiter.allow("a", route="/metrics", now=0) is True
+    # The expensive budget is shared between its routes...
+    assert limiter.allow("a", route="/api/v1/diag/bundle", now=0) is False
+    # ...and does not consume the default one.
+    assert all(limiter.allow("a", route="/api/v1/status", now=0) for _ in range(5))
+    assert _rejected("expensive") - before == 1
+
+
+def test_endpoint_rejects_with_429(monkeypatch) -> None:
+    monkeypatch.setenv("NDEFENDER_OBS_RATE_LIMIT__ENABLED", "true")
+    monkeypatch.setenv("NDEFENDER_OBS_RATE_LIMIT__EXPENSIVE__MAX_REQUESTS", "1")
+    with TestClient(app) as client:
+        assert client.get("/metrics").status_code == 200
+        assert client.get("/metrics").status_code == 429
+        assert client.get("/api/v1/health").status_code == 200
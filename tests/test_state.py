@@ -0,0 +1,93 @@
+import asyncio
+import dataclasses
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ndefender_observability.health.model import HealthState
+from ndefender_observability.main import app
+from ndefender_observability.state import ObservabilityState, VersionNotifier, WaiterLimitError
+
+
+def test_updates_publish_new_snapshots_and_versions() -> None:
+    store = ObservabilityState()
+    before = store.snapshot()
+    record = store.get("aggregator")
+
+    assert store.update("aggregator", state=HealthState.OK, reasons=["ok"], updated_ts=1)
+    after = store.snapshot()
+    assert after is not before
+    assert (before.version, after.version) == (0, 1)
+    # Readers holding the old snapshot or record are unaffected.
+    assert before.subsystems["aggregator"].state == HealthState.OFFLINE
+    assert record.state == HealthState.OFFLINE
+    assert after.subsystems["aggregator"].version == 1
+    assert after.subsystems["esp32"] is before.subsystems["esp32"]
+
+    store.update("esp32", state=HealthState.DEGRADED)
+    assert store.version == 2
+    assert store.get("esp32").version == 2
+    assert store.get("aggregator").version == 1
+
+
+def test_noop_updates_keep_versions() -> None:
+    store = ObservabilityState()
+    store.update("antsdr", state=HealthState.OK, reasons=["ok"], evidence={"path": "x"})
+    snapshot = store.snapshot()
+    assert not store.update("antsdr", state=HealthState.OK, reasons=["ok"], evidence={"path": "x"})
+    assert store.snapshot() is snapshot
+    assert store.version == 1
+
+
+def test_records_are_immutable() -> None:
+    store = ObservabilityState()
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        store.get("aggregator").state = HealthState.OK  # type: ignore[misc]
+    with pytest.raises(TypeError):
+        store.snapshot().subsystems["aggregator"] = store.get("esp32")  # type: ignore[index]
+
+
+def test_version_notifier_wakes_shared_waiters() -> None:
+    async def scenario() -> None:
+        store = ObservabilityState()
+        notifier = VersionNotifier(store, max_waiters=2)
+        waiters = [asyncio.create_task(notifier.wait(0, timeout_s=5)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert notifier.waiters == 2
+        with pytest.raises(WaiterLimitError):
+            await notifier.wait(0, timeout_s=5)
+
+        store.update("aggregator", state=HealthState.OK)
+        assert await asyncio.gather(*waiters) == [True, True]
+        assert notifier.waiters == 0
+        # Already past the version: no wait. Unchanged: times out.
+        assert await notifier.wait(0, timeout_s=5)
+        assert not await notifier.wait(1, timeout_s=0.01)
+        notifier.stop()
+
+    asyncio.run(scenario())
+
+
+def test_status_long_poll_returns_after_update() -> None:
+    with TestClient(app) as client:
+        store = client.app.state.store
+        version = client.get("/api/v1/status").json()["version"]
+        timer = threading.Timer(0.2, lambda: client.portal.call(_update_ok, store))
+        timer.start()
+        started = time.monotonic()
+        resp = client.get("/api/v1/status", params={"wait_for_version": version, "timeout_s": 5})
+        timer.join()
+        assert resp.status_code == 200
+        assert resp.json()["version"] == version + 1
+        assert time.monotonic() - started < 4
+
+        timed_out = client.get(
+            "/api/v1/status", params={"wait_for_version": version + 1, "timeout_s": 0.05}
+        )
+        assert timed_out.json()["version"] == version + 1
+
+
+async def _update_ok(store: ObservabilityState) -> None:
+    store.update("aggregator", state=HealthState.OK)
@@ -0,0 +1,42 @@
+from ndefender_observability.collectors.status_flatten import StatusFlattener
+from ndefender_observability.metrics.registry import (
+    AGGREGATOR_STATUS_DROPPED_PATHS,
+    AGGREGATOR_STATUS_VALUE,
+    REGISTRY,
+)
+
+
+def _value(path: str) -> float | None:
+    return REGISTRY.get_sample_value("ndefender_aggregator_status_value", {"path": path})
+
+
+def test_flattener_exports_allow_listed_numbers() -> None:
+    flattener = StatusFlattener(["queues.*", "sources.*.age_s"], max_series=10)
+    payload = {
+        "queues": {"rf": 3, "rid": 1.5, "name": "skip", "paused": False},
+        "sources": {"antsdr": {"age_s": 0.2, "ok": True}, "remoteid": {"age_s": 4}},
+        "ignored": 7,
+    }
+    assert flattener.apply(payload) == 4
+    assert _value("queues.rf") == 3
+    assert _value("sources.remoteid.age_s") == 4
+    assert _value("ignored") is None
+    assert _value("queues.paused") is None
+
+    payload["queues"]["rf"] = 9
+    plan = flattener._plan
+    flattener.apply(payload)
+    assert flattener._plan is plan
+    assert _value("queues.rf") == 9
+
+
+def test_flattener_rebuilds_on_shape_change_and_caps_series() -> None:
+    flattener = StatusFlattener(["depth.*"], max_series=2)
+    flattener.apply({"depth": {"a": 1, "b": 2}})
+    assert _value("depth.b") == 2
+
+    flattener.apply({"depth": {"b": 5, "c": 6, "d": 7}})
+    assert _value("depth.b") == 5
+    assert _value("depth.d") is None
+    assert ("depth.a",) not in AGGREGATOR_STATUS_VALUE._metrics
+    assert AGGREGATOR_STATUS_DROPPED_PATHS._value.get() == 1
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, Gauge
+
+from ndefender_observability.health.model import HealthState
+from ndefender_observability.main import app
+from ndefender_observability.state import ObservabilityState
+from ndefender_observability.stream import (
+    RETRY_FIELD,
+    EventBroadcaster,
+    SubscriberLimitError,
+)
+
+
+def _drain(subscriber) -> list[bytes]:
+    frames = []
+    while not subscriber.queue.empty():
+        frames.append(subscriber.queue.get_nowait())
+    return frames
+
+
+def test_transitions_are_encoded_once_and_replayed() -> None:
+    store = ObservabilityState()
+    broadcaster = EventBroadcaster(store, replay_size=4, registry=CollectorRegistry(), epoch="boot")
+    first = broadcaster.subscribe()
+    second = broadcaster.subscribe()
+
+    store.update("esp32", state=HealthState.OK, reasons=["ok"])
+    store.update("esp32", updated_ts=5)  # no state change, no event
+    store.update("esp32", state=HealthState.DEGRADED, reasons=["loss"])
+
+    frames = _drain(first)
+    assert frames[0] == RETRY_FIELD
+    assert len(frames) == 3
+    assert frames[1].startswith(b"id: boot-1\nevent: transition\n")
+    assert b'"from":"OFFLINE","to":"OK"' in frames[1]
+    assert b'"reasons":["loss"]' in frames[2]
+    # The same encoded bytes go to every subscriber.
+    assert _drain(second)[1] is frames[1]
+
+    resumed = broadcaster.subscribe(last_event_id="boot-1")
+    assert _drain(resumed) == [RETRY_FIELD, frames[2]]
+    assert broadcaster.replay("boot-2") == []
+    broadcaster.stop()
+
+
+def test_unknown_last_event_id_gets_resync() -> None:
+    store = ObservabilityState()
+    broadcaster = EventBroadcaster(store, replay_size=2, registry=CollectorRegistry(), epoch="boot")
+    for state in (HealthState.OK, HealthState.DEGRADED, HealthState.OK):
+        store.update("antsdr", state=state)
+    # Event 1 fell out of the ring, 99 is ahead of us, and ids from another process or
+    # worker carry a different epoch even when their counter is in range.
+    for last_event_id in ("boot-0", "boot-99", "other-1", "other-3"):
+        (frame,) = broadcaster.replay(last_event_id)
+        assert frame.startswith(b"event: resync\n")
+        assert b'"last_id": "boot-3"' in frame
+    assert len(broadcaster.replay("boot-1")) == 2
+    with pytest.raises(ValueError):
+        broadcaster.replay("7")
+    broadcaster.stop()
+
+
+def test_slow_subscriber_is_disconnected() -> None:
+    store = ObservabilityState()
+    broadcaster = EventBroadcaster(store, queue_size=2, registry=CollectorRegistry())
+    subscriber = broadcaster.subscribe()
+    for state in (HealthState.OK, HealthState.DEGRADED, HealthState.OK):
+        store.update("remoteid", state=state)
+    assert broadcaster.subscribers == 0
+    assert _drain(subscriber)[-1] is None
+
+
+def test_rate_ticks_and_event_generator() -> None:
+    registry = CollectorRegistry()
+    rates = Gauge("ndefender_events_rate_60s", "rates", ["subsystem", "type"], registry=registry)
+    rates.labels(subsystem="antsdr", type="detection").set(0.25)
+    broadcaster = EventBroadcaster(ObservabilityState(), registry=registry)
+
+    async def scenario() -> list[bytes]:
+        subscriber = broadcaster.subscribe()
+        broadcaster.publish_rates()
+        events = broadcaster.events(subscriber, keepalive_s=0.01)
+        frames = [await anext(events), await anext(events), await anext(events)]
+        await events.aclose()
+        return frames
+
+    retry, tick, keepalive = asyncio.run(scenario())
+    assert retry == RETRY_FIELD
+    assert b"event: rates\n" in tick
+    assert b'"rates":{"antsdr":{"detection":0.25}}' in tick
+    assert keepalive.startswith(b":")
+    assert broadcaster.subscribers == 0
+
+
+def test_subscriber_cap() -> None:
+    broadcaster = EventBroadcaster(
+        ObservabilityState(), max_subscribers=1, registry=CollectorRegistry()
+    )
+    broadcaster.subscribe()
+    with pytest.raises(SubscriberLimitError):
+        broadcaster.subscribe()
+
+
+def test_stream_rejects_bad_last_event_id() -> None:
+    with TestClient(app) as client:
+        for last_event_id in ("abc", "12", "boot-x"):
+            response = client.get("/api/v1/stream", headers={"Last-Event-ID": last_event_id})
+            assert response.status_code == 400
@@ -1,4 +1,5 @@
 import asyncio
+import json
 
 from ndefender_observability.collectors.system_controller_http import SystemControllerHttpCollector
 from ndefender_observability.health.model import HealthState
@@ -6,9 +7,11 @@ from ndefender_observability.state import ObservabilityState
 
 
 class ResponseStub:
-    def __init__(self, status_code: int, payload: dict):
+    def __init__(self, status_code: int, payload: dict, headers: dict | None = None):
         self.status_code = status_code
         self._payload = payload
+        self.headers = headers or {}
+        self.content = json.dumps(payload).encode()
 
     def json(self):
         return self._payload
@@ -17,8 +20,10 @@ class ResponseStub:
 class ClientStub:
     def __init__(self, responses: dict[str, ResponseStub]):
         self._responses = responses
+        self.requests: list[tuple[str, dict | None]] = []
 
-    async def get(self, endpoint: str):
+    async def get(self, endpoint: str, headers: dict | None = None):
+        self.requests.append((endpoint, headers))
         if endpoint not in self._responses:
             raise RuntimeError("missing stub")
         return self._responses[endpoint]
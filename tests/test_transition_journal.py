@@ -0,0 +1,99 @@
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry
+
+from ndefender_observability.health.journal import (
+    Transition,
+    TransitionJournal,
+    TransitionRing,
+    evidence_digest,
+)
+from ndefender_observability.health.model import HealthState
+from ndefender_observability.main import app
+from ndefender_observability.state import ObservabilityState
+
+
+def _transition(ts: int) -> Transition:
+    return Transition("esp32", ts, HealthState.OK, HealthState.DEGRADED, ts, [], "")
+
+
+def test_ring_keeps_newest_and_searches_by_time() -> None:
+    ring = TransitionRing(4)
+    for ts in (10, 20, 30, 40, 50, 60):
+        ring.append(_transition(ts))
+    assert len(ring) == 4
+    assert [item.ts for item in ring.since(0)] == [30, 40, 50, 60]
+    assert [item.ts for item in ring.since(45)] == [50, 60]
+    assert [item.ts for item in ring.since(50)] == [50, 60]
+    assert ring.since(61) == []
+
+
+def test_journal_records_transitions_and_counters() -> None:
+    store = ObservabilityState()
+    journal = TransitionJournal(store, capacity=8)
+    registry = CollectorRegistry()
+    registry.register(journal)
+
+    store.update("esp32", state=HealthState.OK, reasons=["ok"], evidence={"loss": 0})
+    store.update("esp32", evidence={"loss": 0.01})  # same state: not a transition
+    store.update("esp32", state=HealthState.DEGRADED, reasons=["loss"], evidence={"loss": 0.4})
+    store.update("antsdr", state=HealthState.OK)
+
+    transitions = journal.query()
+    assert [(item.subsystem, item.from_state, item.to_state) for item in transitions] == [
+        ("esp32", HealthState.OFFLINE, HealthState.OK),
+        ("esp32", HealthState.OK, HealthState.DEGRADED),
+        ("antsdr", HealthState.OFFLINE, HealthState.OK),
+    ]
+    latest = journal.query("esp32", transitions[1].ts)
+    assert latest[-1].reasons == ["loss"]
+    assert latest[-1].evidence_digest == evidence_digest({"loss": 0.4})
+    assert latest[-1].version == 3
+
+    transitions_total = registry.get_sample_value(
+        "ndefender_subsystem_transitions_total",
+        {"subsystem": "esp32", "from": "OK", "to": "DEGRADED"},
+    )
+    assert transitions_total == 1
+    for state in ("OFFLINE", "OK", "DEGRADED"):
+        seconds = registry.get_sample_value(
+            "ndefender_subsystem_time_in_state_seconds_total",
+            {"subsystem": "esp32", "state": state},
+        )
+        assert seconds is not None and seconds >= 0
+    journal.stop()
+
+
+def test_evidence_digest_is_stable() -> None:
+    assert evidence_digest({}) == ""
+    assert evidence_digest({"a": 1, "b": 2}) == evidence_digest({"b": 2, "a": 1})
+    assert evidence_digest({"a": 1}) != evidence_digest({"a": 2})
+
+
+def test_transitions_endpoint() -> None:
+    with TestClient(app) as client:
+        store = client.app.state.store
+        store.update("remoteid", state=HealthState.OK, reasons=["ok"])
+        store.update("aggregator", state=HealthState.DEGRADED, reasons=["slow"])
+
+        data = client.get("/api/v1/health/transitions").json()
+        assert [item["subsystem"] for item in data["transitions"]] == ["remoteid", "aggregator"]
+
+        data = client.get(
+            "/api/v1/health/transitions", params={"subsystem": "aggregator", "since": 0}
+        ).json()
+        assert data["transitions"][0]["from"] == "OFFLINE"
+        assert data["transitions"][0]["to"] == "DEGRADED"
+
+        since = data["transitions"][0]["ts"] + 1
+        data = client.get("/api/v1/health/transitions", params={"since": since}).json()
+        assert data["transitions"] == []
+
+        assert client.get("/api/v1/health/transitions?subsystem=nope").status_code == 404
+        assert client.get("/api/v1/health/transitions?since=x").status_code == 400
+
+
+@pytest.mark.parametrize("capacity", [0, -1])
+def test_ring_rejects_bad_capacity(capacity: int) -> None:
+    with pytest.raises(ValueError):
+        TransitionRing(capacity)
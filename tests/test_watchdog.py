@@ -0,0 +1,79 @@
+from prometheus_client import CollectorRegistry
+
+from ndefender_observability.health.evaluator import HealthEvaluator
+from ndefender_observability.health.model import HealthState
+from ndefender_observability.health.watchdog import STALLED_REASON, StalenessWatchdog
+from ndefender_observability.state import ObservabilityState
+
+STALE = {"aggregator": 5, "esp32": 5}
+
+
+def test_stalled_subsystem_is_demoted_once_past_deadline() -> None:
+    store = ObservabilityState()
+    watchdog = StalenessWatchdog(store, STALE)
+    store.update("aggregator", state=HealthState.OK, updated_ts=1_000, reasons=["ok"])
+    store.update("aggregator", updated_ts=3_000)
+
+    # The first deadline (6_000) was superseded by the refresh at 3_000.
+    assert watchdog.check(now=7_000) == []
+    assert watchdog.check(now=8_000) == ["aggregator"]
+    record = store.get("aggregator")
+    assert record.state == HealthState.DEGRADED
+    assert record.reasons == ["ok", STALLED_REASON]
+    assert record.updated_ts == 3_000
+    # Nothing re-armed until the collector reports again.
+    assert watchdog.check(now=60_000) == []
+
+    store.update("aggregator", state=HealthState.OK, updated_ts=61_000, reasons=["ok"])
+    assert "aggregator" not in watchdog.stalled
+    assert watchdog.check(now=65_000) == []
+    assert watchdog.check(now=66_000) == ["aggregator"]
+    watchdog.stop()
+
+
+def test_live_collector_is_left_to_its_own_staleness_logic() -> None:
+    store = ObservabilityState()
+    watchdog = StalenessWatchdog(store, STALE)
+    store.update("esp32", state=HealthState.DEGRADED, updated_ts=1_000, reasons=["stale"])
+    store.mark_cycle("esp32", 5_500)
+
+    assert watchdog.check(now=6_000) == []
+    assert store.get("esp32").reasons == ["stale"]
+    # Re-armed from the last cycle; once cycles stop too, it is a stall.
+    assert watchdog.check(now=10_500) == ["esp32"]
+    assert store.get("esp32").reasons == ["stale", STALLED_REASON]
+    watchdog.stop()
+
+
+def test_demotion_bypasses_evaluator_and_offline_stays_offline() -> None:
+    store = ObservabilityState(evaluator=HealthEvaluator(enter_cycles=5, min_dwell_s=3600))
+    watchdog = StalenessWatchdog(store, STALE)
+    store.update("aggregator", state=HealthState.OK, updated_ts=1_000)
+    store.update(
+        "esp32", state=HealthState.OFFLINE, updated_ts=1_000, reasons=["poll failed: timeout"]
+    )
+
+    assert sorted(watchdog.check(now=6_000)) == ["aggregator", "esp32"]
+    assert store.get("aggregator").state == HealthState.DEGRADED
+    assert store.get("esp32").state == HealthState.OFFLINE
+    assert store.get("esp32").reasons == ["poll failed: timeout", STALLED_REASON]
+    watchdog.stop()
+
+
+def test_liveness_metrics() -> None:
+    store = ObservabilityState()
+    watchdog = StalenessWatchdog(store, STALE)
+    registry = CollectorRegistry()
+    registry.register(watchdog)
+    store.update("aggregator", state=HealthState.OK, updated_ts=1_000)
+    store.mark_cycle("aggregator")
+    watchdog.check(now=6_000)
+
+    def value(name: str, subsystem: str) -> float | None:
+        return registry.get_sample_value(name, {"subsystem": subsystem})
+
+    # A cycle was just marked, so the subsystem is alive rather than stalled.
+    assert value("ndefender_subsystem_stalled", "aggregator") == 0
+    assert value("ndefender_collector_last_cycle_age_seconds", "aggregator") < 5
+    assert value("ndefender_collector_last_cycle_age_seconds", "esp32") is None
+    watchdog.stop()
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, Gauge
+from starlette.websockets import WebSocketDisconnect
+
+from ndefender_observability.health.model import HealthState
+from ndefender_observability.main import app
+from ndefender_observability.state import ObservabilityState
+from ndefender_observability.ws.server import WsClient, WsHub
+
+
+class _Socket:
+    pass
+
+
+def _hub(**kwargs) -> tuple[WsHub, ObservabilityState, Gauge]:
+    registry = CollectorRegistry()
+    gauge = Gauge("demo_temp_c", "demo", ["zone"], registry=registry)
+    store = ObservabilityState()
+    return WsHub(store, ["demo_temp_c"], registry=registry, **kwargs), store, gauge
+
+
+def test_tick_broadcasts_only_changed_fields() -> None:
+    hub, store, gauge = _hub()
+    client = WsClient(_Socket(), queue_size=8)
+    hub.clients.add(client)
+    gauge.labels(zone="cpu").set(40.0)
+    hub.tick()
+    client.frames.clear()
+
+    # Nothing changed: no frame.
+    assert hub.tick() == 0
+    assert not client.frames
+
+    store.update("aggregator", state=HealthState.OK, updated_ts=1)
+    store.update("aggregator", updated_ts=2)
+    gauge.labels(zone="cpu").set(41.5)
+    assert hub.tick() == 1
+    delta = json.loads(client.frames.popleft())
+    assert delta["type"] == "delta"
+    assert delta["version"] == 2
+    # Both updates are coalesced; untouched subsystems and fields are omitted.
+    assert delta["subsystems"] == {"aggregator": {"state": "OK", "updated_ts": 2}}
+    assert delta["metrics"] == {'demo_temp_c{zone="cpu"}': 41.5}
+
+    gauge.remove("cpu")
+    hub.tick()
+    assert json.loads(client.frames.popleft())["metrics"] == {'demo_temp_c{zone="cpu"}': None}
+
+
+def test_slow_client_queue_collapses_into_resync() -> None:
+    hub, store, _ = _hub(queue_size=2)
+    client = WsClient(_Socket(), queue_size=2)
+    hub.clients.add(client)
+    hub.tick()
+    for ts in range(1, 6):
+        store.update("esp32", updated_ts=ts)
+        hub.tick()
+    # Deltas beyond the bound are replaced by one snapshot built at send time.
+    assert len(client.frames) == 1
+    snapshot = json.loads(hub.snapshot_frame())
+    assert snapshot["type"] == "snapshot"
+    assert snapshot["version"] == 5
+    assert snapshot["subsystems"]["esp32"]["updated_ts"] == 5
+
+
+def test_ws_endpoint_pushes_snapshot_then_deltas(monkeypatch) -> None:
+    monkeypatch.setenv("NDEFENDER_OBS_WS__ENABLED", "true")
+    monkeypatch.setenv("NDEFENDER_OBS_WS__MAX_CLIENTS", "1")
+    with TestClient(app) as client:
+        store = client.app.state.store
+        with client.websocket_connect("/ws") as websocket:
+            snapshot = websocket.receive_json()
+            assert snapshot["type"] == "snapshot"
+            assert set(snapshot["subsystems"]) == {item.subsystem for item in store.all()}
+
+            with client.websocket_connect("/ws") as rejected:
+                with pytest.raises(WebSocketDisconnect) as excinfo:
+                    rejected.receive_json()
+                assert excinfo.value.code == 1013
+
+            client.portal.call(_update_ok, store)
+            client.portal.call(client.app.state.ws_hub.tick)
+            delta = websocket.receive_json()
+            assert delta["type"] == "delta"
+            assert delta["subsystems"]["remoteid"]["state"] == "OK"
+
+
+def test_ws_disabled_by_default() -> None:
+    with TestClient(app) as client:
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/ws") as websocket:
+                websocket.receive_json()
+
+
+async def _update_ok(store: ObservabilityState) -> None:
+    store.update("remoteid", state=HealthState.OK, reasons=["ok"])